@@ -2,28 +2,264 @@
 API REST para el sistema Banco de Alimentos.
 Expone endpoints para buscar aliados en documentos y leer Google Sheets.
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file
 from flask_cors import CORS
+import itertools
 import os
+import re
 import sys
+import tempfile
 import threading
+import time
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from core.services import GoogleSheetsService, ComparisonService, clean_tokens
-from config import API_HOST, API_PORT, API_DEBUG
+from core.services import metrics, tracing
+from core.services.search_scheduler import SearchScheduler
+from core.services.json_stream import dumps, gzip_bytes, gzip_stream, iter_ndjson
+from core.services import evidence_archive, gallery, run_export
+from core.services.document_index import SUPPORTED_EXTENSIONS
+from core.services.lookup_index import DocumentLookup
+from config import (API_HOST, API_PORT, API_DEBUG, API_SERVER, API_THREADS,
+                    MAX_CONCURRENT_SEARCHES, SEARCH_JOB_HISTORY, USER_DATA_DIR,
+                    GZIP_MIN_BYTES, DOCUMENT_A_URL, LOOKUP_MAX_RESULTS, SCREENSHOTS_DIR)
+from urllib.parse import quote
+from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
 CORS(app)
 
 # ════════════════════════════════════════════════════════════════
-# FLAG GLOBAL PARA DETENER BÚSQUEDA
+# SERVICIOS COMPARTIDOS ENTRE HILOS DEL SERVIDOR
 # ════════════════════════════════════════════════════════════════
-search_stop_event = threading.Event()
+# Con waitress/gunicorn varias peticiones corren en paralelo; el lock
+# garantiza que /api/reload-credentials reemplace ambos servicios a la vez
+# y que cada petición vea un par consistente.
+# Los servicios (y googleapiclient/selenium con ellos) se crean en la primera
+# petición que los usa: importar app.py no los construye.
+_services_lock = threading.Lock()
+
+sheets_service = None
+comparison_service = None
+
+
+def _create_services():
+    """Nuevo par de servicios (importa sus dependencias al primer uso)."""
+    from core.services.google_sheets_service import GoogleSheetsService
+    from core.services.comparison_service import ComparisonService
+    new_sheets_service = GoogleSheetsService()
+    return new_sheets_service, ComparisonService(new_sheets_service,
+                                                 screenshots_dir=SCREENSHOTS_DIR,
+                                                 outcome_cache=get_outcome_cache(),
+                                                 run_store=get_run_store())
+
+
+def _current_services():
+    """Par vigente, creándolo si aún no existe (llamar con _services_lock)."""
+    global sheets_service, comparison_service
+    if comparison_service is None:
+        sheets_service, comparison_service = _create_services()
+    return sheets_service, comparison_service
+
+
+def get_sheets_service():
+    """Servicio de Sheets vigente (puede cambiar tras recargar credenciales)."""
+    with _services_lock:
+        return _current_services()[0]
+
+
+def get_comparison_service():
+    """Servicio de comparación vigente (puede cambiar tras recargar credenciales)."""
+    with _services_lock:
+        return _current_services()[1]
+
+
+# ════════════════════════════════════════════════════════════════
+# ALMACENAMIENTO LOCAL (historial, caché de resultados, capturas)
+# ════════════════════════════════════════════════════════════════
+# Independiente de los servicios de Google: /api/runs, la galería y la caché
+# solo leen archivos y no cargan googleapiclient ni selenium. Los servicios
+# de comparación reciben estas mismas instancias.
+_storage_lock = threading.Lock()
+_run_store = None
+_outcome_cache = None
+
+
+def get_run_store():
+    """Ejecuciones guardadas (USER_DATA_DIR/runs)."""
+    global _run_store
+    with _storage_lock:
+        if _run_store is None:
+            from core.services.run_store import RunStore
+            _run_store = RunStore()
+        return _run_store
+
+
+def get_outcome_cache():
+    """Caché de resultados (None si está desactivada en config.py)."""
+    global _outcome_cache
+    from config import OUTCOME_CACHE_ENABLED
+    if not OUTCOME_CACHE_ENABLED:
+        return None
+    with _storage_lock:
+        if _outcome_cache is None:
+            from core.services.outcome_cache import OutcomeCache
+            _outcome_cache = OutcomeCache()
+        return _outcome_cache
+
+
+_thumbnail_cache = None
+
+
+def get_thumbnail_cache() -> gallery.ThumbnailCache:
+    """Caché de miniaturas de la galería (se crea al primer uso)."""
+    global _thumbnail_cache
+    with _services_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = gallery.ThumbnailCache()
+        return _thumbnail_cache
+
+
+# Índices de consulta rápida por documento A (se descartan al recargar credenciales)
+_lookups = {}
+
+
+def get_document_lookup(document_id: str) -> DocumentLookup:
+    """Índice de consulta del documento A (se crea al primer uso)."""
+    with _services_lock:
+        lookup = _lookups.get(document_id)
+        if lookup is None:
+            service = _current_services()[1]
+            lookup = DocumentLookup(service.sheets_service, service.drive_service, document_id)
+            _lookups[document_id] = lookup
+        return lookup
+
+
+# ════════════════════════════════════════════════════════════════
+# PLANIFICADOR DE BÚSQUEDAS (un token de cancelación por trabajo)
+# ════════════════════════════════════════════════════════════════
+
+def _run_search_job(job):
+    """Ejecuta un trabajo del planificador con su propio token de cancelación."""
+    return get_comparison_service().search_names_in_document(
+        stop_event=job.cancel_event,
+        run_id=job.job_id,
+        **job.params
+    )
+
+
+search_scheduler = SearchScheduler(_run_search_job,
+                                   max_concurrent=MAX_CONCURRENT_SEARCHES,
+                                   history_size=SEARCH_JOB_HISTORY)
+
+metrics.ACTIVE_JOBS.set_function(lambda: search_scheduler.running_count)
+metrics.QUEUED_JOBS.set_function(lambda: search_scheduler.queued_count)
+
+
+def _flag(value, default: bool = True) -> bool:
+    """Interpreta un booleano de JSON o de un campo de formulario ("false", "0", "no")."""
+    if value is None:
+        return default
+    return str(value).strip().lower() not in ('false', '0', 'no', 'off', '')
+
+
+def _parse_search_request(data):
+    """
+    Valida el body de una búsqueda.
+
+    Returns:
+        (params, error): params para search_names_in_document o mensaje de error
+    """
+    if not data:
+        return None, 'No se recibieron datos JSON'
+
+    required_fields = ['list_b_id', 'list_b_range', 'document_a_url']
+    missing_fields = [f for f in required_fields if f not in data]
+
+    if missing_fields:
+        return None, f'Campos faltantes: {", ".join(missing_fields)}'
+
+    params = {
+        'list_b_id': data['list_b_id'],
+        'list_b_range': data['list_b_range'],
+        'document_a_url': data['document_a_url'],
+        'auth_wait_seconds': data.get('auth_wait_seconds', None),
+        'filename_prefix': data.get('filename_prefix', 'search'),
+        'use_cache': _flag(data.get('use_cache')),
+        'detection': data.get('detection'),
+        'evidence': data.get('evidence'),
+    }
+    if params['detection'] not in (None, 'keystroke', 'script'):
+        return None, 'detection debe ser "keystroke" o "script"'
+    if params['evidence'] not in (None, 'found', 'all', 'none'):
+        return None, 'evidence debe ser "found", "all" o "none"'
+    return params, None
+
+
+def _submit_search(data):
+    """Encola una búsqueda. Retorna (job, error_response)."""
+    params, error = _parse_search_request(data)
+    if error:
+        return None, (jsonify({'status': 'error', 'message': error}), 400)
+
+    job_id = data.get('job_id')
+    if job_id is not None and not SearchScheduler.is_valid_job_id(str(job_id)):
+        return None, (jsonify({'status': 'error',
+                               'message': 'job_id solo admite letras, números, "-" y "_" (máx. 64)'}), 400)
+    # El job_id es el run_id: reusarlo reemplazaría los resultados y la traza
+    # de una ejecución anterior (ya fuera del historial o de otro proceso)
+    if job_id is not None and (get_run_store().exists(str(job_id))
+                               or tracing.trace_path(str(job_id))):
+        return None, (jsonify({'status': 'error',
+                               'message': f'Ya existe una ejecución guardada con job_id {job_id}'}), 409)
+    try:
+        priority = int(data.get('priority', 0))
+    except (TypeError, ValueError):
+        return None, (jsonify({'status': 'error', 'message': 'priority debe ser un entero'}), 400)
+
+    try:
+        job = search_scheduler.submit(params, priority=priority, job_id=job_id)
+    except ValueError as e:
+        return None, (jsonify({'status': 'error', 'message': str(e)}), 409)
+
+    print(f"\n{'='*60}")
+    print(f"Nueva solicitud de búsqueda recibida (job {job.job_id})")
+    print(f"Lista B: {params['list_b_id']}")
+    print(f"Rango: {params['list_b_range']}")
+    print(f"Documento A: {params['document_a_url'][:80]}...")
+    if params['auth_wait_seconds']:
+        print(f"Tiempo de autenticación: {params['auth_wait_seconds']}s")
+    print(f"{'='*60}\n")
 
-sheets_service = GoogleSheetsService()
-comparison_service = ComparisonService(sheets_service)
-comparison_service.set_stop_event(search_stop_event)
+    return job, None
+
+
+# ════════════════════════════════════════════════════════════════
+# MÉTRICAS DE PETICIONES
+# ════════════════════════════════════════════════════════════════
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _observe_request_duration(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # La regla (no la URL) evita una serie por cada job_id
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.API_REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                            method=request.method,
+                                            endpoint=endpoint,
+                                            status=response.status_code)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Métricas en formato de texto de Prometheus."""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route('/', methods=['GET'])
@@ -45,73 +281,613 @@ def search_in_document():
         "list_b_range": "nombre_hoja!A2:A",
         "document_a_url": "https://...",
         "auth_wait_seconds": 15,
-        "filename_prefix": "sat"
+        "filename_prefix": "sat",
+        "job_id": "opcional, para cancelarla con /api/stop-search",
+        "priority": 0,
+        "use_cache": true,
+        "detection": "keystroke | script",
+        "evidence": "found | all | none"
     }
+
+    Con use_cache (default) los aliados ya verificados contra la misma
+    revisión del documento A no se vuelven a buscar (ver cache_hits).
+    Con detection "script" la página se revisa por lotes y solo los
+    nombres que necesitan evidencia pasan por Ctrl+F y captura.
     """
     try:
-        data = request.get_json()
+        job, error_response = _submit_search(request.get_json())
+        if error_response:
+            return error_response
 
-        if not data:
-            return jsonify({'status': 'error', 'message': 'No se recibieron datos JSON'}), 400
+        # Respuesta síncrona: se espera a que el trabajo termine
+        job.done_event.wait()
 
-        required_fields = ['list_b_id', 'list_b_range', 'document_a_url']
-        missing_fields = [f for f in required_fields if f not in data]
+        if job.status == 'error':
+            return jsonify({'status': 'error', 'message': job.error, 'job_id': job.job_id}), 500
 
-        if missing_fields:
-            return jsonify({'status': 'error', 'message': f'Campos faltantes: {", ".join(missing_fields)}'}), 400
+        return jsonify({**job.result, 'job_id': job.job_id}), 200
 
-        list_b_id = data['list_b_id']
-        list_b_range = data['list_b_range']
-        document_a_url = data['document_a_url']
-        auth_wait_seconds = data.get('auth_wait_seconds', None)
+    except Exception as e:
+        print(f"Error en endpoint: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/search-in-file', methods=['POST'])
+def search_in_file():
+    """
+    Busca los nombres de la lista B en un documento A local (CSV/XLSX),
+    sin navegador. Útil cuando el documento A se puede descargar (ej. la
+    lista 69-B del SAT): indexa el archivo y responde en segundos.
+
+    Acepta multipart/form-data con el archivo:
+        document_a_file: archivo .csv/.xlsx
+        list_b_id, list_b_range, filename_prefix, sheet_name, name_column,
+        rfc_column, render_evidence, use_cache ("false" para desactivarlos)
+        (campos de formulario)
+
+    o JSON con la ruta de un archivo ya presente en el servidor:
+    {
+        "list_b_id": "ID_DEL_GOOGLE_SHEET",
+        "list_b_range": "nombre_hoja!A2:A",
+        "document_a_path": "C:/Users/.../69-B.csv",
+        "filename_prefix": "sat",
+        "sheet_name": "opcional, hoja del XLSX",
+        "name_column": "opcional, columna del nombre en la lista B (ej. A)",
+        "rfc_column": "opcional, columna del RFC en la lista B (ej. C)",
+        "render_evidence": true,
+        "use_cache": true
+    }
+
+    Con rfc_column los aliados con RFC se cruzan por RFC exacto contra el
+    documento A y los que no tienen RFC se buscan por nombre.
+
+    Con render_evidence (default) se dibuja una imagen por nombre con la
+    fila encontrada resaltada, con el mismo nombre de archivo que las
+    capturas de Chrome (prefijo_NOMBRE_FECHA.png).
+    """
+    uploaded_path = None
+    try:
+        uploaded = request.files.get('document_a_file')
+        data = request.form if uploaded else (request.get_json(silent=True) or {})
+
+        missing_fields = [f for f in ('list_b_id', 'list_b_range') if not data.get(f)]
+        if not uploaded and not data.get('document_a_path'):
+            missing_fields.append('document_a_file o document_a_path')
+        if missing_fields:
+            return jsonify({'status': 'error',
+                            'message': f'Campos faltantes: {", ".join(missing_fields)}'}), 400
+        for field in ('name_column', 'rfc_column'):
+            if data.get(field) and not re.fullmatch(r'[A-Za-z]{1,3}', data[field].strip()):
+                return jsonify({'status': 'error',
+                                'message': f'{field} debe ser la letra de una columna (ej. C)'}), 400
+
+        if uploaded:
+            filename = secure_filename(uploaded.filename or '')
+            if os.path.splitext(filename)[1].lower() not in SUPPORTED_EXTENSIONS:
+                return jsonify({'status': 'error',
+                                'message': f'Formato no soportado. Usa {", ".join(SUPPORTED_EXTENSIONS)}'}), 400
+            # Nombre único por petición: dos subidas de "69-B.xlsx" a la vez
+            # no se pisan mientras se leen
+            documents_dir = USER_DATA_DIR / "documents"
+            documents_dir.mkdir(parents=True, exist_ok=True)
+            stem, extension = os.path.splitext(filename)
+            fd, uploaded_path = tempfile.mkstemp(dir=documents_dir, prefix=f"{stem}-", suffix=extension)
+            os.close(fd)
+            uploaded.save(uploaded_path)
+            document_path = uploaded_path
+        else:
+            document_path = data['document_a_path']
+            if os.path.splitext(document_path)[1].lower() not in SUPPORTED_EXTENSIONS:
+                return jsonify({'status': 'error',
+                                'message': f'Formato no soportado. Usa {", ".join(SUPPORTED_EXTENSIONS)}'}), 400
+            if not os.path.isfile(document_path):
+                return jsonify({'status': 'error',
+                                'message': f'No existe el archivo: {document_path}'}), 404
 
         print(f"\n{'='*60}")
-        print(f"Nueva solicitud de búsqueda recibida")
-        print(f"Lista B: {list_b_id}")
-        print(f"Rango: {list_b_range}")
-        print(f"Documento A: {document_a_url[:80]}...")
-        if auth_wait_seconds:
-            print(f"Tiempo de autenticación: {auth_wait_seconds}s")
+        print("Nueva búsqueda en archivo local")
+        print(f"Lista B: {data['list_b_id']}")
+        print(f"Rango: {data['list_b_range']}")
+        print(f"Documento A: {document_path}")
         print(f"{'='*60}\n")
 
-        # Limpiar stop_event antes de iniciar nueva búsqueda
-        search_stop_event.clear()
-
-        result = comparison_service.search_names_in_document(
-            list_b_id=list_b_id,
-            list_b_range=list_b_range,
-            document_a_url=document_a_url,
-            auth_wait_seconds=auth_wait_seconds,
-            filename_prefix=data.get('filename_prefix', 'search')
+        result = get_comparison_service().match_names_in_file(
+            list_b_id=data['list_b_id'],
+            list_b_range=data['list_b_range'],
+            document_path=document_path,
+            filename_prefix=data.get('filename_prefix') or 'search',
+            sheet_name=data.get('sheet_name') or None,
+            render_evidence=_flag(data.get('render_evidence')),
+            use_cache=_flag(data.get('use_cache')),
+            name_column=data.get('name_column') or None,
+            rfc_column=data.get('rfc_column') or None,
         )
-
         return jsonify(result), 200
 
+    except (ValueError, KeyError) as e:
+        # Formato ilegible u hoja inexistente en el XLSX
+        return jsonify({'status': 'error', 'message': f'No se pudo leer el documento: {e}'}), 400
     except Exception as e:
         print(f"Error en endpoint: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'status': 'error', 'message': str(e)}), 500
+    finally:
+        # Los resultados quedan en la caché por sha256: el archivo ya no se necesita
+        if uploaded_path:
+            try:
+                os.remove(uploaded_path)
+            except OSError:
+                pass
+
+
+@app.route('/api/lookup', methods=['GET'])
+def lookup():
+    """
+    Consulta instantánea de un nombre (o RFC) en el documento A, sin Chrome.
+
+    Query params:
+        q: Texto a buscar (obligatorio)
+        document: URL o ID del Google Sheet del documento A (default: DOCUMENT_A_URL)
+        limit: Máximo de filas candidatas (default: LOOKUP_MAX_RESULTS)
+
+    Responde desde un índice en memoria del documento A leído con Sheets
+    API. La primera consulta de un documento espera a que se construya;
+    después se reconstruye en segundo plano cuando cambia su revisión.
+
+    Response:
+    {
+        "query": "santa veneranda",
+        "results": [{"row": 978, "match": "word", "column": "C",
+                     "value": "AGRÍCOLA SANTA VENERANDA, S.A. DE C.V.",
+                     "values": {"RFC": "...", "Nombre del Contribuyente": "..."}}],
+        "elapsed_ms": 0.4,
+        "index": {"revision": "...", "rows": 11873, "refreshing": false, ...}
+    }
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'status': 'error', 'message': 'Falta el parámetro q'}), 400
+    try:
+        limit = min(int(request.args.get('limit', LOOKUP_MAX_RESULTS)), 200)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'limit debe ser un número'}), 400
+    from core.services.google_sheets_service import GoogleSheetsService
+    document_id = GoogleSheetsService.extract_spreadsheet_id(
+        request.args.get('document') or DOCUMENT_A_URL)
+
+    try:
+        result = get_document_lookup(document_id).search(query, limit)
+    except Exception as e:
+        print(f"Error en consulta rápida: {e}")
+        return jsonify({'status': 'error', 'message': f'No se pudo leer el documento A: {e}'}), 502
+    return jsonify({'status': 'success', **result}), 200
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Encola una búsqueda y responde de inmediato con su job_id.
+    Acepta el mismo body que /api/search-in-document, más "priority" opcional
+    (mayor se atiende antes).
+    """
+    job, error_response = _submit_search(request.get_json())
+    if error_response:
+        return error_response
+
+    return jsonify({'status': 'success',
+                    'job': job.to_dict(),
+                    'queue_position': search_scheduler.queue_position(job.job_id)}), 202
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Lista los trabajos en espera, en ejecución y terminados recientes."""
+    jobs = [job.to_dict() for job in search_scheduler.list_jobs()]
+    return jsonify({'status': 'success',
+                    'running': search_scheduler.running_count,
+                    'queued': search_scheduler.queued_count,
+                    'max_concurrent': search_scheduler.max_concurrent,
+                    'jobs': jobs}), 200
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Estado de un trabajo; incluye el resultado cuando terminó."""
+    job = search_scheduler.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Trabajo no encontrado: {job_id}'}), 404
+
+    data = job.to_dict(include_result=True)
+    if job.status == 'queued':
+        data['queue_position'] = search_scheduler.queue_position(job_id)
+    return jsonify({'status': 'success', 'job': data}), 200
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancela un trabajo en espera o en ejecución."""
+    if search_scheduler.get(job_id) is None:
+        return jsonify({'status': 'error', 'message': f'Trabajo no encontrado: {job_id}'}), 404
+
+    if not search_scheduler.cancel(job_id):
+        return jsonify({'status': 'error', 'message': 'El trabajo ya había terminado'}), 409
+
+    return jsonify({'status': 'success', 'message': 'Cancelación solicitada', 'job_id': job_id}), 200
+
+
+def _accepts_gzip() -> bool:
+    return request.accept_encodings['gzip'] > 0
+
+
+def _json_body_response(payload, status: int = 200) -> Response:
+    """Respuesta JSON serializada con json_stream.dumps, en gzip si el cliente lo acepta."""
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if len(body) >= GZIP_MIN_BYTES and _accepts_gzip():
+        response.set_data(gzip_bytes(body))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 
 @app.route('/api/read-sheet', methods=['POST'])
 def read_sheet():
-    """Leer un rango de Google Sheets."""
+    """
+    Leer un rango de Google Sheets.
+
+    Body JSON:
+    {
+        "spreadsheet_id": "ID_DEL_GOOGLE_SHEET",
+        "range": "Hoja1!A2:C",
+        "offset": 0,          (opcional) filas del rango a saltar
+        "limit": 1000,        (opcional) máximo de filas de esta página
+        "stream": false       (opcional) NDJSON: una fila (lista JSON) por línea
+    }
+
+    Con offset/limit el rango se lee por bloques y la respuesta incluye
+    next_offset (null en la última página). Con stream (o Accept:
+    application/x-ndjson) las filas se escriben conforme se leen, así que
+    la memoria del API no crece con el tamaño del rango; si falla a medias,
+    la última línea es {"error": "..."}. Ambas respuestas van en gzip si el
+    cliente envía Accept-Encoding: gzip.
+    """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
 
         if not data or 'spreadsheet_id' not in data or 'range' not in data:
             return jsonify({'status': 'error', 'message': 'Se requieren spreadsheet_id y range'}), 400
 
-        values = sheets_service.read_range(data['spreadsheet_id'], data['range'])
+        try:
+            offset = int(data.get('offset') or 0)
+            limit = int(data['limit']) if data.get('limit') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'status': 'error', 'message': 'offset y limit deben ser enteros'}), 400
+        if offset < 0 or (limit is not None and limit < 1):
+            return jsonify({'status': 'error', 'message': 'offset debe ser >= 0 y limit >= 1'}), 400
+
+        sheets = get_sheets_service()
+        spreadsheet_id, range_name = data['spreadsheet_id'], data['range']
+        stream = _flag(data.get('stream'), default=False) or \
+            'application/x-ndjson' in request.accept_mimetypes.values()
+
+        if stream:
+            return _stream_rows(sheets.iter_range(spreadsheet_id, range_name,
+                                                  offset=offset, limit=limit))
 
-        return jsonify({'status': 'success', 'row_count': len(values), 'values': values}), 200
+        if not offset and limit is None:
+            values = sheets.read_range(spreadsheet_id, range_name)
+            return _json_body_response({'status': 'success', 'row_count': len(values), 'values': values})
+
+        page = sheets.read_page(spreadsheet_id, range_name, offset=offset, limit=limit)
+        return _json_body_response({'status': 'success', 'row_count': len(page['values']),
+                                    'offset': offset, 'limit': limit,
+                                    'next_offset': page['next_offset'], 'values': page['values']})
 
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+def _stream_rows(rows) -> Response:
+    """Respuesta NDJSON que se genera mientras se leen las filas."""
+    # Primer bloque antes de responder: los errores de permisos o de rango
+    # salen como un 500 normal en lugar de un flujo vacío
+    rows = iter(rows)
+    first = next(rows, None)
+
+    def generate():
+        def with_error_line():
+            if first is None:
+                return
+            yield first
+            try:
+                yield from rows
+            except Exception as e:
+                print(f"Error durante el streaming: {e}")
+                yield {'error': str(e)}
+        yield from iter_ndjson(with_error_line())
+
+    body = generate()
+    # X-Accel-Buffering: evita que un proxy (nginx) acumule el flujo completo
+    headers = {'Vary': 'Accept-Encoding', 'X-Accel-Buffering': 'no'}
+    if _accepts_gzip():
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(body, mimetype='application/x-ndjson', headers=headers)
+
+
+@app.route('/api/traces', methods=['GET'])
+def list_traces():
+    """Lista las trazas guardadas (una por ejecución), más recientes primero."""
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify({'status': 'success', 'traces': tracing.list_traces(limit)}), 200
+
+
+@app.route('/api/traces/<run_id>', methods=['GET'])
+def download_trace(run_id):
+    """Descarga la traza de una ejecución (formato Chrome trace-event)."""
+    if not SearchScheduler.is_valid_job_id(run_id):
+        return jsonify({'status': 'error', 'message': 'run_id inválido'}), 400
+
+    path = tracing.trace_path(run_id)
+    if path is None:
+        return jsonify({'status': 'error', 'message': f'Traza no encontrada: {run_id}'}), 404
+
+    return send_file(path, mimetype='application/json', as_attachment=True,
+                     download_name=f"trace_{run_id}.json")
+
+
+@app.route('/api/runs', methods=['GET'])
+def list_runs():
+    """Lista las ejecuciones guardadas (resumen sin resultados), más recientes primero."""
+    limit = request.args.get('limit', 100, type=int)
+    runs = get_run_store().list_runs(limit)
+    return jsonify({'status': 'success', 'runs': runs}), 200
+
+
+@app.route('/api/runs/<run_id>', methods=['GET'])
+def get_run(run_id):
+    """Resumen de una ejecución guardada."""
+    if not SearchScheduler.is_valid_job_id(run_id):
+        return jsonify({'status': 'error', 'message': 'run_id inválido'}), 400
+    summary = get_run_store().get_summary(run_id)
+    if summary is None:
+        return jsonify({'status': 'error', 'message': f'Ejecución no encontrada: {run_id}'}), 404
+    return jsonify({'status': 'success', 'run': summary}), 200
+
+
+@app.route('/api/runs/<run_id>/export', methods=['GET'])
+def export_run(run_id):
+    """
+    Exporta los resultados de una ejecución, una fila por nombre:
+    ?format=csv (default) | xlsx | parquet | arrow | ndjson
+
+    CSV y Arrow se envían conforme se generan; XLSX y Parquet necesitan
+    el archivo completo (índice al final), se arman en un temporal que
+    pasa a disco si crece.
+    """
+    if not SearchScheduler.is_valid_job_id(run_id):
+        return jsonify({'status': 'error', 'message': 'run_id inválido'}), 400
+
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in run_export.EXPORT_FORMATS:
+        return jsonify({'status': 'error',
+                        'message': f'Formato no soportado. Usa {", ".join(run_export.EXPORT_FORMATS)}'}), 400
+
+    store = get_run_store()
+    results_path = store.results_path(run_id)
+    if not results_path.is_file():
+        return jsonify({'status': 'error', 'message': f'Ejecución no encontrada: {run_id}'}), 404
+
+    mimetype, extension = run_export.EXPORT_FORMATS[export_format]
+    download_name = f"resultados_{run_id}.{extension}"
+
+    if export_format == 'ndjson':
+        return send_file(results_path, mimetype=mimetype, as_attachment=True,
+                         download_name=download_name)
+
+    try:
+        if export_format in ('csv', 'arrow'):
+            writer = run_export.iter_csv if export_format == 'csv' else run_export.iter_arrow
+            body = writer(store.iter_results(run_id))
+            if export_format == 'arrow':
+                # pyarrow se importa al generar el primer bloque: si falta, 501 aquí
+                body = itertools.chain([next(body)], body)
+            return Response(body, content_type=mimetype, headers={
+                'Content-Disposition': f'attachment; filename="{download_name}"'})
+
+        spooled = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        if export_format == 'xlsx':
+            run_export.write_xlsx(store.iter_results(run_id), spooled)
+        else:
+            run_export.write_parquet(store.iter_results(run_id), spooled)
+        spooled.seek(0)
+        return send_file(spooled, mimetype=mimetype, as_attachment=True,
+                         download_name=download_name)
+
+    except ImportError as e:
+        return jsonify({'status': 'error',
+                        'message': f'Falta una dependencia para exportar a {export_format}: {e.name}'}), 501
+
+
+@app.route('/api/runs/<run_id>/evidence.zip', methods=['GET'])
+def download_run_evidence(run_id):
+    """
+    ZIP con las capturas de una ejecución, resultados.csv y manifest.json
+    (tamaño y sha256 de cada imagen). Se genera y envía al vuelo.
+    """
+    if not SearchScheduler.is_valid_job_id(run_id):
+        return jsonify({'status': 'error', 'message': 'run_id inválido'}), 400
+
+    store = get_run_store()
+    summary = store.get_summary(run_id)
+    if summary is None or not store.results_path(run_id).is_file():
+        return jsonify({'status': 'error', 'message': f'Ejecución no encontrada: {run_id}'}), 404
+
+    body = evidence_archive.iter_zip(
+        evidence_archive.run_files(store.iter_results(run_id)),
+        leading=[('resultados.csv', run_export.iter_csv(store.iter_results(run_id)))],
+        manifest={'run': summary})
+    return Response(body, content_type='application/zip', headers={
+        'Content-Disposition': f'attachment; filename="evidencias_{run_id}.zip"'})
+
+
+@app.route('/api/screenshots/archive', methods=['GET'])
+def download_screenshots_archive():
+    """
+    ZIP con las capturas de la carpeta filtradas por ?prefix=sat y/o
+    ?date=AAAAMMDD (al menos uno), más manifest.json.
+    """
+    prefix = request.args.get('prefix', '').strip()
+    date_stamp = request.args.get('date', '').strip()
+    if not prefix and not date_stamp:
+        return jsonify({'status': 'error', 'message': 'Indica prefix y/o date (AAAAMMDD)'}), 400
+    if prefix and not SearchScheduler.is_valid_job_id(prefix):
+        return jsonify({'status': 'error', 'message': 'prefix inválido'}), 400
+    if date_stamp and not (len(date_stamp) == 8 and date_stamp.isdigit()):
+        return jsonify({'status': 'error', 'message': 'date debe tener formato AAAAMMDD'}), 400
+
+    files = evidence_archive.matching_files(SCREENSHOTS_DIR,
+                                            prefix or None, date_stamp or None)
+    if not files:
+        return jsonify({'status': 'error', 'message': 'No hay capturas con ese filtro'}), 404
+
+    body = evidence_archive.iter_zip(
+        files, manifest={'prefix': prefix or None, 'date': date_stamp or None})
+    name = "_".join(part for part in (prefix, date_stamp) if part)
+    return Response(body, content_type='application/zip', headers={
+        'Content-Disposition': f'attachment; filename="evidencias_{name}.zip"'})
+
+
+def _screenshot_file(filename: str):
+    """Ruta de una captura de la carpeta por su nombre de archivo (None si no es válida)."""
+    if (not filename or os.path.basename(filename) != filename or filename.startswith('.')
+            or not filename.lower().endswith('.png')):
+        return None
+    path = os.path.join(SCREENSHOTS_DIR, filename)
+    return path if os.path.isfile(path) else None
+
+
+@app.route('/api/screenshots', methods=['GET'])
+def list_gallery():
+    """
+    Galería paginada de capturas.
+
+    Query params:
+        run_id: Solo las capturas de esa ejecución (en su orden, con su estado)
+        status: found/not_found/success/... (requiere run_id)
+        prefix, date (AAAAMMDD): Filtros por nombre de archivo
+        offset, limit: Paginación (default 0, 48; máximo 200)
+
+    Las miniaturas de la página se generan (en paralelo) antes de responder,
+    así las peticiones de thumbnail_url ya las encuentran en caché.
+    """
+    run_id = request.args.get('run_id', '').strip()
+    status = request.args.get('status', '').strip() or None
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(200, max(1, request.args.get('limit', 48, type=int)))
+
+    store = get_run_store()
+    run_results = None
+    if run_id:
+        if not SearchScheduler.is_valid_job_id(run_id):
+            return jsonify({'status': 'error', 'message': 'run_id inválido'}), 400
+        if not store.results_path(run_id).is_file():
+            return jsonify({'status': 'error', 'message': f'Ejecución no encontrada: {run_id}'}), 404
+        run_results = store.iter_results(run_id)
+    elif status:
+        return jsonify({'status': 'error', 'message': 'El filtro status requiere run_id'}), 400
+
+    items = gallery.list_screenshots(SCREENSHOTS_DIR, run_results, status=status,
+                                     prefix=request.args.get('prefix', '').strip() or None,
+                                     date_stamp=request.args.get('date', '').strip() or None)
+    page = items[offset:offset + limit]
+    thumbnails = get_thumbnail_cache().get_many(item['path'] for item in page)
+
+    for item in page:
+        path = item.pop('path')
+        version = int(item['mtime'])
+        item['image_url'] = f"/api/screenshots/{quote(item['filename'])}"
+        item['thumbnail_url'] = (f"{item['image_url']}/thumbnail?v={version}"
+                                 if path in thumbnails else None)
+
+    next_offset = offset + limit if offset + limit < len(items) else None
+    return jsonify({'status': 'success', 'total': len(items), 'offset': offset,
+                    'next_offset': next_offset, 'items': page}), 200
+
+
+@app.route('/api/screenshots/<filename>', methods=['GET'])
+def get_screenshot(filename):
+    """Captura a tamaño completo."""
+    path = _screenshot_file(filename)
+    if path is None:
+        return jsonify({'status': 'error', 'message': f'Captura no encontrada: {filename}'}), 404
+    return send_file(os.path.abspath(path), mimetype='image/png')
+
+
+@app.route('/api/screenshots/<filename>/thumbnail', methods=['GET'])
+def get_screenshot_thumbnail(filename):
+    """Miniatura JPEG de una captura (se genera si no está en caché)."""
+    path = _screenshot_file(filename)
+    if path is None:
+        return jsonify({'status': 'error', 'message': f'Captura no encontrada: {filename}'}), 404
+
+    thumbnail = get_thumbnail_cache().get(path)
+    if thumbnail is None:
+        return jsonify({'status': 'error', 'message': f'No se pudo leer la captura: {filename}'}), 422
+
+    response = send_file(thumbnail, mimetype='image/jpeg')
+    # La URL lleva ?v=<mtime>: si la captura cambia, cambia la URL
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+@app.route('/api/outcome-cache', methods=['DELETE'])
+def clear_outcome_cache():
+    """
+    Borra la caché de resultados: todo, o solo un documento con
+    ?document_id=<ID del Google Sheet>, el document_id de un archivo local
+    ("file:<sha256>", viene en el resumen) o "file" para todos los archivos.
+    """
+    cache = get_outcome_cache()
+    if cache is None:
+        return jsonify({'status': 'error', 'message': 'La caché de resultados está desactivada'}), 409
+    deleted = cache.invalidate(request.args.get('document_id') or None)
+    return jsonify({'status': 'ok', 'deleted': deleted})
+
+
+@app.route('/api/maintenance/profiles', methods=['POST'])
+def maintain_profiles():
+    """
+    Compacta los perfiles de Chrome (plantilla, slots libres y perfil de
+    autorización) conservando la sesión de Google.
+    Con {"measure_startup": true} mide el arranque de Chrome antes y después.
+    """
+    from core.services.profile_maintenance import run_maintenance
+    data = request.get_json(silent=True) or {}
+    try:
+        report = run_maintenance(measure_startup=bool(data.get('measure_startup')))
+    except Exception as e:
+        print(f"Error en el mantenimiento de perfiles: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    if report['status'] == 'busy':
+        return jsonify({'status': 'error', 'message': report['message']}), 409
+    return jsonify(report), 200
+
+
+@app.route('/api/maintenance/profiles', methods=['GET'])
+def last_profile_maintenance():
+    """Reporte del último mantenimiento de perfiles."""
+    from core.services.profile_maintenance import last_report
+    report = last_report()
+    if report is None:
+        return jsonify({'status': 'error', 'message': 'Aún no se ha corrido el mantenimiento'}), 404
+    return jsonify(report), 200
+
+
 @app.route('/api/reload-credentials', methods=['POST'])
 def reload_credentials():
     """Recarga las credenciales limpiando el token y recreando servicios."""
@@ -122,12 +898,16 @@ def reload_credentials():
     print(f"{'='*60}")
 
     try:
+        from core.services.google_auth import clean_tokens
         clean_tokens()
         print("Token limpiado")
 
-        sheets_service = GoogleSheetsService()
-        comparison_service = ComparisonService(sheets_service)
-        comparison_service.set_stop_event(search_stop_event)
+        new_sheets_service, new_comparison_service = _create_services()
+
+        with _services_lock:
+            sheets_service = new_sheets_service
+            comparison_service = new_comparison_service
+            _lookups.clear()
 
         print("Credenciales recargadas exitosamente")
         return jsonify({'status': 'success', 'message': 'Credenciales recargadas'}), 200
@@ -140,9 +920,53 @@ def reload_credentials():
 
 @app.route('/api/stop-search', methods=['POST'])
 def stop_search():
-    """Detiene la búsqueda en progreso."""
-    search_stop_event.set()
-    return jsonify({'status': 'success', 'message': 'Búsqueda detenida'}), 200
+    """
+    Detiene búsquedas en progreso.
+    Con {"job_id": "..."} detiene solo ese trabajo. Detener todas las de este
+    proceso (las de otros operadores incluidas) requiere {"all": true}.
+    """
+    data = request.get_json(silent=True) or {}
+    job_id = data.get('job_id')
+
+    if job_id:
+        if not search_scheduler.cancel(job_id):
+            return jsonify({'status': 'error', 'message': f'No hay búsqueda activa con job_id {job_id}'}), 404
+        return jsonify({'status': 'success', 'message': 'Búsqueda detenida', 'job_id': job_id}), 200
+
+    if data.get('all') is not True:
+        return jsonify({'status': 'error',
+                        'message': 'Indica el job_id a detener (o {"all": true} para detener todas)'}), 400
+
+    cancelled = search_scheduler.cancel_all()
+    return jsonify({'status': 'success', 'message': 'Búsquedas detenidas', 'cancelled': cancelled}), 200
+
+
+def serve(server: str = None, threads: int = None):
+    """
+    Arranca el API con el servidor indicado.
+
+    Args:
+        server: "waitress" (producción, multi-hilo) o "dev" (servidor de Flask).
+                Por defecto API_SERVER de config.py
+        threads: Hilos de waitress. Por defecto API_THREADS de config.py
+    """
+    server = server or API_SERVER
+    threads = threads or API_THREADS
+
+    from core.services.profile_maintenance import start_schedule
+    start_schedule()
+
+    print(f"\nServidor: http://{API_HOST}:{API_PORT}")
+
+    if server == "waitress":
+        from waitress import serve as waitress_serve
+        print(f"Modo: waitress ({threads} hilos)\n")
+        waitress_serve(app, host=API_HOST, port=API_PORT, threads=threads)
+    else:
+        # El reloader relanza el proceso y falla dentro de un .exe empaquetado
+        use_debug = API_DEBUG and not getattr(sys, 'frozen', False)
+        print(f"Modo: desarrollo (debug: {use_debug})\n")
+        app.run(host=API_HOST, port=API_PORT, debug=use_debug, threaded=True)
 
 
 if __name__ == "__main__":
@@ -151,12 +975,27 @@ if __name__ == "__main__":
     print("="*60)
     print("Endpoints disponibles:")
     print("  GET  /                        - Health check")
+    print("  GET  /metrics                 - Métricas (Prometheus)")
     print("  POST /api/search-in-document  - Buscar aliados en documento")
+    print("  POST /api/search-in-file      - Buscar aliados en CSV/XLSX local")
+    print("  GET  /api/lookup?q=           - Consulta rápida en el documento A")
+    print("  POST /api/jobs                - Encolar búsqueda (asíncrona)")
+    print("  GET  /api/jobs                - Listar trabajos")
+    print("  GET  /api/jobs/<id>           - Estado/resultado de un trabajo")
+    print("  POST /api/jobs/<id>/cancel    - Cancelar un trabajo")
     print("  POST /api/stop-search         - Detener búsqueda")
     print("  POST /api/read-sheet          - Leer datos de Google Sheets")
+    print("  GET  /api/traces              - Listar trazas de ejecuciones")
+    print("  GET  /api/traces/<run_id>     - Descargar traza (Chrome trace)")
+    print("  GET  /api/runs                - Listar ejecuciones guardadas")
+    print("  GET  /api/runs/<id>/export    - Exportar resultados (csv/xlsx/parquet/arrow)")
+    print("  GET  /api/runs/<id>/evidence.zip - ZIP de capturas + manifiesto")
+    print("  GET  /api/screenshots/archive - ZIP de capturas por prefijo/fecha")
+    print("  GET  /api/screenshots         - Galería paginada (miniaturas)")
+    print("  DEL  /api/outcome-cache       - Borrar caché de resultados")
+    print("  POST /api/maintenance/profiles - Compactar perfiles de Chrome")
+    print("  GET  /api/maintenance/profiles - Último reporte de mantenimiento")
     print("  POST /api/reload-credentials  - Recargar credenciales")
     print("="*60)
-    print(f"\nServidor: http://{API_HOST}:{API_PORT}")
-    print(f"Debug: {API_DEBUG}\n")
 
-    app.run(host=API_HOST, port=API_PORT, debug=API_DEBUG)
+    serve()
@@ -0,0 +1,227 @@
+"""
+Servidor HTTP local que imita lo que el sistema usa de Google:
+
+- Sheets API v4: GET /v4/spreadsheets/<id>/values/<rango> y GET /v4/spreadsheets/<id>
+- Drive API v3:  GET /files/<id> (modifiedTime/version de hojas y documentos;
+  con api_endpoint la ruta no lleva el prefijo /drive/v3)
+- Documento A:   GET /document/<id>, una página con la tabla y un diálogo
+  de búsqueda (Ctrl+F) parecido al de Google Sheets (ver fake_document.html)
+
+Permite medir GoogleSheetsService y ComparisonService sin cuenta de Google:
+
+    server = FakeGoogleServer()
+    server.add_sheet("lista_b", [["NOMBRE 1"], ["NOMBRE 2"]])
+    server.start()
+    sheets = GoogleSheetsService(api_endpoint=server.url, credentials=AnonymousCredentials())
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import unquote, urlparse
+
+DOCUMENT_TEMPLATE = Path(__file__).with_name("fake_document.html")
+
+_VALUES_PATH = re.compile(r'^/v4/spreadsheets/([^/]+)/values/(.+)$')
+_METADATA_PATH = re.compile(r'^/v4/spreadsheets/([^/:]+)$')
+_DOCUMENT_PATH = re.compile(r'^/document/([^/]+)$')
+_DRIVE_FILE_PATH = re.compile(r'^(?:/drive/v3)?/files/([^/]+)$')
+_A1_ROWS = re.compile(r'^[A-Za-z]*(\d*)(?::[A-Za-z]*(\d*))?$')
+
+
+def _slice_rows(rows: List[List[str]], range_name: str) -> List[List[str]]:
+    """Aplica las filas de un rango A1 ('hoja!A2:C10'); las columnas se ignoran."""
+    cells = range_name.split('!', 1)[-1]
+    match = _A1_ROWS.match(cells)
+    if not match:
+        return rows
+    start = int(match.group(1)) if match.group(1) else 1
+    end = int(match.group(2)) if match.group(2) else len(rows)
+    return rows[start - 1:end]
+
+
+class FakeGoogleServer:
+    """Servidor local en un hilo, con hojas y documentos en memoria."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0):
+        """
+        Args:
+            host: Interfaz donde escuchar
+            port: Puerto (0 = uno libre)
+            latency_ms: Latencia artificial por petición de la API
+        """
+        self.sheets: Dict[str, List[List[str]]] = {}
+        self.documents: Dict[str, List[List[str]]] = {}
+        # Versión por archivo (hojas y documentos): cambia con cada add_*
+        self.versions: Dict[str, int] = {}
+        self.modified: Dict[str, str] = {}
+        self.latency_ms = latency_ms
+        self.request_count = 0
+        # Errores a devolver en las siguientes peticiones de la API: [(estado, retry_after)]
+        self._injected_errors: List[tuple] = []
+        self._errors_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_sheet(self, spreadsheet_id: str, rows: List[List[str]]):
+        """Registra una hoja para la API de valores (fila 1 = índice 0)."""
+        self.sheets[spreadsheet_id] = rows
+        self._touch(spreadsheet_id)
+
+    def add_document(self, document_id: str, rows: List[List[str]]):
+        """Registra un documento A; la primera fila es el encabezado."""
+        self.documents[document_id] = rows
+        self._touch(document_id)
+
+    def _touch(self, file_id: str):
+        self.versions[file_id] = self.versions.get(file_id, 0) + 1
+        self.modified[file_id] = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    def fail_next(self, count: int = 1, status: int = 429, retry_after: float = None):
+        """Las siguientes `count` peticiones de la API responden `status` (cuota, 5xx)."""
+        with self._errors_lock:
+            self._injected_errors.extend([(status, retry_after)] * count)
+
+    def _pop_error(self):
+        with self._errors_lock:
+            return self._injected_errors.pop(0) if self._injected_errors else None
+
+    def document_url(self, document_id: str) -> str:
+        return f"{self.url}/document/{document_id}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, data: Dict):
+                self._send(status, json.dumps(data, ensure_ascii=False).encode(), "application/json; charset=UTF-8")
+
+            def _not_found(self, what: str):
+                self._send_json(404, {'error': {'code': 404, 'message': f'{what} not found',
+                                                'status': 'NOT_FOUND'}})
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                server.request_count += 1
+
+                match = _DOCUMENT_PATH.match(path)
+                if match:
+                    rows = server.documents.get(unquote(match.group(1)))
+                    if rows is None:
+                        return self._not_found('Document')
+                    html = DOCUMENT_TEMPLATE.read_text(encoding="utf-8")
+                    html = html.replace("/*ROWS_JSON*/[]", json.dumps(rows, ensure_ascii=False))
+                    return self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+
+                injected = server._pop_error()
+                if injected:
+                    status, retry_after = injected
+                    body = json.dumps({'error': {'code': status, 'message': 'Injected error',
+                                                 'status': 'RESOURCE_EXHAUSTED' if status == 429
+                                                 else 'UNAVAILABLE'}}).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json; charset=UTF-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    if retry_after is not None:
+                        self.send_header("Retry-After", str(retry_after))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                match = _VALUES_PATH.match(path)
+                if match:
+                    spreadsheet_id, range_name = unquote(match.group(1)), unquote(match.group(2))
+                    rows = server.sheets.get(spreadsheet_id)
+                    if rows is None:
+                        return self._not_found('Spreadsheet')
+                    return self._send_json(200, {'range': range_name, 'majorDimension': 'ROWS',
+                                                 'values': _slice_rows(rows, range_name)})
+
+                match = _DRIVE_FILE_PATH.match(path)
+                if match:
+                    file_id = unquote(match.group(1))
+                    if file_id not in server.versions:
+                        return self._not_found('File')
+                    return self._send_json(200, {'id': file_id,
+                                                 'modifiedTime': server.modified[file_id],
+                                                 'version': str(server.versions[file_id])})
+
+                match = _METADATA_PATH.match(path)
+                if match:
+                    spreadsheet_id = unquote(match.group(1))
+                    rows = server.sheets.get(spreadsheet_id)
+                    if rows is None:
+                        return self._not_found('Spreadsheet')
+                    return self._send_json(200, {
+                        'spreadsheetId': spreadsheet_id,
+                        'properties': {'title': spreadsheet_id},
+                        'sheets': [{'properties': {
+                            'sheetId': 0, 'title': 'Hoja1', 'index': 0,
+                            'gridProperties': {'rowCount': len(rows),
+                                               'columnCount': max((len(r) for r in rows), default=0)},
+                        }}],
+                    })
+
+                self._not_found('Path')
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor local de Sheets/documento para pruebas")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--names", type=int, default=100)
+    args = parser.parse_args()
+
+    from synthetic_data import build_dataset
+
+    dataset = build_dataset(args.names)
+    fake = FakeGoogleServer(port=args.port)
+    fake.add_sheet("lista_b", dataset['list_b_rows'])
+    fake.add_document("documento_a", dataset['document_rows'])
+    print(f"Sheets API:  {fake.url}  (spreadsheet 'lista_b')")
+    print(f"Documento A: {fake.document_url('documento_a')}")
+    fake.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
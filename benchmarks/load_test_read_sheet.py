@@ -0,0 +1,105 @@
+"""
+Prueba de carga para POST /api/read-sheet.
+
+Lanza peticiones concurrentes contra un API en ejecución y reporta
+peticiones por segundo y latencias (p50/p95/p99).
+
+Uso:
+    python benchmarks/load_test_read_sheet.py \
+        --spreadsheet-id ID --range "abastos!A2:A" \
+        --concurrency 16 --requests 400
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def _percentile(values, pct):
+    """Percentil por rango más cercano (values ya ordenados)."""
+    if not values:
+        return 0.0
+    k = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[k]
+
+
+def run_load_test(url: str, payload: dict, concurrency: int, total_requests: int) -> dict:
+    """
+    Ejecuta la prueba de carga.
+
+    Args:
+        url: URL completa de /api/read-sheet
+        payload: Body JSON de cada petición
+        concurrency: Peticiones simultáneas
+        total_requests: Total de peticiones a enviar
+
+    Returns:
+        Diccionario con throughput, latencias y errores
+    """
+    local = threading.local()
+
+    def _one_request(_):
+        # Una sesión HTTP (keep-alive) por hilo cliente
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=120)
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(_one_request, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for ok, latency in outcomes if ok)
+    errors = sum(1 for ok, _ in outcomes if not ok)
+
+    return {
+        'concurrency': concurrency,
+        'requests': total_requests,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+            'p50': round(_percentile(latencies, 50) * 1000, 1),
+            'p95': round(_percentile(latencies, 95) * 1000, 1),
+            'p99': round(_percentile(latencies, 99) * 1000, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de /api/read-sheet")
+    parser.add_argument("--api-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--spreadsheet-id", required=True)
+    parser.add_argument("--range", required=True, dest="range_name")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Uno o más niveles de concurrencia a probar")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    url = f"{args.api_url}/api/read-sheet"
+    payload = {'spreadsheet_id': args.spreadsheet_id, 'range': args.range_name}
+
+    print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for concurrency in args.concurrency:
+        report = run_load_test(url, payload, concurrency, args.requests)
+        lat = report['latency_ms']
+        print(f"{concurrency:>5} {report['requests_per_s']:>9} {lat['p50']:>9} "
+              f"{lat['p95']:>9} {lat['p99']:>9} {report['errors']:>8}")
+        if report['errors'] == args.requests:
+            sys.exit("Todas las peticiones fallaron: ¿está corriendo el API?")
+
+
+if __name__ == "__main__":
+    main()
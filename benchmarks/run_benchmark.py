@@ -0,0 +1,252 @@
+"""
+Benchmark de extremo a extremo sin cuenta de Google.
+
+Levanta FakeGoogleServer (Sheets API + documento A locales), ejecuta
+ComparisonService.search_names_in_document con listas sintéticas de
+10/100/1000 nombres y reporta:
+
+- nombres por minuto (fase de búsqueda y total con arranque)
+- percentiles p50/p95/p99 por etapa, tomados de la traza de cada ejecución
+- RSS pico del proceso Python y del árbol de procesos (chromedriver + Chrome)
+
+Los resultados se guardan en benchmarks/results/<fecha>_<commit>.json y se
+comparan con el resultado anterior para detectar regresiones.
+
+Uso:
+    python benchmarks/run_benchmark.py                 # 10, 100 y 1000 nombres
+    python benchmarks/run_benchmark.py --sizes 10 100  # tamaños específicos
+    python benchmarks/run_benchmark.py --show-browser  # Chrome con ventana
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import psutil
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+
+from core.services import ComparisonService, GoogleSheetsService  # noqa: E402
+from core.services.tracing import trace_path  # noqa: E402
+from fake_sheets_server import FakeGoogleServer  # noqa: E402
+from synthetic_data import build_dataset  # noqa: E402
+
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+
+# Etapas de la traza que se reportan con percentiles
+STAGES = ("name", "escape", "find", "type", "wait", "capture", "write",
+          "read_list_b", "driver_startup", "driver_resolve", "chrome_launch",
+          "auth_wait", "load_document")
+
+
+class RssSampler:
+    """Muestrea en segundo plano la RSS del proceso y de sus descendientes."""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak_self_bytes = 0
+        self.peak_tree_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        process = psutil.Process()
+        own = process.memory_info().rss
+        tree = own
+        for child in process.children(recursive=True):
+            try:
+                tree += child.memory_info().rss
+            except psutil.Error:
+                pass
+        self.peak_self_bytes = max(self.peak_self_bytes, own)
+        self.peak_tree_bytes = max(self.peak_tree_bytes, tree)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def stage_percentiles(run_id: str) -> dict:
+    """Percentiles (ms) por etapa a partir de la traza guardada de la ejecución."""
+    path = trace_path(run_id)
+    if path is None:
+        return {}
+    events = json.loads(path.read_text())['traceEvents']
+
+    durations = {}
+    for event in events:
+        if event.get('ph') == 'X' and event['name'] in STAGES:
+            durations.setdefault(event['name'], []).append(event['dur'] / 1000)
+
+    report = {}
+    for stage, values in durations.items():
+        values.sort()
+        report[stage] = {
+            'count': len(values),
+            'p50_ms': round(_percentile(values, 50), 2),
+            'p95_ms': round(_percentile(values, 95), 2),
+            'p99_ms': round(_percentile(values, 99), 2),
+        }
+    return report
+
+
+def run_size(server: FakeGoogleServer, size: int, headless: bool, profile_dir: str) -> dict:
+    """Ejecuta una búsqueda completa con `size` nombres y retorna sus métricas."""
+    dataset = build_dataset(size)
+    sheet_id, document_id = f"lista_b_{size}", f"documento_a_{size}"
+    server.add_sheet(sheet_id, dataset['list_b_rows'])
+    server.add_document(document_id, dataset['document_rows'])
+
+    sheets = GoogleSheetsService(api_endpoint=server.url, credentials=AnonymousCredentials())
+    with tempfile.TemporaryDirectory(prefix="banco-bench-") as screenshots_dir:
+        service = ComparisonService(sheets, screenshots_dir=screenshots_dir,
+                                    chrome_profile_dir=profile_dir, headless=headless)
+        run_id = f"bench_{size}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            result = service.search_names_in_document(
+                list_b_id=sheet_id,
+                list_b_range="Hoja1!A2:A",
+                document_a_url=server.document_url(document_id),
+                auth_wait_seconds=0,
+                filename_prefix="bench",
+                run_id=run_id,
+            )
+            elapsed = time.perf_counter() - started
+
+    stages = stage_percentiles(run_id)
+    names = result.get('total_names', 0)
+    search_seconds = None
+    trace = trace_path(run_id)
+    if trace:
+        events = json.loads(trace.read_text())['traceEvents']
+        name_events = [e for e in events if e.get('ph') == 'X' and e['name'] == 'name']
+        if name_events:
+            first = min(e['ts'] for e in name_events)
+            last = max(e['ts'] + e['dur'] for e in name_events)
+            search_seconds = (last - first) / 1_000_000
+
+    return {
+        'names': names,
+        'status': result.get('status'),
+        'successful': result.get('successful'),
+        'failed': result.get('failed'),
+        'elapsed_s': round(elapsed, 2),
+        'search_phase_s': round(search_seconds, 2) if search_seconds else None,
+        'names_per_min': round(names / search_seconds * 60, 1) if search_seconds else None,
+        'names_per_min_total': round(names / elapsed * 60, 1) if elapsed else None,
+        'time_to_first_search_s': (result.get('startup') or {}).get('time_to_first_search'),
+        'peak_rss_mb': round(rss.peak_self_bytes / 2**20, 1),
+        'peak_tree_rss_mb': round(rss.peak_tree_bytes / 2**20, 1),
+        'stages': stages,
+        'run_id': run_id,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _latest_result(exclude: Path = None):
+    if not RESULTS_DIR.exists():
+        return None
+    files = sorted((p for p in RESULTS_DIR.glob("*.json") if p != exclude),
+                   key=lambda p: p.stat().st_mtime)
+    return files[-1] if files else None
+
+
+def print_comparison(current: dict, previous: dict):
+    """Imprime la variación de nombres/min y p50 por etapa contra otro resultado."""
+    print(f"\nComparación contra {previous['revision']} ({previous['created_at'][:19]}):")
+    for size, run in current['runs'].items():
+        before = previous['runs'].get(size)
+        if not before:
+            continue
+        rate, rate_before = run.get('names_per_min'), before.get('names_per_min')
+        if rate and rate_before:
+            print(f"  {size:>5} nombres: {rate_before} → {rate} nombres/min "
+                  f"({(rate - rate_before) / rate_before * 100:+.1f}%)")
+        for stage, stats in run['stages'].items():
+            stats_before = before.get('stages', {}).get(stage)
+            if stats_before and stats_before['p50_ms']:
+                change = (stats['p50_ms'] - stats_before['p50_ms']) / stats_before['p50_ms'] * 100
+                if abs(change) >= 10:
+                    print(f"        {stage:<15} p50 {stats_before['p50_ms']} → {stats['p50_ms']} ms ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de búsqueda de aliados")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--show-browser", action="store_true", help="Chrome con ventana")
+    parser.add_argument("--latency-ms", type=float, default=0,
+                        help="Latencia artificial de la Sheets API local")
+    parser.add_argument("--compare", type=Path, help="Resultado JSON contra el cual comparar "
+                                                     "(default: el más reciente)")
+    args = parser.parse_args()
+
+    report = {
+        'revision': _git_revision(),
+        'created_at': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'runs': {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="banco-bench-profile-") as profile_dir, \
+            FakeGoogleServer(latency_ms=args.latency_ms) as server:
+        for size in args.sizes:
+            print(f"\n>>> Benchmark con {size} nombres")
+            run = run_size(server, size, headless=not args.show_browser, profile_dir=profile_dir)
+            report['runs'][str(size)] = run
+
+    print(f"\n{'nombres':>8} {'nombres/min':>12} {'total/min':>10} {'p50 name ms':>12} "
+          f"{'p95 name ms':>12} {'RSS MB':>8} {'árbol MB':>9}")
+    for size, run in report['runs'].items():
+        name_stats = run['stages'].get('name', {})
+        print(f"{size:>8} {run['names_per_min'] or '-':>12} {run['names_per_min_total'] or '-':>10} "
+              f"{name_stats.get('p50_ms', '-'):>12} {name_stats.get('p95_ms', '-'):>12} "
+              f"{run['peak_rss_mb']:>8} {run['peak_tree_rss_mb']:>9}")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report['revision']}.json"
+    previous_path = args.compare or _latest_result()
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\nResultados guardados en {output.relative_to(BENCHMARKS_DIR.parent)}")
+
+    if previous_path and previous_path.exists():
+        print_comparison(report, json.loads(previous_path.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark de arranque del API.
+
+Mide, en procesos nuevos (sin caché de módulos ya importados):
+
+- tiempo de importación por módulo de `import app` (python -X importtime),
+  con los módulos más pesados por tiempo acumulado
+- tiempo hasta el primer health check: desde que se lanza el proceso hasta
+  que GET / responde 200 con el servidor indicado (waitress por defecto)
+- qué dependencias pesadas (selenium, googleapiclient, google-auth, Pillow,
+  psutil) quedaron cargadas solo por importar app
+
+Cada medición se repite --runs veces y se reporta la mediana.
+
+Uso:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 10 --top 25
+    python benchmarks/startup_benchmark.py --server dev --json resultados.json
+"""
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("selenium", "webdriver_manager", "googleapiclient", "google.auth",
+                 "google_auth_oauthlib", "PIL", "psutil")
+
+# Arranca el API como run_flask.py, pero en el puerto libre que se le pasa
+_SERVE_SCRIPT = """
+import sys
+import app
+app.API_PORT = int(sys.argv[1])
+app.serve(server=sys.argv[2])
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import_times(runs: int):
+    """
+    Corre `python -X importtime -c "import app"` runs veces.
+
+    Returns:
+        (total_ms, {módulo: (self_ms, acumulado_ms)}) con la mediana de cada valor
+    """
+    totals, samples = [], {}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                                cwd=ROOT_DIR, capture_output=True, text=True, check=True).stderr
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            name = name.strip()
+            samples.setdefault(name, []).append((int(self_us), int(cumulative_us)))
+            if name == "app":
+                totals.append(int(cumulative_us) / 1000)
+
+    modules = {name: (statistics.median(s for s, _ in values) / 1000,
+                      statistics.median(c for _, c in values) / 1000)
+               for name, values in samples.items()}
+    return statistics.median(totals), modules
+
+
+def loaded_heavy_modules():
+    """Dependencias pesadas presentes en sys.modules tras `import app`."""
+    code = ("import sys, app; print(','.join(m for m in sys.argv[1:] if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code, *HEAVY_MODULES],
+                            cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout
+    return [m for m in output.strip().split(",") if m]
+
+
+def measure_first_health_check(server: str, timeout: float = 60.0) -> float:
+    """Segundos desde lanzar el proceso hasta que GET / responde 200."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/"
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", _SERVE_SCRIPT, str(port), server],
+                               cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"El API terminó al arrancar (código {process.returncode})")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"El API no respondió en {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def measure_interpreter(runs: int) -> float:
+    """Segundos de `python -c pass`: el piso de cualquier arranque."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del API")
+    parser.add_argument("--runs", type=int, default=5, help="Repeticiones por medición (default: 5)")
+    parser.add_argument("--top", type=int, default=15, help="Módulos a mostrar (default: 15)")
+    parser.add_argument("--server", choices=["waitress", "dev"], default="waitress",
+                        help="Servidor para el health check (default: waitress)")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    print(f"Importando app ({args.runs} veces)...")
+    import_ms, modules = measure_import_times(args.runs)
+    heavy = loaded_heavy_modules()
+
+    print(f"Arrancando el API con {args.server} ({args.runs} veces)...")
+    health = [measure_first_health_check(args.server) for _ in range(args.runs)]
+    interpreter = measure_interpreter(args.runs)
+
+    top = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    top = [(name, times) for name, times in top if name != "app"][:args.top]
+
+    print(f"\n{'='*60}")
+    print("ARRANQUE DEL API (medianas)")
+    print(f"{'='*60}")
+    print(f"Intérprete (python -c pass): {interpreter * 1000:8.1f} ms")
+    print(f"import app:                  {import_ms:8.1f} ms")
+    print(f"Primer health check:         {statistics.median(health) * 1000:8.1f} ms")
+    print(f"Dependencias pesadas cargadas: {', '.join(heavy) or 'ninguna'}")
+    print(f"\n{'Módulo':<44}{'propio ms':>10}{'acum. ms':>10}")
+    for name, (self_ms, cumulative_ms) in top:
+        print(f"{name:<44}{self_ms:>10.1f}{cumulative_ms:>10.1f}")
+
+    if args.json:
+        result = {
+            "runs": args.runs,
+            "server": args.server,
+            "interpreter_ms": round(interpreter * 1000, 1),
+            "import_app_ms": round(import_ms, 1),
+            "first_health_check_ms": round(statistics.median(health) * 1000, 1),
+            "heavy_modules_loaded": heavy,
+            "modules": {name: {"self_ms": round(s, 2), "cumulative_ms": round(c, 2)}
+                        for name, (s, c) in top},
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Datos sintéticos para benchmarks: listas de aliados (lista B) y un documento A
+con formato de lista del SAT (No., RFC, Nombre del Contribuyente, Situación).
+Deterministas para una misma semilla.
+"""
+import random
+import string
+from typing import Dict, List
+
+_GIROS = ["AGRICOLA", "COMERCIALIZADORA", "DISTRIBUIDORA", "ABARROTES", "SERVICIOS",
+          "GRUPO", "FRUTAS Y LEGUMBRES", "TRANSPORTES", "PRODUCTOS", "ALIMENTOS",
+          "BODEGA", "CONSTRUCTORA", "INDUSTRIAS", "CÁRNICOS", "LÁCTEOS"]
+_NOMBRES = ["SANTA VENERANDA", "SAN JOSÉ", "LOS ÁLAMOS", "DEL BAJÍO", "PEÑA BLANCA",
+            "MICHOACÁN", "JALISCO", "EL ROBLE", "LA ESPERANZA", "MÉNDEZ", "NÚÑEZ",
+            "GUTIÉRREZ", "HERMANOS ORTIZ", "VALLE VERDE", "TRES RÍOS", "LA LUZ",
+            "SIERRA MADRE", "ÁGUILA REAL", "DOÑA LUPE", "EL CÓNDOR"]
+_APELLIDOS = ["HERNÁNDEZ", "GARCÍA", "MARTÍNEZ", "LÓPEZ", "GONZÁLEZ", "RODRÍGUEZ",
+              "PÉREZ", "SÁNCHEZ", "RAMÍREZ", "CRUZ", "FLORES", "GÓMEZ", "MORALES",
+              "VÁZQUEZ", "JIMÉNEZ", "REYES", "DÍAZ", "TORRES", "RUIZ", "MUÑOZ"]
+# Sin sufijo vacío: "GRUPO X" sería subcadena de "GRUPO X SA DE CV" y
+# Ctrl+F lo contaría como coincidencia
+_SOCIEDADES = ["SA DE CV", "S DE RL DE CV", "SC", "SPR DE RL", "SAPI DE CV"]
+_SITUACIONES = ["Definitivo", "Presunto", "Desvirtuado", "Sentencia Favorable"]
+
+
+def _rfc(rng: random.Random) -> str:
+    letters = "".join(rng.choice(string.ascii_uppercase) for _ in range(3))
+    date = f"{rng.randint(0, 99):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    homoclave = "".join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(3))
+    return letters + date + homoclave
+
+
+def generate_companies(count: int, rng: random.Random, exclude=frozenset()) -> List[Dict[str, str]]:
+    """Genera razones sociales únicas (y fuera de exclude) con su RFC."""
+    capacity = len(_GIROS) * len(_NOMBRES) * len(_APELLIDOS) * len(_SOCIEDADES)
+    if count + len(exclude) > capacity:
+        raise ValueError(f"Máximo {capacity - len(exclude)} razones sociales distintas")
+
+    companies, seen = [], set(exclude)
+    while len(companies) < count:
+        name = " ".join((rng.choice(_GIROS), rng.choice(_NOMBRES),
+                         rng.choice(_APELLIDOS), rng.choice(_SOCIEDADES)))
+        if name in seen:
+            continue
+        seen.add(name)
+        companies.append({'name': name, 'rfc': _rfc(rng)})
+    return companies
+
+
+def build_dataset(names: int, hit_ratio: float = 0.3, document_rows: int = None,
+                  seed: int = 69) -> Dict:
+    """
+    Arma una lista B y un documento A donde aparece una fracción de la lista B.
+
+    Args:
+        names: Nombres en la lista B
+        hit_ratio: Fracción de la lista B presente en el documento A
+        document_rows: Filas del documento A (default: max(2000, 3 * names))
+        seed: Semilla para repetir exactamente el mismo conjunto
+
+    Returns:
+        {'list_b_rows', 'document_rows', 'expected_hits'}
+    """
+    rng = random.Random(seed)
+    document_rows = document_rows or max(2000, 3 * names)
+
+    list_b = generate_companies(names, rng)
+    hits = rng.sample(list_b, int(names * hit_ratio))
+    fillers = generate_companies(max(0, document_rows - len(hits)), random.Random(seed + 1),
+                                 exclude=frozenset(c['name'] for c in list_b))
+    hit_names = {c['name'] for c in hits}
+
+    entries = hits + fillers
+    rng.shuffle(entries)
+
+    document = [["No.", "RFC", "Nombre del Contribuyente", "Situación del contribuyente"]]
+    for i, company in enumerate(entries, 1):
+        document.append([str(i), company['rfc'], company['name'], rng.choice(_SITUACIONES)])
+
+    return {
+        'list_b_rows': [["Razón Social", "RFC"]] + [[c['name'], c['rfc']] for c in list_b],
+        'document_rows': document,
+        'expected_hits': sorted(hit_names),
+    }
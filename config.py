@@ -24,6 +24,14 @@ LIST_B_SHEET_NAME = "'Razón Social'"  # CON COMILLAS porque tiene acentos
 # Usa el formato exacto de Google Sheets API
 LIST_B_RANGE = "abastos!A2:A"  # Cámbialo a tu nombre de hoja real
 
+# Columnas de la lista B (letras de la hoja, dentro de LIST_B_RANGE).
+# None en LIST_B_NAME_COLUMN = primera columna del rango.
+# Con LIST_B_RFC_COLUMN, la búsqueda en archivo (modo archivo) cruza por
+# RFC exacto contra el documento A; los aliados sin RFC se buscan por nombre.
+# Ej: LIST_B_RANGE = "abastos!A2:C", LIST_B_NAME_COLUMN = "A", LIST_B_RFC_COLUMN = "C"
+LIST_B_NAME_COLUMN = None
+LIST_B_RFC_COLUMN = None
+
 # ════════════════════════════════════════════════════════════════
 # LISTA A - DOCUMENTO SAT (Donde buscar)
 # ════════════════════════════════════════════════════════════════
@@ -41,6 +49,17 @@ DOCUMENT_A_ID = "1caM1BHP1yhiihKtjXdGBrKs0YiwawiIQ1w26xRpsZlU"
 # Directorio donde guardar las screenshots
 SCREENSHOTS_DIR = "screenshots"
 
+# ════════════════════════════════════════════════════════════════
+# EVIDENCIAS SIN NAVEGADOR (modo archivo)
+# ════════════════════════════════════════════════════════════════
+
+# Filas vecinas que se dibujan arriba y abajo de la fila encontrada
+EVIDENCE_CONTEXT_ROWS = 2
+
+# Procesos para dibujar evidencias (None = uno por núcleo).
+# Los lotes de hasta 32 nombres se dibujan sin abrir procesos.
+EVIDENCE_RENDER_WORKERS = None
+
 # ════════════════════════════════════════════════════════════════
 # CONFIGURACIÓN DEL API
 # ════════════════════════════════════════════════════════════════
@@ -50,6 +69,49 @@ API_HOST = "127.0.0.1"
 API_PORT = 5000
 API_DEBUG = True
 
+# Servidor para atender el API:
+#   "waitress" → servidor WSGI multi-hilo para producción (recomendado)
+#   "dev"      → servidor de desarrollo de Flask (con reloader si API_DEBUG)
+API_SERVER = "waitress"
+
+# Hilos de waitress: peticiones atendidas en paralelo por proceso.
+# Cada búsqueda ocupa un hilo mientras dura, deja margen para lecturas.
+API_THREADS = 8
+
+# Procesos worker al usar gunicorn (ver gunicorn.conf.py). Cada proceso
+# tiene sus propios servicios y su propia cola de búsquedas: un trabajo solo
+# existe en el worker que lo recibió, así que GET /api/jobs/<id>,
+# POST /api/jobs/<id>/cancel y /api/stop-search responden 404 si la petición
+# cae en otro worker. Con la cola de trabajos en uso, dejar 1.
+API_WORKERS = 1
+
+# Filas por petición a Sheets al leer rangos por bloques (/api/read-sheet
+# paginado o en streaming). Cada bloque es lo único que se tiene en memoria.
+SHEETS_READ_CHUNK_ROWS = 1000
+
+# Respuestas JSON menores a esto no se comprimen aunque el cliente acepte gzip
+GZIP_MIN_BYTES = 1024
+
+# ════════════════════════════════════════════════════════════════
+# CUOTA DE GOOGLE SHEETS API
+# ════════════════════════════════════════════════════════════════
+
+# Lecturas por minuto compartidas por todo el proceso. La cuota de Sheets
+# es 60/min por usuario y 300/min por proyecto: con un solo usuario manda
+# la de usuario. Súbela si el proyecto tiene una cuota mayor.
+SHEETS_REQUESTS_PER_MINUTE = 60
+
+# Peticiones que pueden salir de golpe (se descuentan de la cuota por minuto)
+SHEETS_BURST = 10
+
+# Peticiones a Sheets en curso al mismo tiempo
+SHEETS_MAX_IN_FLIGHT = 4
+
+# Reintentos ante 429/5xx/errores de red (backoff exponencial con jitter,
+# hasta SHEETS_BACKOFF_MAX segundos entre intentos)
+SHEETS_MAX_RETRIES = 5
+SHEETS_BACKOFF_MAX = 32
+
 # ════════════════════════════════════════════════════════════════
 # CREDENCIALES
 # ════════════════════════════════════════════════════════════════
@@ -65,6 +127,52 @@ USER_DATA_DIR.mkdir(exist_ok=True)
 CREDENTIALS_FILE = USER_DATA_DIR / "credentials.json"
 TOKEN_FILE = USER_DATA_DIR / "token.json"
 
+# ════════════════════════════════════════════════════════════════
+# CACHÉ DE RESULTADOS
+# ════════════════════════════════════════════════════════════════
+
+# Reutilizar el resultado de un aliado si ya se buscó contra la misma
+# revisión del documento A (fecha de modificación en Drive, o contenido
+# del archivo en modo archivo) y su captura sigue en disco
+OUTCOME_CACHE_ENABLED = True
+OUTCOME_CACHE_FILE = USER_DATA_DIR / "outcome_cache.sqlite3"
+
+# ════════════════════════════════════════════════════════════════
+# CONSULTA RÁPIDA (/api/lookup)
+# ════════════════════════════════════════════════════════════════
+
+# Rango del documento A que se indexa para consultar un nombre sin abrir
+# Chrome (sin nombre de hoja = la primera hoja)
+LOOKUP_RANGE = "A:ZZ"
+
+# Cada cuántos segundos se revisa en Drive si el documento A cambió; si
+# cambió, el índice se reconstruye en segundo plano
+LOOKUP_REVISION_CHECK_SECONDS = 60
+
+# Filas candidatas por consulta
+LOOKUP_MAX_RESULTS = 20
+
+# Índices guardados (uno por documento y revisión). Se abren con mmap al
+# iniciar el API: la primera consulta responde sin volver a leer el documento
+LOOKUP_INDEX_DIR = USER_DATA_DIR / "lookup-index"
+
+# ════════════════════════════════════════════════════════════════
+# GALERÍA DE CAPTURAS
+# ════════════════════════════════════════════════════════════════
+
+# Miniaturas generadas para la galería (se regeneran si la captura cambia)
+THUMBNAIL_DIR = USER_DATA_DIR / "thumbnails"
+
+# Tamaño máximo (ancho, alto) de cada miniatura
+THUMBNAIL_SIZE = (360, 240)
+
+# Espacio máximo de la carpeta de miniaturas: al pasarlo se borran
+# las menos usadas recientemente
+THUMBNAIL_CACHE_MAX_MB = 200
+
+# Procesos para generar miniaturas (None = uno por núcleo)
+THUMBNAIL_WORKERS = None
+
 # ════════════════════════════════════════════════════════════════
 # NAVEGADOR
 # ════════════════════════════════════════════════════════════════
@@ -86,6 +194,123 @@ SEARCH_PAUSE = 4
 # Aumenta esto si necesitas más tiempo para loguearte en Google
 AUTH_WAIT_SECONDS = 20  # 15 segundos es suficiente para loguearse
 
+# Recursos que el Chrome automatizado no descarga (DevTools
+# Network.setBlockedURLs; '*' es comodín y el patrón cubre la URL completa).
+# Solo lo que Sheets no necesita para mostrar la hoja y buscar: analíticas,
+# beacons de registro, avatares de cuentas y complementos (Apps Script).
+# Las fuentes no se bloquean: los íconos de la barra son una fuente y las
+# capturas se verían rotas.
+BROWSER_BLOCKED_URLS = [
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*play.google.com/log?*",
+    "*lh3.googleusercontent.com/a/*",
+    "*lh3.googleusercontent.com/a-/*",
+    "*script.googleusercontent.com/*",
+]
+
+# "block": bloquea BROWSER_BLOCKED_URLS y reporta lo bloqueado por búsqueda
+# "audit": no bloquea; mide cuántos bytes se habrían bloqueado y lo guarda
+#          en BROWSER_NETWORK_AUDIT_FILE (sirve para ajustar la lista y para
+#          estimar los bytes ahorrados en modo "block")
+# "off":   ni bloquea ni mide
+BROWSER_NETWORK_BLOCKING = "block"
+BROWSER_NETWORK_AUDIT_FILE = USER_DATA_DIR / "network_audit.json"
+
+# Cómo se escribe cada nombre en el cuadro de búsqueda (Ctrl+F):
+#   "cdp":  todo el texto en una sola llamada a DevTools (Input.insertText) y
+#           se verifica que el cuadro lo tenga completo; si no, se reescribe
+#           tecla por tecla
+#   "keys": tecla por tecla con send_keys (comportamiento original)
+SEARCH_TEXT_ENTRY = "cdp"
+
+# Cómo se detecta si un nombre aparece en el documento A:
+#   "keystroke": Ctrl+F y captura para cada nombre (comportamiento original)
+#   "script":    un script en la página busca lotes de nombres de una vez y
+#                Ctrl+F + captura solo corre para los que necesitan evidencia
+SEARCH_DETECTION = "keystroke"
+
+# Con SEARCH_DETECTION = "script", qué nombres llevan captura:
+# "found" (solo los encontrados), "all" (todos) o "none"
+DETECTION_EVIDENCE = "found"
+
+# Nombres por llamada al script de detección
+DETECTION_BATCH_SIZE = 500
+
+# Cada cuántos segundos revisa el watchdog que Chrome siga vivo
+DRIVER_WATCHDOG_INTERVAL = 2
+
+# Veces que se reinicia Chrome en una búsqueda si se cierra o deja de
+# responder; después, los nombres restantes se marcan con error
+DRIVER_MAX_RESTARTS = 3
+
+# Espera tras reabrir el documento A al reiniciar Chrome (el perfil ya
+# tiene la sesión iniciada, no hace falta la espera de autenticación completa)
+DRIVER_RESTART_AUTH_WAIT = 5
+
+# Reciclar Chrome (cerrarlo y abrir otro con el mismo perfil) en búsquedas
+# largas: la pestaña de Sheets crece en memoria con cada búsqueda.
+# Se recicla tras DRIVER_RECYCLE_EVERY_NAMES nombres o si la memoria del
+# navegador (todos sus procesos) pasa DRIVER_RECYCLE_RSS_MB. None = desactivado
+DRIVER_RECYCLE_EVERY_NAMES = 500
+DRIVER_RECYCLE_RSS_MB = 2048
+
+# Cada cuántos segundos se guarda una muestra de memoria en el resultado
+DRIVER_MEMORY_SAMPLE_SECONDS = 10
+
+# Arranque en paralelo: chromedriver, Chrome y el documento A se abren en
+# otro hilo mientras se lee la lista B y se consulta la caché. La espera de
+# autenticación cuenta desde que el documento terminó de cargar. Si todos
+# los nombres están en caché, ese Chrome se cierra sin usarse.
+# False = arranque secuencial (Chrome solo si hay nombres pendientes)
+BROWSER_PRESTART = True
+
+# Ruta de chromedriver resuelta la última vez: se reutiliza mientras el
+# ejecutable de Chrome no cambie (al actualizarse se vuelve a resolver).
+# None = ChromeDriverManager consulta versiones en cada arranque
+CHROMEDRIVER_CACHE_FILE = USER_DATA_DIR / "chromedriver.json"
+
+# Perfil con la sesión de Google que se clona en el pool de perfiles.
+# Cada búsqueda usa su propio slot (CHROME_PROFILE_POOL_DIR/slot-N) con un
+# candado exclusivo: dos Chrome nunca comparten un perfil. Si el usuario
+# inicia sesión durante la espera de autenticación, la sesión vuelve a la
+# plantilla y de ahí a los demás slots.
+CHROME_PROFILE_TEMPLATE = USER_DATA_DIR / "chrome-profile"
+CHROME_PROFILE_POOL_DIR = USER_DATA_DIR / "chrome-profiles"
+
+# Slots del pool: máximo de Chrome abiertos a la vez (entre el API y Streamlit)
+CHROME_PROFILE_POOL_SIZE = 2
+
+# Segundos que una búsqueda espera un slot libre antes de fallar
+CHROME_PROFILE_LEASE_TIMEOUT = 600
+
+# Mantenimiento de perfiles: compacta la plantilla, los slots libres y
+# chrome-auth-profile (borra cachés e historial, conserva la sesión).
+# Horas entre mantenimientos automáticos del servidor; None = solo manual
+# (POST /api/maintenance/profiles o run_flask.py --maintain-profiles)
+PROFILE_MAINTENANCE_INTERVAL_HOURS = 24
+
+# Medir el arranque en frío de Chrome antes y después en los automáticos
+# (abre Chrome headless dos veces)
+PROFILE_MAINTENANCE_MEASURE_STARTUP = False
+
+# Último reporte de mantenimiento (también marca cuándo corrió)
+PROFILE_MAINTENANCE_REPORT_FILE = USER_DATA_DIR / "profile_maintenance.json"
+
+# ════════════════════════════════════════════════════════════════
+# PLANIFICADOR DE BÚSQUEDAS
+# ════════════════════════════════════════════════════════════════
+
+# Búsquedas que pueden correr al mismo tiempo (cada una abre su Chrome).
+# Las demás esperan en cola por prioridad y orden de llegada.
+# Cada una toma un perfil del pool: no conviene subirlo por encima de
+# CHROME_PROFILE_POOL_SIZE (las de más esperarían un slot libre).
+MAX_CONCURRENT_SEARCHES = 1
+
+# Trabajos terminados que se conservan para consultar su estado/resultado
+SEARCH_JOB_HISTORY = 100
+
 # ════════════════════════════════════════════════════════════════
 # LOGGING
 # ════════════════════════════════════════════════════════════════
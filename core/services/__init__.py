@@ -1,14 +1,41 @@
 """
 Servicios principales del proyecto Banco de Alimentos.
+
+Los nombres se importan al primer uso (PEP 562): importar el paquete no
+carga selenium, googleapiclient, google-auth ni Pillow, para que la API
+arranque rápido y cada endpoint pague solo las dependencias que usa.
 """
-from .google_auth import get_credentials, clean_tokens, invalidate_cache
-from .google_sheets_service import GoogleSheetsService
-from .comparison_service import ComparisonService
-
-__all__ = [
-    'get_credentials',
-    'clean_tokens',
-    'invalidate_cache',
-    'GoogleSheetsService',
-    'ComparisonService',
-]
+import importlib
+
+# nombre exportado -> submódulo que lo define
+_EXPORTS = {
+    'get_credentials': 'google_auth',
+    'clean_tokens': 'google_auth',
+    'invalidate_cache': 'google_auth',
+    'GoogleSheetsService': 'google_sheets_service',
+    'GoogleDriveService': 'google_drive_service',
+    'ComparisonService': 'comparison_service',
+    'SearchScheduler': 'search_scheduler',
+    'SearchJob': 'search_scheduler',
+    'DocumentIndex': 'document_index',
+    'normalize_text': 'document_index',
+    'EvidenceRenderer': 'evidence_renderer',
+    'OutcomeCache': 'outcome_cache',
+    'RunStore': 'run_store',
+    'ThumbnailCache': 'gallery',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,102 @@
+"""
+Ruta de chromedriver guardada entre ejecuciones.
+
+ChromeDriverManager().install() consulta la versión de Chrome (en Windows
+lanza PowerShell) y, desde Chrome 115, descarga por red la lista de
+versiones de chromedriver en cada búsqueda. Aquí se guarda la ruta que
+resolvió junto con la huella del ejecutable de Chrome (ruta, tamaño y fecha
+de modificación): mientras la huella no cambie se reutiliza la ruta sin
+subprocesos ni red. Al actualizarse Chrome cambia su ejecutable, la huella
+deja de coincidir y se vuelve a resolver (y a verificar la versión).
+"""
+import json
+import os
+import platform
+import shutil
+import threading
+from typing import Optional, Tuple
+
+_lock = threading.Lock()
+
+_LINUX_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")
+
+
+def chrome_binary() -> Optional[str]:
+    """Ejecutable de Chrome instalado, o None si no se encuentra."""
+    system = platform.system()
+    if system == "Windows":
+        candidates = [os.path.join(os.environ[var], "Google", "Chrome", "Application", "chrome.exe")
+                      for var in ("PROGRAMFILES", "PROGRAMFILES(X86)", "LOCALAPPDATA")
+                      if os.environ.get(var)]
+    elif system == "Darwin":
+        candidates = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    else:
+        candidates = [shutil.which(name) for name in _LINUX_BINARIES]
+    for path in candidates:
+        if path and os.path.isfile(path):
+            return os.path.realpath(path)
+    return None
+
+
+def chrome_fingerprint() -> Optional[str]:
+    """Huella del ejecutable de Chrome; cambia cuando Chrome se actualiza."""
+    path = chrome_binary()
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def _read(cache_file: str) -> dict:
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(cache_file: str, entry: dict):
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    tmp = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp, cache_file)
+
+
+def resolve_chromedriver(cache_file) -> Tuple[str, bool]:
+    """
+    Ruta de chromedriver para el Chrome instalado.
+
+    Args:
+        cache_file: JSON con la última ruta resuelta (CHROMEDRIVER_CACHE_FILE),
+                    o None para resolver siempre con ChromeDriverManager
+
+    Returns:
+        (ruta, True si salió del archivo sin consultar versiones)
+    """
+    cache_file = str(cache_file) if cache_file else None
+    fingerprint = chrome_fingerprint() if cache_file else None
+
+    with _lock:
+        if fingerprint:
+            entry = _read(cache_file)
+            path = entry.get('driver_path')
+            if entry.get('chrome') == fingerprint and path and os.path.isfile(path):
+                return path, True
+
+        from webdriver_manager.chrome import ChromeDriverManager
+        manager = ChromeDriverManager()
+        path = manager.install()
+        if fingerprint:
+            try:
+                _write(cache_file, {
+                    'chrome': fingerprint,
+                    'chrome_version': manager.driver.get_browser_version_from_os(),
+                    'driver_path': path,
+                })
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar la ruta de chromedriver: {e}")
+        return path, False
@@ -3,69 +3,240 @@ Servicio para buscar nombres en documentos y capturar screenshots.
 """
 import os
 import platform
+import re
 import threading
 import time
+import unicodedata
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 
-from .google_sheets_service import GoogleSheetsService
+from .chromedriver_cache import resolve_chromedriver
+from .document_index import DocumentIndex, column_index, normalize_rfc
+from .metrics import (AUTH_WAIT_SECONDS, DRIVER_RECYCLES, DRIVER_RESTARTS,
+                      DRIVER_STARTUP_SECONDS, NAME_SEARCH_SECONDS, NAMES_PROCESSED,
+                      SCREENSHOT_SECONDS, SEARCH_RUNS, STARTUP_STAGE_SECONDS, TEXT_ENTRY)
+from .network_blocking import NetworkReport, apply_blocklist, enable_performance_log
+from .outcome_cache import OutcomeCache, file_document_id
+from .page_detection import detect_names
+from .profile_pool import ProfilePool, clean_singleton_locks
+from .run_store import RunStore
+from .tracing import current_trace, span, start_trace, use_trace
 
-# Tecla modificadora: Ctrl en Windows/Linux, Cmd en Mac
-_MODIFIER_KEY = Keys.COMMAND if platform.system() == "Darwin" else Keys.CONTROL
+if TYPE_CHECKING:
+    from .driver_watchdog import DriverWatchdog
+    from .google_drive_service import GoogleDriveService
+    from .google_sheets_service import GoogleSheetsService
+
+# selenium, webdriver_manager, googleapiclient (servicios de Google), psutil
+# (watchdog) y Pillow (evidencias) se importan dentro de los métodos que los
+# usan: la búsqueda en archivo, el historial y la caché no los necesitan.
+
+
+@contextmanager
+def _startup_stage(startup: Optional[Dict], stage: str):
+    """Registra la duración de una etapa del arranque en startup['stages']."""
+    started = time.perf_counter()
+    yield
+    if startup is not None:
+        seconds = time.perf_counter() - started
+        startup['stages'][stage] = round(seconds, 3)
+        STARTUP_STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def _modifier_key():
+    """Tecla modificadora: Ctrl en Windows/Linux, Cmd en Mac."""
+    from selenium.webdriver.common.keys import Keys
+    return Keys.COMMAND if platform.system() == "Darwin" else Keys.CONTROL
+
+# Enfoca el cuadro de búsqueda (o el elemento con foco) y selecciona su texto,
+# para que lo que se escriba lo reemplace. False si no es un campo de texto
+_SELECT_INPUT_JS = """
+const el = arguments[0] || document.activeElement;
+if (!el || !('value' in el)) return false;
+el.focus();
+if (el.select) el.select();
+return true;
+"""
+
+_INPUT_VALUE_JS = """
+const el = arguments[0] || document.activeElement;
+return el && 'value' in el ? el.value : null;
+"""
 
 
 class ComparisonService:
     """Servicio para buscar aliados en documentos y tomar screenshots."""
 
-    def __init__(self, sheets_service: GoogleSheetsService = None,
-                 screenshots_dir: str = "screenshots"):
+    def __init__(self, sheets_service: 'GoogleSheetsService' = None,
+                 screenshots_dir: str = "screenshots",
+                 chrome_profile_dir: str = None,
+                 headless: bool = False,
+                 drive_service: 'GoogleDriveService' = None,
+                 outcome_cache: OutcomeCache = None,
+                 run_store: RunStore = None,
+                 text_entry: str = None):
+        """
+        Args:
+            sheets_service: Servicio de Sheets para leer la lista B
+            screenshots_dir: Carpeta donde se guardan las capturas
+            chrome_profile_dir: Perfil fijo de Chrome (sin pool). Por defecto
+                                cada búsqueda toma un slot del pool de perfiles
+            headless: Ejecutar Chrome sin ventana (benchmarks, pruebas)
+            drive_service: Servicio de Drive para conocer la revisión del
+                           documento A. Por defecto usa el mismo endpoint y
+                           credenciales que sheets_service
+            outcome_cache: Caché de resultados. Por defecto OUTCOME_CACHE_FILE
+                           (si OUTCOME_CACHE_ENABLED), abierta al primer uso
+            run_store: Dónde se guarda cada ejecución para exportarla.
+                       Por defecto USER_DATA_DIR/runs
+            text_entry: Cómo se escriben los nombres en el cuadro de búsqueda,
+                        "cdp" o "keys" (default: SEARCH_TEXT_ENTRY de config.py)
+        """
+        from config import SEARCH_TEXT_ENTRY
+        from .google_drive_service import GoogleDriveService
+        from .google_sheets_service import GoogleSheetsService
         self.sheets_service = sheets_service or GoogleSheetsService()
         self.screenshots_dir = screenshots_dir
+        self.chrome_profile_dir = chrome_profile_dir
+        self._profile_pool = None
+        self._profile_pool_lock = threading.Lock()
+        self.headless = headless
+        self.text_entry = text_entry or SEARCH_TEXT_ENTRY
+        self.drive_service = drive_service or GoogleDriveService(
+            api_endpoint=self.sheets_service.api_endpoint,
+            credentials=self.sheets_service.credentials)
+        self._outcome_cache = outcome_cache
+        self.run_store = run_store or RunStore()
+        self._outcome_cache_lock = threading.Lock()
         self.stop_event = None
 
         if not os.path.exists(screenshots_dir):
             os.makedirs(screenshots_dir)
 
     def set_stop_event(self, event: threading.Event):
-        """Establece el evento para detener la búsqueda."""
+        """Establece el evento por defecto para detener la búsqueda."""
         self.stop_event = event
 
-    def _check_stop_signal(self):
+    def _check_stop_signal(self, stop_event: threading.Event = None):
         """Verifica si se ha solicitado detener la búsqueda."""
-        if self.stop_event and self.stop_event.is_set():
+        event = stop_event or self.stop_event
+        if event and event.is_set():
             raise KeyboardInterrupt("Búsqueda detenida por el usuario")
 
-    @staticmethod
-    def _clean_chrome_locks(profile_dir: str):
-        """Elimina archivos de bloqueo de Chrome de ejecuciones anteriores.
+    def get_outcome_cache(self):
+        """Caché de resultados (None si está desactivada en config.py)."""
+        with self._outcome_cache_lock:
+            if self._outcome_cache is None:
+                from config import OUTCOME_CACHE_ENABLED
+                if not OUTCOME_CACHE_ENABLED:
+                    return None
+                self._outcome_cache = OutcomeCache()
+            return self._outcome_cache
 
-        Si Chrome o Selenium no se cerraron correctamente, estos archivos
-        evitan que el perfil se cargue y Chrome cae a un perfil temporal vacío.
+    def _document_revision(self, document_a_url: str):
         """
-        for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
-            lock_path = os.path.join(profile_dir, name)
+        Identifica el documento A y su revisión actual (modifiedTime de Drive).
+
+        Returns:
+            (document_id, revision), o None si no se pudo obtener: en ese
+            caso la ejecución no usa la caché
+        """
+        with span('document_revision') as revision_args:
             try:
-                if os.path.exists(lock_path):
-                    os.remove(lock_path)
-            except OSError:
-                pass
+                from .google_sheets_service import GoogleSheetsService
+                document_id = GoogleSheetsService.extract_spreadsheet_id(document_a_url)
+                if document_id == document_a_url:
+                    raise ValueError("la URL no es de Google Sheets/Drive")
+                revision = self.drive_service.get_revision(document_id)
+            except Exception as e:
+                print(f"No se pudo obtener la revisión del documento A ({e}); "
+                      "esta ejecución no usa la caché de resultados")
+                revision_args['available'] = False
+                return None
+            revision_args.update(available=True, revision=revision)
+        print(f"Documento A {document_id}: revisión {revision}")
+        return document_id, revision
+
+    def _cached_outcomes(self, cache_key, names: List[str], require_evidence: bool = True,
+                         rfcs: Dict[str, str] = None) -> Dict:
+        """
+        Resultados vigentes de la caché para estos nombres ({} si no aplica).
+
+        Args:
+            rfcs: RFC de cada nombre en esta búsqueda; un resultado guardado
+                  vale solo si se buscó con la misma llave (RFC o nombre)
+        """
+        cache = self.get_outcome_cache() if cache_key else None
+        if cache is None:
+            return {}
+        with span('cache_lookup', names=len(names)) as lookup_args:
+            hits = cache.get_many(*cache_key, names, require_evidence=require_evidence)
+            if rfcs is not None:
+                hits = {name: result for name, result in hits.items()
+                        if result.get('rfc') == rfcs.get(name)}
+            lookup_args['hits'] = len(hits)
+        if hits:
+            NAMES_PROCESSED.inc(len(hits), status='cached')
+            print(f"Caché: {len(hits)} de {len(names)} aliados ya verificados contra esta revisión\n")
+        return hits
 
-    def _create_chrome_driver(self):
-        """Crea un driver de Chrome con perfil persistente para mantener la sesión."""
-        from config import BROWSER_WIDTH, BROWSER_HEIGHT, USER_DATA_DIR
+    def get_profile_pool(self) -> ProfilePool:
+        """Pool de perfiles de Chrome (se crea al primer uso)."""
+        with self._profile_pool_lock:
+            if self._profile_pool is None:
+                from config import (CHROME_PROFILE_TEMPLATE, CHROME_PROFILE_POOL_DIR,
+                                    CHROME_PROFILE_POOL_SIZE, CHROME_PROFILE_LEASE_TIMEOUT)
+                self._profile_pool = ProfilePool(CHROME_PROFILE_TEMPLATE, CHROME_PROFILE_POOL_DIR,
+                                                 CHROME_PROFILE_POOL_SIZE, CHROME_PROFILE_LEASE_TIMEOUT)
+            return self._profile_pool
 
-        chrome_profile_dir = str(USER_DATA_DIR / "chrome-profile")
+    def _lease_profile(self, startup: Dict):
+        """
+        Slot del pool para esta búsqueda, o None si el servicio usa un
+        perfil fijo (chrome_profile_dir).
+        """
+        if self.chrome_profile_dir:
+            return None
+        with span('profile_lease') as lease_args, _startup_stage(startup, 'profile_lease'):
+            lease = self.get_profile_pool().lease()
+            lease_args.update(slot=lease.slot, setup=lease.setup['setup'])
+        startup['profile'] = lease.as_dict()
+        if lease.setup['setup'] == 'cloned':
+            print(f"Perfil de Chrome {lease.slot} clonado de la plantilla "
+                  f"({lease.setup['files']} archivos, {lease.setup['method']})")
+        return lease
+
+    def _create_chrome_driver(self, startup: Dict = None, profile_dir: str = None):
+        """
+        Crea un driver de Chrome con perfil persistente para mantener la sesión,
+        con BROWSER_BLOCKED_URLS bloqueadas (según BROWSER_NETWORK_BLOCKING).
+
+        Args:
+            startup: Arranque de la búsqueda; recibe las etapas driver_resolve
+                     y chrome_launch y si chromedriver salió de la caché
+            profile_dir: Perfil del slot prestado. Por defecto chrome_profile_dir
+                         (o la plantilla del pool si no se indicó)
+        """
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from config import (BROWSER_WIDTH, BROWSER_HEIGHT, CHROME_PROFILE_TEMPLATE,
+                            BROWSER_BLOCKED_URLS, BROWSER_NETWORK_BLOCKING,
+                            CHROMEDRIVER_CACHE_FILE)
+
+        with span('driver_resolve') as resolve_args, _startup_stage(startup, 'driver_resolve'):
+            driver_path, cached = resolve_chromedriver(CHROMEDRIVER_CACHE_FILE)
+            resolve_args['cached'] = cached
+        if startup is not None:
+            startup['chromedriver'] = 'cached' if cached else 'resolved'
+
+        chrome_profile_dir = profile_dir or self.chrome_profile_dir or str(CHROME_PROFILE_TEMPLATE)
         os.makedirs(chrome_profile_dir, exist_ok=True)
 
         # Limpiar locks de ejecuciones anteriores que no cerraron bien
-        self._clean_chrome_locks(chrome_profile_dir)
+        clean_singleton_locks(chrome_profile_dir)
 
         options = webdriver.ChromeOptions()
         options.add_argument(f"--window-size={BROWSER_WIDTH},{BROWSER_HEIGHT}")
@@ -76,28 +247,345 @@ class ComparisonService:
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
+        if self.headless:
+            options.add_argument("--headless=new")
+        if BROWSER_NETWORK_BLOCKING != "off":
+            enable_performance_log(options)
 
         # No se fuerza user-agent: Chrome usa su versión real.
         # Un UA estático (ej. Chrome/120) no coincide con la versión instalada
         # y Google invalida la sesión al detectar la inconsistencia.
 
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
+        with span('chrome_launch'), _startup_stage(startup, 'chrome_launch'):
+            driver = webdriver.Chrome(service=Service(driver_path), options=options)
+
+        if BROWSER_NETWORK_BLOCKING == "block" and BROWSER_BLOCKED_URLS:
+            try:
+                apply_blocklist(driver, BROWSER_BLOCKED_URLS)
+            except Exception as e:
+                print(f"⚠️ No se pudo activar el bloqueo de recursos: {e}")
+        return driver
+
+    @staticmethod
+    def _network_report():
+        """Reporte de red para una búsqueda (None si BROWSER_NETWORK_BLOCKING es "off")."""
+        from config import BROWSER_BLOCKED_URLS, BROWSER_NETWORK_BLOCKING, BROWSER_NETWORK_AUDIT_FILE
+        if BROWSER_NETWORK_BLOCKING == "off":
+            return None
+        return NetworkReport(BROWSER_BLOCKED_URLS, BROWSER_NETWORK_BLOCKING, BROWSER_NETWORK_AUDIT_FILE)
+
+    @staticmethod
+    def _load_document(driver, document_a_url: str):
+        """Abre el documento A y espera a que cargue la página."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        with span('load_document'):
+            driver.get(document_a_url)
+
+            WebDriverWait(driver, 30).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+
+    def _wait_for_auth(self, wait_seconds: float, stop_event: threading.Event = None):
+        """Espera wait_seconds con el documento abierto (autenticación manual)."""
+        print(f"Esperando {wait_seconds:.0f}s para autenticación...")
+        event = stop_event or self.stop_event
+        if event:
+            event.wait(wait_seconds)
+        else:
+            time.sleep(wait_seconds)
+        self._check_stop_signal(stop_event)
+
+    def _open_document(self, driver, document_a_url: str, wait_seconds: float,
+                       stop_event: threading.Event = None):
+        """Abre el documento A y espera wait_seconds (autenticación manual)."""
+        self._load_document(driver, document_a_url)
+        self._wait_for_auth(wait_seconds, stop_event)
+
+    def _launch_browser(self, document_a_url: str, startup: Dict, profile_dir: str = None):
+        """
+        Resuelve chromedriver, lanza Chrome y carga el documento A (sin la
+        espera de autenticación).
 
-    def _is_driver_alive(self, driver) -> bool:
-        """Verifica si el driver de Chrome sigue vivo."""
+        Returns:
+            (driver, perf_counter() al terminar de cargar el documento)
+        """
+        with span('driver_startup'), DRIVER_STARTUP_SECONDS.time():
+            driver = self._create_chrome_driver(startup, profile_dir)
         try:
-            _ = driver.title
-            return True
+            print("Abriendo documento para autenticación...")
+            with _startup_stage(startup, 'document_load'):
+                self._load_document(driver, document_a_url)
+        except BaseException:
+            driver.quit()
+            raise
+        return driver, time.perf_counter()
+
+    def _start_browser_launch(self, document_a_url: str, startup: Dict,
+                              profile_dir: str = None) -> Future:
+        """_launch_browser en otro hilo (con la traza de la ejecución)."""
+        trace = current_trace()
+
+        def launch():
+            with use_trace(trace):
+                return self._launch_browser(document_a_url, startup, profile_dir)
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser-launch')
+        future = executor.submit(launch)
+        executor.shutdown(wait=False)
+        return future
+
+    @staticmethod
+    def _print_startup(startup: Dict):
+        """Una línea con la duración de cada etapa del arranque."""
+        chromedriver = 'chromedriver (caché)' if startup['chromedriver'] == 'cached' else 'chromedriver'
+        labels = [('list_b_read', 'lista B'), ('cache_check', 'caché'),
+                  ('driver_resolve', chromedriver), ('chrome_launch', 'Chrome'),
+                  ('document_load', 'documento'), ('browser_wait', 'espera navegador'),
+                  ('auth_wait', 'autenticación')]
+        parts = [f"{label} {startup['stages'][stage]:.1f}s" for stage, label in labels
+                 if stage in startup['stages']]
+        mode = "en paralelo" if startup['prestart'] else "secuencial"
+        print(f"Arranque {mode}: {', '.join(parts)} → primera búsqueda a los "
+              f"{startup['time_to_first_search']:.1f}s")
+
+    @staticmethod
+    def _discard_launch(launch: Future, lease=None):
+        """
+        Cierra el Chrome de un arranque en paralelo que no se va a usar y
+        después devuelve su perfil al pool.
+        """
+        def close(done: Future):
+            try:
+                if done.exception() is None:
+                    done.result()[0].quit()
+            except Exception:
+                pass
+            finally:
+                if lease is not None:
+                    lease.release()
+
+        launch.add_done_callback(close)
+
+    @staticmethod
+    def _start_watchdog(driver) -> 'DriverWatchdog':
+        from config import DRIVER_WATCHDOG_INTERVAL, DRIVER_MEMORY_SAMPLE_SECONDS
+        from .driver_watchdog import DriverWatchdog
+        return DriverWatchdog(driver, DRIVER_WATCHDOG_INTERVAL, DRIVER_MEMORY_SAMPLE_SECONDS).start()
+
+    def _restart_driver(self, driver, watchdog: 'DriverWatchdog', document_a_url: str,
+                        stop_event: threading.Event = None, reason: str = 'crash',
+                        profile_dir: str = None):
+        """
+        Cierra el Chrome actual (caído o por reciclar) y abre otro con el
+        mismo perfil (la sesión de Google se conserva), con el documento A cargado.
+
+        Returns:
+            (driver, watchdog) nuevos
+        """
+        from config import DRIVER_RESTART_AUTH_WAIT
+
+        watchdog.stop()
+        try:
+            driver.quit()
         except Exception:
+            pass
+
+        with span('driver_restart', reason=reason):
+            with span('driver_startup'), DRIVER_STARTUP_SECONDS.time():
+                driver = self._create_chrome_driver(profile_dir=profile_dir)
+            try:
+                self._open_document(driver, document_a_url, DRIVER_RESTART_AUTH_WAIT, stop_event)
+            except BaseException:
+                driver.quit()
+                raise
+        return driver, self._start_watchdog(driver)
+
+    @staticmethod
+    def _recycle_reason(watchdog: 'DriverWatchdog', names_on_driver: int):
+        """'names' o 'memory' si toca reciclar Chrome, None si no."""
+        from config import DRIVER_RECYCLE_EVERY_NAMES, DRIVER_RECYCLE_RSS_MB
+        if DRIVER_RECYCLE_EVERY_NAMES and names_on_driver >= DRIVER_RECYCLE_EVERY_NAMES:
+            return 'names'
+        if DRIVER_RECYCLE_RSS_MB and watchdog.rss_bytes > DRIVER_RECYCLE_RSS_MB * 1024 * 1024:
+            return 'memory'
+        return None
+
+    def _detect_in_page(self, driver, names: List[str], document_a_url: str):
+        """
+        Detección por script de todos los nombres pendientes.
+
+        Returns:
+            {nombre: resultado con status found/not_found}, o None si la
+            página no se pudo leer (se sigue con Ctrl+F para todos)
+        """
+        from config import DETECTION_BATCH_SIZE
+
+        try:
+            with span('detect', names=len(names)) as detect_args:
+                detected = detect_names(driver, names, document_a_url, DETECTION_BATCH_SIZE)
+                detect_args['source'] = next(iter(detected.values()), {}).get('detection_source')
+        except Exception as e:
+            print(f"No se pudo detectar en la página ({e}); se usa Ctrl+F para todos")
+            return None
+
+        timestamp = datetime.now().isoformat()
+        results = {
+            name: {'status': 'found' if data['match_count'] else 'not_found',
+                   **data, 'timestamp': timestamp}
+            for name, data in detected.items()
+        }
+        found = sum(1 for r in results.values() if r['status'] == 'found')
+        print(f"Detección en la página: {found} de {len(names)} aliados aparecen en el documento A")
+        return results
+
+    @staticmethod
+    def _needs_evidence(page_result: Dict, evidence: str) -> bool:
+        """Si un nombre detectado por script lleva Ctrl+F y captura."""
+        if evidence == 'all':
+            return True
+        return evidence == 'found' and page_result['status'] == 'found'
+
+    @staticmethod
+    def _fail_remaining(results: Dict, names: List[str], error: str):
+        """Marca con error los nombres que ya no se van a buscar."""
+        NAMES_PROCESSED.inc(len(names), status='error')
+        for remaining_name in names:
+            results[remaining_name] = {
+                'status': 'error',
+                'error': error,
+                'timestamp': datetime.now().isoformat()
+            }
+
+    def _insert_text(self, driver, search_input, name: str) -> bool:
+        """
+        Escribe el nombre completo con una sola llamada a DevTools
+        (Input.insertText, como al pegar) y verifica que el cuadro de
+        búsqueda quedó exactamente con ese texto.
+        """
+        try:
+            if not driver.execute_script(_SELECT_INPUT_JS, search_input):
+                return False
+            driver.execute_cdp_cmd('Input.insertText', {'text': name})
+            value = driver.execute_script(_INPUT_VALUE_JS, search_input)
+        except AttributeError:
+            # Navegador sin DevTools Protocol: se escribe tecla por tecla en adelante
+            print("⚠️ El navegador no soporta Input.insertText, se escribe tecla por tecla")
+            self.text_entry = 'keys'
             return False
+        except Exception as e:
+            print(f"⚠️ Input.insertText falló ({e}), se escribe tecla por tecla")
+            return False
+
+        if value is not None and unicodedata.normalize('NFC', value) == unicodedata.normalize('NFC', name):
+            return True
+        print(f"⚠️ El cuadro de búsqueda quedó con '{value}', se escribe tecla por tecla")
+        return False
+
+    def _type_name(self, driver, search_input, name: str) -> str:
+        """
+        Escribe el nombre en el cuadro de búsqueda: con Input.insertText si
+        text_entry es "cdp", o tecla por tecla si no está disponible o el
+        cuadro no quedó con el texto completo.
+
+        Args:
+            search_input: Cuadro de búsqueda, o None si no se encontró (se
+                          escribe en el elemento con foco)
+
+        Returns:
+            Método usado: 'cdp', 'send_keys' o 'action_chains'
+        """
+        if self.text_entry == 'cdp' and self._insert_text(driver, search_input, name):
+            return 'cdp'
+
+        if search_input is not None:
+            try:
+                search_input.clear()
+                search_input.send_keys(name)
+                return 'send_keys'
+            except Exception:
+                pass
+
+        from selenium.webdriver.common.action_chains import ActionChains
+        # Selecciona lo que haya quedado escrito para reemplazarlo
+        try:
+            driver.execute_script(_SELECT_INPUT_JS, None)
+        except Exception:
+            pass
+        actions = ActionChains(driver)
+        actions.send_keys(name)
+        actions.perform()
+        return 'action_chains'
+
+    def _search_single_name(self, driver, name: str, filename_prefix: str) -> Dict:
+        """
+        Busca un nombre con Ctrl+F en el documento abierto y guarda la captura.
+
+        Returns:
+            Resultado del nombre {screenshot_path, status, timestamp}
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        # Limpiar búsqueda anterior
+        with span('escape'):
+            driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+            time.sleep(0.5)
+
+        # Abrir diálogo de búsqueda (Ctrl+F en Windows/Linux, Cmd+F en Mac)
+        with span('find'):
+            driver.find_element(By.TAG_NAME, "body").send_keys(_modifier_key(), "f")
+            time.sleep(2)
+
+        # Escribir nombre en el campo de búsqueda
+        print(f"Buscando: '{name}'")
+        with span('type') as type_args:
+            try:
+                search_input = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located(
+                        (By.CSS_SELECTOR, "input[aria-label*='Buscar'], input[aria-label*='Find'], input[aria-label*='buscar'], input[aria-label*='find']")
+                    )
+                )
+            except Exception:
+                search_input = None
+            type_args['method'] = self._type_name(driver, search_input, name)
+        TEXT_ENTRY.inc(method=type_args['method'])
+
+        with span('wait'):
+            time.sleep(2)
+
+        # Tomar screenshot
+        from .evidence_renderer import screenshot_filename
+        filename = screenshot_filename(self.screenshots_dir, filename_prefix, name)
+
+        with span('capture'), SCREENSHOT_SECONDS.time(stage='capture'):
+            png = driver.get_screenshot_as_png()
+        with span('write', bytes=len(png)), SCREENSHOT_SECONDS.time(stage='write'):
+            with open(filename, 'wb') as f:
+                f.write(png)
+        print(f"Screenshot guardado: {filename}")
+
+        return {
+            'screenshot_path': filename,
+            'status': 'success',
+            'timestamp': datetime.now().isoformat()
+        }
 
     def search_names_in_document(self,
                                  list_b_id: str,
                                  list_b_range: str,
                                  document_a_url: str,
                                  auth_wait_seconds: int = None,
-                                 filename_prefix: str = "search") -> Dict:
+                                 filename_prefix: str = "search",
+                                 use_cache: bool = True,
+                                 detection: str = None,
+                                 evidence: str = None,
+                                 stop_event: threading.Event = None,
+                                 run_id: str = None) -> Dict:
         """
         Lee nombres de la lista B y busca cada uno en el documento A.
         Toma screenshot de cada búsqueda (aparezca o no el resultado).
@@ -109,158 +597,586 @@ class ComparisonService:
             document_a_url: URL completa del documento A donde buscar
             auth_wait_seconds: Tiempo de espera para autenticación
             filename_prefix: Prefijo para el nombre de las capturas (ej: 'sat', 'osac', 'nu')
+            use_cache: Omitir los nombres ya verificados contra la revisión
+                       actual del documento A (con su captura aún en disco)
+            detection: "keystroke" (Ctrl+F por nombre) o "script" (detección por
+                       lotes en la página). Default: SEARCH_DETECTION
+            evidence: Con detection="script", qué nombres llevan captura:
+                      "found", "all" o "none". Default: DETECTION_EVIDENCE
+            stop_event: Token de cancelación de esta búsqueda. Si no se indica
+                        se usa el establecido con set_stop_event()
+            run_id: Identificador de la ejecución (nombre de su traza).
+                    Si no se indica se genera uno
+
+        Returns:
+            Diccionario con resultados {nombre: {screenshot_path, status}},
+            cache_hits y run_id
+        """
+        return self._traced_run(
+            run_id,
+            lambda: self._run_search(list_b_id, list_b_range, document_a_url,
+                                     auth_wait_seconds, filename_prefix, use_cache,
+                                     detection, evidence, stop_event),
+            mode='browser', document_a_url=document_a_url, filename_prefix=filename_prefix)
+
+    def _traced_run(self, run_id: str, runner, **span_args) -> Dict:
+        """
+        Ejecuta runner() dentro de la traza de la ejecución y al final guarda
+        la traza y los resultados (RunStore, para exportarlos).
+        """
+        run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+        with start_trace(run_id) as trace:
+            try:
+                with span('run', run_id=run_id, **span_args) as run_args:
+                    result = runner()
+                    run_args['status'] = result['status']
+            finally:
+                try:
+                    print(f"Traza guardada: {trace.save()}")
+                except OSError as e:
+                    print(f"No se pudo guardar la traza: {e}")
+
+        result['run_id'] = run_id
+        try:
+            self.run_store.save(run_id, result)
+        except OSError as e:
+            print(f"No se pudieron guardar los resultados de la ejecución: {e}")
+        return result
+
+    @staticmethod
+    def _range_column(list_b_range: str, column: str) -> int:
+        """
+        Posición de una columna de la hoja (ej. 'C') dentro de las filas que
+        devuelve el rango ('abastos!B2:D' → 'C' es la posición 1).
+        """
+        cells = list_b_range.rsplit('!', 1)[-1] if '!' in list_b_range else list_b_range
+        start = re.match(r"\$?([A-Za-z]{1,3})(?![A-Za-z])", cells)
+        offset = column_index(start.group(1).upper()) if start else 0
+        position = column_index(column.strip().upper()) - offset
+        if position < 0:
+            raise ValueError(f"La columna {column} está fuera del rango {list_b_range}")
+        return position
+
+    def _read_list_b(self, list_b_id: str, list_b_range: str, name_column: str = None,
+                     rfc_column: str = None) -> List[Tuple[str, Optional[str]]]:
+        """
+        Lee la lista B: nombre y RFC de cada fila (sin filas vacías).
+
+        Args:
+            name_column: Columna del nombre (default: LIST_B_NAME_COLUMN o la
+                         primera del rango)
+            rfc_column: Columna del RFC (default: LIST_B_RFC_COLUMN; None = sin RFC)
+
+        Returns:
+            [(nombre, RFC normalizado o None)]. Una fila sin nombre pero con
+            RFC usa el RFC como nombre
+        """
+        from config import LIST_B_NAME_COLUMN, LIST_B_RFC_COLUMN
+        name_column = name_column or LIST_B_NAME_COLUMN
+        rfc_column = rfc_column or LIST_B_RFC_COLUMN
+        name_at = self._range_column(list_b_range, name_column) if name_column else 0
+        rfc_at = self._range_column(list_b_range, rfc_column) if rfc_column else None
+
+        print(f"Leyendo lista B desde {list_b_id}...")
+        with span('read_list_b', range=list_b_range) as read_args:
+            list_b_values = self.sheets_service.read_range(list_b_id, list_b_range)
+            entries = []
+            for row in list_b_values:
+                name = row[name_at].strip() if len(row) > name_at else ''
+                rfc = normalize_rfc(row[rfc_at]) if rfc_at is not None and len(row) > rfc_at else ''
+                if name or rfc:
+                    entries.append((name or rfc, rfc or None))
+            read_args['names'] = len(entries)
+            if rfc_at is not None:
+                read_args['with_rfc'] = sum(1 for _, rfc in entries if rfc)
+
+        print(f"Se encontraron {len(entries)} aliados para buscar\n")
+        return entries
+
+    def _read_list_b_names(self, list_b_id: str, list_b_range: str) -> List[str]:
+        """Lee los nombres de la lista B (columna LIST_B_NAME_COLUMN, sin vacíos)."""
+        return [name for name, _ in self._read_list_b(list_b_id, list_b_range)]
+
+    def match_names_in_file(self,
+                            list_b_id: str,
+                            list_b_range: str,
+                            document_path: str,
+                            filename_prefix: str = "search",
+                            sheet_name: str = None,
+                            render_evidence: bool = True,
+                            use_cache: bool = True,
+                            stop_event: threading.Event = None,
+                            run_id: str = None,
+                            name_column: str = None,
+                            rfc_column: str = None) -> Dict:
+        """
+        Busca los nombres de la lista B en un documento A local (CSV/XLSX),
+        sin navegador ni red para el documento: se indexa en memoria y cada
+        nombre se busca como subcadena de alguna celda.
+
+        Si la lista B trae RFC (rfc_column), los aliados con RFC se buscan por
+        RFC exacto (un dict RFC → celdas del documento A, O(n + m)) y solo los
+        que no tienen RFC se buscan por nombre.
+
+        Args:
+            list_b_id: ID de Google Sheets de la lista B (aliados)
+            list_b_range: Rango de la lista B (ej: 'Sheet1!A:A')
+            document_path: Ruta del CSV/XLSX del documento A (ej. lista 69-B del SAT)
+            filename_prefix: Prefijo para el nombre de las evidencias (ej: 'sat', 'osac', 'nu')
+            sheet_name: Hoja a leer si el documento es XLSX (default: la primera)
+            render_evidence: Dibujar una imagen por nombre (fila resaltada o
+                             "sin coincidencias"), como las capturas de Chrome
+            use_cache: Reutilizar los resultados de nombres ya buscados en un
+                       archivo con el mismo contenido (sha256)
+            stop_event: Token de cancelación de esta búsqueda
+            run_id: Identificador de la ejecución (nombre de su traza)
+            name_column: Columna del nombre en la lista B (ej. 'A'; default
+                         LIST_B_NAME_COLUMN o la primera del rango)
+            rfc_column: Columna del RFC en la lista B (default LIST_B_RFC_COLUMN)
 
         Returns:
-            Diccionario con resultados {nombre: {screenshot_path, status}}
+            Diccionario con resultados {nombre: {status, matches, matched_by,
+            rfc, screenshot_path, timestamp}} y run_id
         """
+        return self._traced_run(
+            run_id,
+            lambda: self._run_file_match(list_b_id, list_b_range, document_path,
+                                         filename_prefix, sheet_name, render_evidence,
+                                         use_cache, stop_event, name_column, rfc_column),
+            mode='file', document_path=os.path.basename(document_path),
+            filename_prefix=filename_prefix)
+
+    def _run_file_match(self, list_b_id: str, list_b_range: str, document_path: str,
+                        filename_prefix: str, sheet_name: str, render_evidence: bool,
+                        use_cache: bool, stop_event: threading.Event,
+                        name_column: str = None, rfc_column: str = None) -> Dict:
+        """Cuerpo de match_names_in_file (ver su documentación)."""
+        cached, searched = {}, {}
+        try:
+            print("\n" + "="*60)
+            print("INICIANDO BUSQUEDA DE ALIADOS EN ARCHIVO LOCAL")
+            print("="*60 + "\n")
+
+            entries = self._read_list_b(list_b_id, list_b_range, name_column, rfc_column)
+            list_b_names = [name for name, _ in entries]
+            rfcs = {name: rfc for name, rfc in entries if rfc}
+
+            print(f"Indexando documento A: {document_path}")
+            with span('index_document') as index_args:
+                document = DocumentIndex.from_file(document_path, sheet_name=sheet_name)
+                index_args['rows'] = document.row_count
+            print(f"Documento A: {document.row_count} filas indexadas\n")
+
+            if rfcs:
+                with span('index_rfc') as rfc_args:
+                    rfc_args['rfcs'] = document.rfc_count
+                if not document.rfc_count:
+                    print("⚠️ El documento A no tiene RFC: todos los aliados se buscan por nombre\n")
+                    rfcs = {}
+
+            # El contenido identifica al archivo: el mismo CSV descargado otra
+            # vez (aunque con otro nombre) reutiliza los resultados, y cada
+            # archivo (u hoja de un XLSX) guarda los suyos por separado
+            document_id = file_document_id(document.revision, sheet_name)
+            cache_key = (document_id, document.revision) if use_cache else None
+            cached = self._cached_outcomes(cache_key, list_b_names, require_evidence=render_evidence,
+                                           rfcs=rfcs)
+            pending = [name for name in list_b_names if name not in cached]
+
+            with span('match_names', names=len(pending), by_rfc=len(rfcs)):
+                for idx, name in enumerate(pending, 1):
+                    if idx % 500 == 0:
+                        self._check_stop_signal(stop_event)
+                    rfc = rfcs.get(name)
+                    matches = document.find_rfc(rfc) if rfc else document.find(name)
+                    status = 'found' if matches else 'not_found'
+                    searched[name] = {
+                        'status': status,
+                        'match_count': len(matches),
+                        'matches': matches,
+                        'matched_by': 'rfc' if rfc else 'name',
+                        'timestamp': datetime.now().isoformat()
+                    }
+                    if rfc:
+                        searched[name]['rfc'] = rfc
+                    NAMES_PROCESSED.inc(status=status)
+
+            if render_evidence and searched:
+                self._check_stop_signal(stop_event)
+                self._render_file_evidence(document, searched, filename_prefix)
+
+            cache = self.get_outcome_cache() if cache_key else None
+            if cache is not None and searched:
+                cache.put_many(*cache_key, searched)
+
+            results = {name: searched.get(name) or cached[name] for name in list_b_names}
+            found = sum(1 for r in results.values() if r['status'] == 'found')
+            by_rfc = sum(1 for r in results.values() if r.get('matched_by') == 'rfc')
+
+            print("="*60)
+            print("BUSQUEDA COMPLETADA")
+            print("="*60)
+            print(f"Total de aliados: {len(list_b_names)}")
+            print(f"Encontrados en documento A: {found}")
+            print(f"No encontrados: {len(results) - found}")
+            if by_rfc:
+                print(f"Buscados por RFC: {by_rfc} / por nombre: {len(results) - by_rfc}")
+            print(f"Desde caché: {len(cached)}")
+            print("="*60 + "\n")
+
+            SEARCH_RUNS.inc(status='completed')
+
+            return {
+                'status': 'completed',
+                'mode': 'file',
+                'filename_prefix': filename_prefix,
+                'document': {**document.describe(), 'document_id': document_id},
+                'total_names': len(list_b_names),
+                'found': found,
+                'not_found': len(results) - found,
+                'matched_by': {'rfc': by_rfc, 'name': len(results) - by_rfc},
+                'cache_hits': len(cached),
+                'results': results
+            }
+
+        except KeyboardInterrupt:
+            print("\nProceso cancelado por el usuario")
+            SEARCH_RUNS.inc(status='cancelled')
+            return {
+                'status': 'cancelled',
+                'message': 'Proceso cancelado',
+                'mode': 'file',
+                'results': {**cached, **searched}
+            }
+
+    def _render_file_evidence(self, document: DocumentIndex, results: Dict, filename_prefix: str):
+        """Dibuja la evidencia de cada nombre y agrega screenshot_path a su resultado."""
+        from config import EVIDENCE_CONTEXT_ROWS, EVIDENCE_RENDER_WORKERS
+        from .evidence_renderer import EvidenceRenderer
+
+        renderer = EvidenceRenderer(self.screenshots_dir, context_rows=EVIDENCE_CONTEXT_ROWS,
+                                    max_workers=EVIDENCE_RENDER_WORKERS)
+        names = list(results)
+        jobs = [renderer.build_job(document, name, results[name], filename_prefix) for name in names]
+
+        def observe(path, seconds, size):
+            SCREENSHOT_SECONDS.observe(seconds, stage='render')
+
+        print(f"Generando {len(jobs)} evidencias...")
+        with span('render_evidence', images=len(jobs)) as render_args:
+            started = time.perf_counter()
+            paths = renderer.render(jobs, on_rendered=observe)
+            render_args['seconds'] = round(time.perf_counter() - started, 3)
+
+        for name, path in zip(names, paths):
+            results[name]['screenshot_path'] = path
+        print(f"Evidencias guardadas en {self.screenshots_dir} "
+              f"({len(paths) / max(render_args['seconds'], 1e-6):.0f} imágenes/s)\n")
+
+    def _run_search(self, list_b_id: str, list_b_range: str, document_a_url: str,
+                    auth_wait_seconds: int, filename_prefix: str, use_cache: bool,
+                    detection: str, evidence: str, stop_event: threading.Event) -> Dict:
+        """Cuerpo de search_names_in_document (ver su documentación)."""
         driver = None
+        watchdog = None
+        network = None
+        launch = None
+        lease = None
+        profile_dir = None
+        detected = {}
+        results = {}
+        run_started = time.perf_counter()
 
         try:
             from config import AUTH_WAIT_SECONDS as DEFAULT_AUTH_WAIT
+            from config import (DRIVER_MAX_RESTARTS, SEARCH_DETECTION, DETECTION_EVIDENCE,
+                                BROWSER_PRESTART)
             if auth_wait_seconds is None:
                 auth_wait_seconds = DEFAULT_AUTH_WAIT
+            detection = detection or SEARCH_DETECTION
+            evidence = evidence or DETECTION_EVIDENCE
 
             print("\n" + "="*60)
             print("INICIANDO BUSQUEDA DE ALIADOS EN DOCUMENTO")
             print("="*60 + "\n")
 
-            # Paso 1: Leer nombres de la lista B
-            print(f"Leyendo lista B desde {list_b_id}...")
-            list_b_values = self.sheets_service.read_range(list_b_id, list_b_range)
-            list_b_names = [row[0].strip() for row in list_b_values if row and row[0]]
+            startup = {'prestart': bool(BROWSER_PRESTART), 'chromedriver': None, 'profile': None,
+                       'stages': {}, 'time_to_first_search': None}
 
-            print(f"Se encontraron {len(list_b_names)} aliados para buscar\n")
+            # Paso 1: chromedriver, Chrome y el documento A arrancan en otro
+            # hilo mientras se leen la lista B y la caché (BROWSER_PRESTART)
+            if BROWSER_PRESTART:
+                print("Iniciando navegador en paralelo...")
+                lease = self._lease_profile(startup)
+                profile_dir = lease.path if lease else None
+                launch = self._start_browser_launch(document_a_url, startup, profile_dir)
 
-            # Paso 2: Inicializar navegador con perfil persistente
-            print("Iniciando navegador...")
-            driver = self._create_chrome_driver()
+            # Paso 2: Leer nombres de la lista B
+            with _startup_stage(startup, 'list_b_read'):
+                list_b_names = self._read_list_b_names(list_b_id, list_b_range)
 
-            print("Abriendo documento para autenticación...")
-            driver.get(document_a_url)
+            # Paso 3: Omitir los aliados ya verificados contra esta revisión
+            with _startup_stage(startup, 'cache_check'):
+                cache_key = self._document_revision(document_a_url) if use_cache else None
+                require_evidence = detection != 'script' or evidence == 'all'
+                cached = self._cached_outcomes(cache_key, list_b_names, require_evidence)
+            results.update(cached)
+            pending = [name for name in list_b_names if name not in cached]
+            cache = self.get_outcome_cache() if cache_key else None
 
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            # Paso 4: Navegador con perfil persistente (solo si hay pendientes)
+            if pending:
+                network = self._network_report()
+                if launch is None:
+                    print("Iniciando navegador...")
+                    lease = self._lease_profile(startup)
+                    profile_dir = lease.path if lease else None
+                    driver, loaded_at = self._launch_browser(document_a_url, startup, profile_dir)
+                else:
+                    with _startup_stage(startup, 'browser_wait'):
+                        driver, loaded_at = launch.result()
+                    launch = None
 
-            print(f"Esperando {auth_wait_seconds}s para autenticación...")
-            time.sleep(auth_wait_seconds)
+                # La espera de autenticación cuenta desde que cargó el documento
+                remaining = max(0.0, auth_wait_seconds - (time.perf_counter() - loaded_at))
+                with span('auth_wait', seconds=round(remaining, 1)), AUTH_WAIT_SECONDS.time(), \
+                        _startup_stage(startup, 'auth_wait'):
+                    self._wait_for_auth(remaining, stop_event)
+                watchdog = self._start_watchdog(driver)
+                startup['time_to_first_search'] = round(time.perf_counter() - run_started, 3)
+                self._print_startup(startup)
 
-            print("Iniciando búsquedas...\n")
+                if detection == 'script':
+                    detected = self._detect_in_page(driver, pending, document_a_url)
+                    if detected is None:
+                        # La página no se pudo leer: todos van por Ctrl+F
+                        detection = 'keystroke'
+                        detected = {}
 
-            results = {}
+                print("Iniciando búsquedas...\n")
+            else:
+                if launch is not None:
+                    self._discard_launch(launch, lease)
+                    launch, lease = None, None
+                    print("Todos los aliados están en caché, se cierra el navegador\n")
+                else:
+                    print("Todos los aliados están en caché, no se abre el navegador\n")
 
-            # Paso 3: Para cada aliado, buscar en el documento A
-            for idx, name in enumerate(list_b_names, 1):
-                try:
-                    self._check_stop_signal()
+            # Paso 5: Para cada aliado pendiente, buscar en el documento A.
+            # Si Chrome se cae, se reinicia y se reintenta el mismo nombre
+            # (hasta DRIVER_MAX_RESTARTS veces por búsqueda).
+            # Chrome también se recicla cada N nombres o al pasar el límite
+            # de memoria, sin contar contra DRIVER_MAX_RESTARTS.
+            restarts = 0
+            crashed_name = None
+            recycles = 0
+            names_on_driver = 0
+            memory_samples = []
+            peak_rss = 0
+            idx = 0
+            while idx < len(pending):
+                name = pending[idx]
 
-                    # Verificar que Chrome sigue vivo
-                    if not self._is_driver_alive(driver):
-                        print("Chrome se cerró inesperadamente. Abortando...")
-                        for remaining_name in list_b_names[idx - 1:]:
-                            results[remaining_name] = {
-                                'status': 'error',
-                                'error': 'Chrome se cerró inesperadamente',
-                                'timestamp': datetime.now().isoformat()
-                            }
+                # Detección por script: sin Ctrl+F ni captura si no hace falta
+                # evidencia. Un nombre sin resultado de la página va por Ctrl+F
+                page_result = detected.get(name)
+                if page_result is not None and not self._needs_evidence(page_result, evidence):
+                    results[name] = page_result
+                    NAMES_PROCESSED.inc(status=page_result['status'])
+                    if cache is not None:
+                        cache.put(*cache_key, name, page_result)
+                    idx += 1
+                    continue
+
+                recycle_reason = self._recycle_reason(watchdog, names_on_driver)
+                if recycle_reason:
+                    print(f"Reciclando Chrome ({recycle_reason}: {names_on_driver} nombres, "
+                          f"{watchdog.rss_bytes / 1024 / 1024:.0f} MB)...")
+                    memory_samples.extend(watchdog.samples)
+                    peak_rss = max(peak_rss, watchdog.peak_rss_bytes)
+                    if network:
+                        network.collect(driver, closing=True)
+                    try:
+                        driver, watchdog = self._restart_driver(driver, watchdog, document_a_url,
+                                                                stop_event, reason=recycle_reason,
+                                                                profile_dir=profile_dir)
+                    except KeyboardInterrupt:
+                        driver = None
+                        raise
+                    except Exception as recycle_error:
+                        driver = None
+                        print(f"No se pudo reciclar Chrome: {recycle_error}")
+                        self._fail_remaining(results, pending[idx:], 'No se pudo reiniciar Chrome')
                         break
+                    DRIVER_RECYCLES.inc(reason=recycle_reason)
+                    recycles += 1
+                    names_on_driver = 0
 
-                    print(f"\n{'='*60}")
-                    print(f"[{idx}/{len(list_b_names)}] Procesando: {name}")
-                    print(f"{'='*60}")
+                name_start = time.perf_counter()
+                try:
+                    self._check_stop_signal(stop_event)
 
-                    # Limpiar búsqueda anterior
-                    driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
-                    time.sleep(0.5)
+                    # El watchdog ya detectó que Chrome se cerró: reiniciar sin intentar
+                    if watchdog.failed.is_set():
+                        raise RuntimeError("Chrome se cerró inesperadamente")
 
-                    # Abrir diálogo de búsqueda (Ctrl+F en Windows/Linux, Cmd+F en Mac)
-                    driver.find_element(By.TAG_NAME, "body").send_keys(_MODIFIER_KEY, "f")
-                    time.sleep(2)
+                    print(f"\n{'='*60}")
+                    print(f"[{idx + 1}/{len(pending)}] Procesando: {name}")
+                    print(f"{'='*60}")
 
-                    # Escribir nombre en el campo de búsqueda
-                    print(f"Buscando: '{name}'")
-                    try:
-                        search_input = WebDriverWait(driver, 5).until(
-                            EC.presence_of_element_located(
-                                (By.CSS_SELECTOR, "input[aria-label*='Buscar'], input[aria-label*='Find'], input[aria-label*='buscar'], input[aria-label*='find']")
-                            )
-                        )
-                        search_input.clear()
-                        search_input.send_keys(name)
-                    except Exception:
-                        from selenium.webdriver.common.action_chains import ActionChains
-                        actions = ActionChains(driver)
-                        actions.send_keys(name)
-                        actions.perform()
-
-                    time.sleep(2)
-
-                    # Tomar screenshot
-                    date_stamp = datetime.now().strftime("%Y%m%d")
-                    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
-                    filename = f"{self.screenshots_dir}/{filename_prefix}_{safe_name}_{date_stamp}.png"
-
-                    driver.save_screenshot(filename)
-                    print(f"Screenshot guardado: {filename}")
-
-                    results[name] = {
-                        'screenshot_path': filename,
-                        'status': 'success',
-                        'timestamp': datetime.now().isoformat()
-                    }
+                    with span('name', name=name, index=idx + 1):
+                        result = self._search_single_name(driver, name, filename_prefix)
+                    if page_result is not None:
+                        result = {**page_result, 'screenshot_path': result['screenshot_path']}
+                    result['browser_rss_mb'] = round(watchdog.rss_bytes / 1024 / 1024, 1)
+                    results[name] = result
+                    names_on_driver += 1
+                    NAME_SEARCH_SECONDS.observe(time.perf_counter() - name_start, status='success')
+                    NAMES_PROCESSED.inc(status=result['status'])
+                    if cache is not None:
+                        cache.put(*cache_key, name, results[name])
+                    idx += 1
 
                 except KeyboardInterrupt:
                     raise
                 except Exception as e:
-                    print(f"Error procesando '{name}': {e}")
-                    results[name] = {
-                        'status': 'error',
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    if not self._is_driver_alive(driver):
-                        print("Chrome ya no responde. Abortando restantes...")
-                        for remaining_name in list_b_names[idx:]:
-                            results[remaining_name] = {
+                    NAME_SEARCH_SECONDS.observe(time.perf_counter() - name_start, status='error')
+
+                    if watchdog.probe():
+                        # Chrome responde: el error es de este nombre
+                        print(f"Error procesando '{name}': {e}")
+                        results[name] = {
+                            'status': 'error',
+                            'error': str(e),
+                            'timestamp': datetime.now().isoformat()
+                        }
+                        NAMES_PROCESSED.inc(status='error')
+                        idx += 1
+                        continue
+
+                    if restarts < DRIVER_MAX_RESTARTS:
+                        restarts += 1
+                        print(f"Chrome dejó de responder en '{name}'. "
+                              f"Reiniciando ({restarts}/{DRIVER_MAX_RESTARTS})...")
+                        if name == crashed_name:
+                            # Segunda caída con el mismo nombre: no se reintenta otra vez
+                            results[name] = {
                                 'status': 'error',
-                                'error': 'Chrome se cerró inesperadamente',
+                                'error': 'Chrome se cerró dos veces al buscar este nombre',
                                 'timestamp': datetime.now().isoformat()
                             }
-                        break
+                            NAMES_PROCESSED.inc(status='error')
+                            idx += 1
+                        crashed_name = name
+                        memory_samples.extend(watchdog.samples)
+                        peak_rss = max(peak_rss, watchdog.peak_rss_bytes)
+                        if network:
+                            network.collect(driver, closing=True)
+                        try:
+                            driver, watchdog = self._restart_driver(driver, watchdog,
+                                                                    document_a_url, stop_event,
+                                                                    profile_dir=profile_dir)
+                            DRIVER_RESTARTS.inc(outcome='restarted')
+                            names_on_driver = 0
+                            continue
+                        except KeyboardInterrupt:
+                            driver = None
+                            raise
+                        except Exception as restart_error:
+                            driver = None
+                            DRIVER_RESTARTS.inc(outcome='failed')
+                            print(f"No se pudo reiniciar Chrome: {restart_error}")
+                    else:
+                        DRIVER_RESTARTS.inc(outcome='exhausted')
+
+                    print("Chrome se cerró inesperadamente. Abortando restantes...")
+                    self._fail_remaining(results, pending[idx:], 'Chrome se cerró inesperadamente')
+                    break
 
-            # Resumen final
-            successful = sum(1 for r in results.values() if r.get('status') == 'success')
+            if watchdog:
+                memory_samples.extend(watchdog.samples)
+                peak_rss = max(peak_rss, watchdog.peak_rss_bytes)
+            network_report = None
+            if network:
+                if driver:
+                    network.collect(driver, closing=True)
+                network.save_audit()
+                network_report = network.as_dict()
+
+            # Resumen final (en el orden de la lista B)
+            results = {name: results[name] for name in list_b_names if name in results}
+            # 'found'/'not_found' vienen de la detección por script (o de la caché)
+            successful = sum(1 for r in results.values()
+                             if r.get('status') in ('success', 'found', 'not_found'))
             failed = len(results) - successful
+            found = sum(1 for r in results.values() if r.get('status') == 'found')
+            not_found = sum(1 for r in results.values() if r.get('status') == 'not_found')
 
             print("\n" + "="*60)
             print("BUSQUEDA COMPLETADA")
             print("="*60)
             print(f"Total de aliados: {len(list_b_names)}")
-            print(f"Screenshots exitosos: {successful}")
+            print(f"Exitosos: {successful}")
+            if detection == 'script':
+                print(f"Encontrados: {found} / No encontrados: {not_found}")
             print(f"Fallidos: {failed}")
+            print(f"Desde caché: {len(cached)}")
+            if network_report:
+                blocked = network_report['bytes_blocked']
+                print(f"Red: {network_report['bytes_loaded'] / 1024 / 1024:.1f} MB descargados, "
+                      f"{network_report['requests_blocked']} peticiones bloqueadas"
+                      + (f" (~{blocked / 1024 / 1024:.1f} MB)" if blocked else "")
+                      + (" [audit]" if network_report['mode'] == 'audit' else ""))
             print(f"Carpeta local: {self.screenshots_dir}")
             print("="*60 + "\n")
 
+            SEARCH_RUNS.inc(status='completed')
+
             return {
                 'status': 'completed',
                 'total_names': len(list_b_names),
                 'successful': successful,
                 'failed': failed,
+                'detection': detection,
+                'found': found,
+                'not_found': not_found,
+                'cache_hits': len(cached),
+                'document_revision': cache_key[1] if cache_key else None,
+                'driver_restarts': restarts,
+                'browser_memory': {
+                    'peak_rss_mb': round(peak_rss / 1024 / 1024, 1),
+                    'recycles': recycles,
+                    'samples': [{'at': datetime.fromtimestamp(at).isoformat(timespec='seconds'),
+                                 'rss_mb': round(rss / 1024 / 1024, 1)}
+                                for at, rss in memory_samples],
+                },
+                'network': network_report,
+                'startup': startup,
                 'results': results
             }
 
         except KeyboardInterrupt:
             print("\nProceso cancelado por el usuario")
+            SEARCH_RUNS.inc(status='cancelled')
             return {
                 'status': 'cancelled',
                 'message': 'Proceso cancelado',
-                'results': results if 'results' in locals() else {}
+                'results': results
             }
 
         finally:
+            if launch is not None:
+                self._discard_launch(launch, lease)
+                lease = None
+            if watchdog:
+                watchdog.stop()
             if driver:
                 print("Cerrando navegador...")
                 try:
-                    driver.quit()
+                    with span('driver_quit'):
+                        driver.quit()
                 except Exception:
                     pass
+            if lease is not None:
+                lease.release()
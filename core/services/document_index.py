@@ -0,0 +1,269 @@
+"""
+Documento A local (CSV/XLSX) indexado en memoria.
+Lee el archivo fila por fila y permite buscar nombres sin navegador,
+con la misma semántica que Ctrl+F (subcadena dentro de una celda) pero
+ignorando mayúsculas, acentos y puntuación.
+"""
+import codecs
+import csv
+import hashlib
+import os
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional
+
+SUPPORTED_EXTENSIONS = ('.csv', '.txt', '.xlsx', '.xlsm')
+
+_SEPARATORS = re.compile(r'[^0-9A-Z&]+')
+
+# RFC del SAT: 3 letras (moral) o 4 (física), fecha AAMMDD y homoclave de 3
+_RFC = re.compile(r'[A-ZÑ&]{3,4}[0-9]{6}[A-Z0-9]{3}')
+_RFC_SEPARATORS = re.compile(r'[\s.\-_/]+')
+
+
+def normalize_text(value) -> str:
+    """
+    Normaliza texto para comparar nombres: mayúsculas, sin acentos, sin
+    puntos y con cualquier otro separador reducido a un espacio.
+    'Agrícola Peña, S.A. de C.V.' → 'AGRICOLA PENA SA DE CV'
+    """
+    if value is None:
+        return ''
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).upper()
+    text = text.replace('.', '')
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+def normalize_rfc(value) -> str:
+    """
+    RFC en forma canónica (mayúsculas, sin espacios ni guiones), o '' si el
+    valor no tiene forma de RFC. 'aba-010101-ab1' → 'ABA010101AB1'
+    """
+    if value is None:
+        return ''
+    text = _RFC_SEPARATORS.sub('', str(value).upper())
+    return text if 12 <= len(text) <= 13 and _RFC.fullmatch(text) else ''
+
+
+def file_revision(path: str) -> str:
+    """Huella del contenido del archivo (sha256), para detectar cambios."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _detect_encoding(path: str) -> str:
+    """UTF-8 (con o sin BOM) si todo el archivo decodifica; si no, cp1252 (Excel en Windows)."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as f:
+        try:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+def _cell_to_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _iter_csv_rows(path: str) -> Iterator[List[str]]:
+    encoding = _detect_encoding(path)
+    with open(path, newline='', encoding=encoding) as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(f, dialect):
+            yield [cell.strip() for cell in row]
+
+
+def _iter_xlsx_rows(path: str, sheet_name: str = None) -> Iterator[List[str]]:
+    from openpyxl import load_workbook
+
+    # read_only: openpyxl transmite las filas sin cargar toda la hoja
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        for row in sheet.iter_rows(values_only=True):
+            yield [_cell_to_text(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_document_rows(path: str, sheet_name: str = None) -> Iterator[List[str]]:
+    """
+    Itera las filas de un CSV/TXT/XLSX sin cargar el archivo completo.
+
+    Args:
+        path: Ruta del archivo
+        sheet_name: Hoja a leer en XLSX (default: la primera)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Formato no soportado: {extension}. Usa {', '.join(SUPPORTED_EXTENSIONS)}")
+    if extension in ('.xlsx', '.xlsm'):
+        return _iter_xlsx_rows(path, sheet_name)
+    return _iter_csv_rows(path)
+
+
+class DocumentIndex:
+    """
+    Índice en memoria de un documento A.
+
+    Todas las celdas normalizadas se concatenan en un solo texto separado por
+    saltos de línea; buscar un nombre es un str.find() sobre ese texto y la
+    posición se traduce a (fila, columna) con búsqueda binaria.
+
+    Los RFC se buscan aparte en un dict RFC → celdas (hash join), que se
+    arma en una pasada la primera vez que se busca un RFC.
+    """
+
+    def __init__(self, source: str = None, revision: str = None):
+        self.source = source
+        self.revision = revision
+        self.header: List[str] = []
+        self.rows: List[List[str]] = []
+        self._blob = ''
+        self._cell_starts = array('Q')
+        self._cell_rows = array('I')
+        self._cell_cols = array('H')
+        self._rfc_cells: Optional[Dict[str, List]] = None
+
+    @classmethod
+    def from_rows(cls, rows, has_header: bool = True, source: str = None,
+                  revision: str = None) -> "DocumentIndex":
+        """Construye el índice consumiendo un iterable de filas."""
+        index = cls(source=source, revision=revision)
+        parts = []
+        offset = 0
+        for row_number, row in enumerate(rows):
+            if has_header and row_number == 0:
+                index.header = list(row)
+                continue
+            row_index = len(index.rows)
+            index.rows.append(row)
+            for col, cell in enumerate(row):
+                normalized = normalize_text(cell)
+                if not normalized:
+                    continue
+                index._cell_starts.append(offset)
+                index._cell_rows.append(row_index)
+                index._cell_cols.append(col)
+                parts.append(normalized)
+                offset += len(normalized) + 1
+        index._blob = '\n'.join(parts)
+        return index
+
+    @classmethod
+    def from_file(cls, path: str, sheet_name: str = None, has_header: bool = True) -> "DocumentIndex":
+        """Lee e indexa un archivo CSV/XLSX."""
+        return cls.from_rows(iter_document_rows(path, sheet_name), has_header=has_header,
+                             source=os.path.basename(path), revision=file_revision(path))
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    def row_number(self, row_index: int) -> int:
+        """Número de fila como se ve en la hoja (1 = primera fila del archivo)."""
+        return row_index + (2 if self.header else 1)
+
+    def find(self, name: str, limit: int = 50) -> List[Dict]:
+        """
+        Busca un nombre como subcadena de alguna celda.
+
+        Returns:
+            Lista de coincidencias {row, column, value}; vacía si no aparece
+        """
+        term = normalize_text(name)
+        if not term:
+            return []
+
+        matches = []
+        seen_cells = set()
+        position = self._blob.find(term)
+        while position != -1 and len(matches) < limit:
+            cell = bisect_right(self._cell_starts, position) - 1
+            if cell not in seen_cells:
+                seen_cells.add(cell)
+                matches.append(self._match(cell))
+            position = self._blob.find(term, position + 1)
+        return matches
+
+    def _rfc_index(self) -> Dict[str, List]:
+        if self._rfc_cells is None:
+            cells = {}
+            for row_index, row in enumerate(self.rows):
+                for col, value in enumerate(row):
+                    rfc = normalize_rfc(value) if 12 <= len(value) <= 20 else ''
+                    if rfc:
+                        cells.setdefault(rfc, []).append((row_index, col))
+            self._rfc_cells = cells
+        return self._rfc_cells
+
+    @property
+    def rfc_count(self) -> int:
+        """RFC distintos en el documento."""
+        return len(self._rfc_index())
+
+    def find_rfc(self, rfc: str, limit: int = 50) -> List[Dict]:
+        """
+        Busca un RFC como valor exacto de una celda (sin importar guiones,
+        espacios ni mayúsculas).
+
+        Returns:
+            Lista de coincidencias {row, column, value}; vacía si no aparece
+        """
+        key = normalize_rfc(rfc)
+        if not key:
+            return []
+        return [self._cell_match(row_index, col)
+                for row_index, col in self._rfc_index().get(key, [])[:limit]]
+
+    def _match(self, cell: int) -> Dict:
+        return self._cell_match(self._cell_rows[cell], self._cell_cols[cell])
+
+    def _cell_match(self, row_index: int, col: int) -> Dict:
+        return {
+            'row': self.row_number(row_index),
+            'row_index': row_index,
+            'column': column_letter(col),
+            'header': self.header[col] if col < len(self.header) else None,
+            'value': self.rows[row_index][col],
+        }
+
+    def describe(self) -> Dict[str, Optional[str]]:
+        return {'source': self.source, 'revision': self.revision,
+                'rows': self.row_count, 'columns': len(self.header)}
+
+
+def column_letter(col: int) -> str:
+    """0 → 'A', 25 → 'Z', 26 → 'AA'."""
+    letters = ''
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def column_index(letters: str) -> int:
+    """'A' → 0, 'Z' → 25, 'AA' → 26."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - 64)
+    return index - 1
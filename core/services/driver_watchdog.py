@@ -0,0 +1,128 @@
+"""
+Vigilancia del navegador durante una búsqueda.
+
+Un hilo revisa cada pocos segundos que chromedriver y el proceso de Chrome
+sigan vivos, sin enviar comandos a WebDriver: el ciclo de búsqueda solo
+consulta una bandera en lugar de hacer un round trip (driver.title) antes
+de cada nombre. La verificación con WebDriver (probe) se reserva para
+cuando una búsqueda falla, para distinguir un error del nombre de un
+navegador caído o una pestaña colgada.
+
+En cada revisión también mide la memoria (RSS) del árbol de procesos del
+navegador, para reciclar Chrome en búsquedas largas.
+"""
+import threading
+import time
+
+import psutil
+
+
+class DriverWatchdog:
+    """Marca `failed` en cuanto chromedriver o Chrome terminan y mide su memoria."""
+
+    def __init__(self, driver, interval: float = 2.0, sample_every: float = 10.0):
+        """
+        Args:
+            driver: webdriver.Chrome a vigilar
+            interval: Segundos entre revisiones
+            sample_every: Segundos entre muestras de memoria guardadas en `samples`
+        """
+        self.driver = driver
+        self.interval = interval
+        self.sample_every = sample_every
+        self.failed = threading.Event()
+        self.rss_bytes = 0
+        self.peak_rss_bytes = 0
+        # [(epoch, rss_bytes)], una cada sample_every segundos
+        self.samples = []
+        self._last_sample = 0.0
+        self._stop = threading.Event()
+        self._processes = self._driver_processes(driver)
+        self._thread = threading.Thread(target=self._run, name="driver-watchdog", daemon=True)
+
+    @staticmethod
+    def _driver_processes(driver):
+        """chromedriver y sus procesos hijos directos (el navegador)."""
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        if process is None:
+            return []
+        try:
+            chromedriver = psutil.Process(process.pid)
+            return [chromedriver] + chromedriver.children()
+        except psutil.Error:
+            return []
+
+    def processes_alive(self) -> bool:
+        """Revisión barata: solo consulta el sistema operativo."""
+        for process in self._processes:
+            try:
+                if not process.is_running() or process.status() == psutil.STATUS_ZOMBIE:
+                    return False
+            except psutil.Error:
+                return False
+        return True
+
+    def measure_rss(self) -> int:
+        """
+        RSS sumada de chromedriver y todos sus descendientes (navegador,
+        renderers, GPU). Se vuelven a listar en cada medición porque Chrome
+        crea y cierra procesos. Cuenta dos veces la memoria compartida: sirve
+        para ver la tendencia, no como cifra exacta.
+        """
+        if not self._processes:
+            return 0
+        try:
+            processes = [self._processes[0]] + self._processes[0].children(recursive=True)
+        except psutil.Error:
+            return self.rss_bytes
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+
+        now = time.time()
+        self.rss_bytes = total
+        self.peak_rss_bytes = max(self.peak_rss_bytes, total)
+        if now - self._last_sample >= self.sample_every:
+            self.samples.append((now, total))
+            self._last_sample = now
+        return total
+
+    def probe(self) -> bool:
+        """
+        Revisión completa: procesos vivos y WebDriver respondiendo (detecta
+        también la pestaña colgada o caída con el proceso aún vivo).
+        """
+        if self.failed.is_set() or not self.processes_alive():
+            self.failed.set()
+            return False
+        try:
+            _ = self.driver.title
+            return True
+        except Exception:
+            self.failed.set()
+            return False
+
+    def _run(self):
+        self.measure_rss()
+        while not self._stop.wait(self.interval):
+            if not self.processes_alive():
+                print("⚠️ Watchdog: Chrome dejó de responder")
+                self.failed.set()
+                return
+            self.measure_rss()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,149 @@
+"""
+ZIP de evidencias generado al vuelo: capturas de una ejecución (o de un
+prefijo/fecha) más un manifiesto, enviado conforme se escribe.
+
+zipfile escribe sobre un destino sin seek() usando descriptores de datos
+(tamaño y CRC después de cada archivo), así que no hace falta un temporal:
+cada imagen se copia en bloques y los bytes salen al cliente enseguida.
+La memoria usada no depende del tamaño total del archivo.
+"""
+import hashlib
+import json
+import os
+import zipfile
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Bloque de lectura de cada imagen
+_COPY_CHUNK = 1024 * 1024
+
+
+class _StreamSink:
+    """Destino de zipfile que acumula lo escrito hasta que el generador lo entrega."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _file_info(arcname: str, path: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo.from_file(path, arcname)
+    # Los PNG ya están comprimidos: guardarlos tal cual es más rápido y no crece
+    info.compress_type = zipfile.ZIP_STORED
+    return info
+
+
+def _bytes_info(arcname: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def iter_zip(files: Iterable[Dict], leading: Iterable[Tuple[str, Iterable[bytes]]] = (),
+             manifest: Optional[Dict] = None) -> Iterator[bytes]:
+    """
+    Genera un ZIP por bloques.
+
+    Args:
+        files: Diccionarios con 'path' (en disco) y 'arcname' (dentro del ZIP);
+               cualquier otra clave se copia a su entrada del manifiesto
+        leading: (arcname, bloques) de archivos generados que van al inicio
+                 (ej. el CSV de resultados)
+        manifest: Datos base de manifest.json; se completa con 'files' (tamaño
+                  y sha256 calculados al copiar) y 'missing', y va al final
+
+    Yields:
+        Bytes del ZIP
+    """
+    sink = _StreamSink()
+    entries, missing = [], []
+
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for arcname, chunks in leading:
+            with archive.open(_bytes_info(arcname), 'w') as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    yield sink.drain()
+
+        for item in files:
+            path, arcname = item['path'], item['arcname']
+            extra = {k: v for k, v in item.items() if k != 'path'}
+            try:
+                info = _file_info(arcname, path)
+                src = open(path, 'rb')
+            except OSError:
+                missing.append(extra)
+                continue
+
+            digest = hashlib.sha256()
+            size = 0
+            with src, archive.open(info, 'w') as dest:
+                while True:
+                    chunk = src.read(_COPY_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    size += len(chunk)
+                    dest.write(chunk)
+                    yield sink.drain()
+            entries.append({**extra, 'size': size, 'sha256': digest.hexdigest()})
+            yield sink.drain()
+
+        if manifest is not None:
+            manifest = {**manifest, 'generated_at': datetime.now().isoformat(timespec='seconds'),
+                        'files': entries, 'missing': missing}
+            with archive.open(_bytes_info('manifest.json'), 'w') as dest:
+                dest.write(json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    # Directorio central al cerrar
+    yield sink.drain()
+
+
+def run_files(results: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Capturas de una ejecución (RunStore.iter_results), una vez cada archivo
+    aunque varios nombres apunten a la misma evidencia.
+    """
+    seen = set()
+    for result in results:
+        path = result.get('screenshot_path')
+        if not path or path in seen:
+            continue
+        seen.add(path)
+        yield {
+            'path': path,
+            'arcname': f"screenshots/{os.path.basename(path)}",
+            'name': result.get('name'),
+            'status': result.get('status'),
+        }
+
+
+def matching_files(screenshots_dir: str, prefix: str = None, date_stamp: str = None) -> List[Dict]:
+    """
+    Capturas de la carpeta que coinciden con <prefijo>_<nombre>_<AAAAMMDD>.png
+    (sin prefijo o sin fecha se acepta cualquiera).
+    """
+    if not os.path.isdir(screenshots_dir):
+        return []
+    files = []
+    for entry in sorted(os.scandir(screenshots_dir), key=lambda e: e.name):
+        if not entry.is_file() or not entry.name.lower().endswith('.png'):
+            continue
+        stem = entry.name[:-4]
+        if prefix and not stem.startswith(f"{prefix}_"):
+            continue
+        if date_stamp and not stem.endswith(f"_{date_stamp}"):
+            continue
+        files.append({'path': entry.path, 'arcname': f"screenshots/{entry.name}"})
+    return files
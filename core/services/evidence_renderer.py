@@ -0,0 +1,254 @@
+"""
+Evidencia sin navegador: dibuja con Pillow la fila encontrada en el
+documento A (encabezado, filas vecinas y la celda resaltada como en el
+Ctrl+F de Google Sheets) y la guarda con el mismo nombre de archivo que
+las capturas de Chrome: prefijo_NOMBRE_FECHA.png
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .document_index import column_index, column_letter
+
+_FONT_SIZE = 14
+_ROW_HEIGHT = 24
+_PADDING = 8
+_MAX_CELL_CHARS = 48
+_ROW_NUMBER_WIDTH = 56
+
+_BACKGROUND = (255, 255, 255)
+_GRID = (226, 226, 226)
+_HEADER_FILL = (248, 249, 250)
+_TEXT = (32, 33, 36)
+_MUTED = (95, 99, 104)
+_ROW_FILL = (254, 247, 224)
+_MATCH_FILL = (247, 203, 77)
+_MATCH_OUTLINE = (26, 115, 232)
+_BANNER_FILL = (232, 240, 254)
+
+# Fuentes por proceso (cada worker del pool las carga una sola vez)
+_fonts: Dict[bool, ImageFont.ImageFont] = {}
+
+
+def screenshot_filename(screenshots_dir: str, filename_prefix: str, name: str,
+                        date_stamp: str = None) -> str:
+    """
+    Ruta de la evidencia de un nombre: <carpeta>/<prefijo>_<nombre>_<AAAAMMDD>.png
+    Compartida por las capturas de Chrome y las imágenes dibujadas.
+    """
+    date_stamp = date_stamp or datetime.now().strftime("%Y%m%d")
+    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
+    return f"{screenshots_dir}/{filename_prefix}_{safe_name}_{date_stamp}.png"
+
+
+def _font(bold: bool = False) -> ImageFont.ImageFont:
+    font = _fonts.get(bold)
+    if font is None:
+        candidates = (("DejaVuSans-Bold.ttf", "arialbd.ttf", "Arial Bold.ttf") if bold
+                      else ("DejaVuSans.ttf", "arial.ttf", "Arial.ttf"))
+        for candidate in candidates:
+            try:
+                font = ImageFont.truetype(candidate, _FONT_SIZE)
+                break
+            except OSError:
+                continue
+        else:
+            try:
+                font = ImageFont.load_default(size=_FONT_SIZE)
+            except TypeError:
+                # Pillow < 10.1 no admite tamaño en la fuente por defecto
+                font = ImageFont.load_default()
+        _fonts[bold] = font
+    return font
+
+
+def _clip(text: str) -> str:
+    text = str(text)
+    return text if len(text) <= _MAX_CELL_CHARS else text[:_MAX_CELL_CHARS - 1] + "…"
+
+
+def _draw_banner(draw: ImageDraw.ImageDraw, width: int, lines: List[str]) -> int:
+    """Dibuja el encabezado de la evidencia y retorna su alto."""
+    height = _PADDING * 2 + _ROW_HEIGHT * len(lines)
+    draw.rectangle((0, 0, width, height), fill=_BANNER_FILL)
+    for i, line in enumerate(lines):
+        draw.text((_PADDING, _PADDING + i * _ROW_HEIGHT + 4), line,
+                  font=_font(bold=(i == 0)), fill=_TEXT if i == 0 else _MUTED)
+    return height
+
+
+def render_evidence(job: Dict) -> Tuple[str, float, int]:
+    """
+    Dibuja y guarda la evidencia de un nombre. Función de módulo para que
+    el pool de procesos pueda enviarla a sus workers.
+
+    Args:
+        job: {path, name, source, revision, timestamp, header, rows, match, match_count}
+             rows es una lista de (número de fila, celdas); match es
+             (número de fila, índice de columna) o None si no hubo coincidencia
+
+    Returns:
+        (ruta, segundos, bytes escritos)
+    """
+    started = time.perf_counter()
+    font = _font()
+
+    banner = [
+        f"Búsqueda: {_clip(job['name'])}",
+        f"Documento: {job['source']}"
+        + (f"  ·  revisión {job['revision'][:12]}" if job.get('revision') else ""),
+        f"Generado: {job['timestamp']}",
+    ]
+
+    match = job.get('match')
+    if match is None:
+        width = max(640, int(max(font.getlength(line) for line in banner)) + _PADDING * 4)
+        banner_height = _PADDING * 2 + _ROW_HEIGHT * len(banner)
+        image = Image.new("RGB", (width, banner_height + _ROW_HEIGHT * 3), _BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        _draw_banner(draw, width, banner)
+        draw.text((_PADDING, banner_height + _ROW_HEIGHT), "Sin coincidencias en el documento",
+                  font=_font(bold=True), fill=_TEXT)
+    else:
+        header = job.get('header') or []
+        rows = job['rows']
+        columns = max([len(header)] + [len(cells) for _, cells in rows])
+
+        widths = []
+        for col in range(columns):
+            texts = [column_letter(col)]
+            texts.extend(_clip(cells[col]) for _, cells in rows if col < len(cells))
+            width = max(font.getlength(t) for t in texts)
+            if col < len(header):
+                # El encabezado se dibuja en negritas, que es más ancha
+                width = max(width, _font(bold=True).getlength(_clip(header[col])))
+            widths.append(int(width) + _PADDING * 2)
+
+        match_row, match_col = match
+        banner.append(f"Coincidencia: fila {match_row}, columna {column_letter(match_col)}"
+                      + (f" (1 de {job['match_count']})" if job.get('match_count', 1) > 1 else ""))
+
+        table_width = _ROW_NUMBER_WIDTH + sum(widths)
+        width = max(table_width, int(max(font.getlength(line) for line in banner)) + _PADDING * 4)
+        banner_height = _PADDING * 2 + _ROW_HEIGHT * len(banner)
+        table_rows = 1 + (1 if header else 0) + len(rows)
+        image = Image.new("RGB", (width, banner_height + table_rows * _ROW_HEIGHT + _PADDING), _BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        _draw_banner(draw, width, banner)
+
+        def draw_row(y: int, label: str, cells, fill=None, label_fill=_HEADER_FILL, bold=False):
+            draw.rectangle((0, y, _ROW_NUMBER_WIDTH, y + _ROW_HEIGHT), fill=label_fill, outline=_GRID)
+            draw.text((_PADDING, y + 4), label, font=font, fill=_MUTED)
+            x = _ROW_NUMBER_WIDTH
+            for col, w in enumerate(widths):
+                draw.rectangle((x, y, x + w, y + _ROW_HEIGHT), fill=fill, outline=_GRID)
+                if col < len(cells):
+                    draw.text((x + _PADDING, y + 4), _clip(cells[col]),
+                              font=_font(bold) if bold else font, fill=_TEXT)
+                x += w
+
+        y = banner_height
+        draw_row(y, "", [column_letter(c) for c in range(columns)], fill=_HEADER_FILL)
+        y += _ROW_HEIGHT
+        if header:
+            draw_row(y, "1", header, bold=True)
+            y += _ROW_HEIGHT
+
+        for row_number, cells in rows:
+            is_match = row_number == match_row
+            draw_row(y, str(row_number), cells, fill=_ROW_FILL if is_match else None)
+            if is_match:
+                x = _ROW_NUMBER_WIDTH + sum(widths[:match_col])
+                draw.rectangle((x, y, x + widths[match_col], y + _ROW_HEIGHT),
+                               fill=_MATCH_FILL, outline=_MATCH_OUTLINE, width=2)
+                if match_col < len(cells):
+                    draw.text((x + _PADDING, y + 4), _clip(cells[match_col]), font=font, fill=_TEXT)
+            y += _ROW_HEIGHT
+
+    # compress_level=1: PNG sin pérdida, varias veces más rápido que el default (6)
+    image.save(job['path'], format="PNG", compress_level=1)
+    return job['path'], time.perf_counter() - started, os.path.getsize(job['path'])
+
+
+class EvidenceRenderer:
+    """
+    Genera las evidencias de una ejecución en modo archivo.
+
+    Los lotes pequeños se dibujan en el mismo proceso; los grandes se
+    reparten en un pool de procesos (el dibujo y la compresión PNG usan
+    CPU y el GIL impide aprovechar varios núcleos con hilos).
+    """
+
+    def __init__(self, screenshots_dir: str = "screenshots", context_rows: int = 2,
+                 max_workers: int = None, inline_threshold: int = 32):
+        """
+        Args:
+            screenshots_dir: Carpeta donde se guardan las evidencias
+            context_rows: Filas vecinas que se muestran arriba y abajo de la coincidencia
+            max_workers: Procesos del pool (default: núcleos disponibles)
+            inline_threshold: Hasta cuántas imágenes se dibujan sin pool
+        """
+        self.screenshots_dir = screenshots_dir
+        self.context_rows = context_rows
+        self.max_workers = max_workers
+        self.inline_threshold = inline_threshold
+        os.makedirs(screenshots_dir, exist_ok=True)
+
+    def build_job(self, document, name: str, result: Dict, filename_prefix: str,
+                  date_stamp: str = None) -> Dict:
+        """
+        Arma el trabajo de dibujo de un nombre a partir de su resultado de
+        DocumentIndex.find (se usa la primera coincidencia).
+        """
+        job = {
+            'path': screenshot_filename(self.screenshots_dir, filename_prefix, name, date_stamp),
+            'name': name,
+            'source': document.source or '',
+            'revision': document.revision,
+            'timestamp': result.get('timestamp') or datetime.now().isoformat(timespec='seconds'),
+            'match': None,
+        }
+        matches = result.get('matches') or []
+        if matches:
+            first = matches[0]
+            row_index = first['row_index']
+            start = max(0, row_index - self.context_rows)
+            end = min(document.row_count, row_index + self.context_rows + 1)
+            job.update({
+                'header': document.header,
+                'rows': [(document.row_number(i), document.rows[i]) for i in range(start, end)],
+                'match': (first['row'], column_index(first['column'])),
+                'match_count': result.get('match_count', len(matches)),
+            })
+        return job
+
+    def render(self, jobs: List[Dict], on_rendered=None) -> List[Optional[str]]:
+        """
+        Dibuja todos los trabajos.
+
+        Args:
+            jobs: Trabajos de build_job
+            on_rendered: Callback opcional (ruta, segundos, bytes) por imagen
+
+        Returns:
+            Rutas generadas, en el mismo orden que jobs
+        """
+        if len(jobs) <= self.inline_threshold or self.max_workers == 1:
+            outputs = map(render_evidence, jobs)
+            return [self._collect(output, on_rendered) for output in outputs]
+
+        workers = self.max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return [self._collect(output, on_rendered)
+                    for output in executor.map(render_evidence, jobs, chunksize=chunksize)]
+
+    @staticmethod
+    def _collect(output, on_rendered):
+        if on_rendered:
+            on_rendered(*output)
+        return output[0]
@@ -0,0 +1,239 @@
+"""
+Galería de capturas: listado filtrable de la carpeta de screenshots (o de
+una ejecución) y caché de miniaturas en USER_DATA_DIR/thumbnails.
+
+Cada miniatura se identifica por la ruta, fecha de modificación y tamaño
+de su captura: si la captura se reescribe, la miniatura vieja deja de
+usarse y la eviction la borra con el tiempo.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .metrics import THUMBNAILS
+
+_JPEG_QUALITY = 80
+# Al pasar el límite se borra hasta quedar en esta fracción (evita borrar en cada miniatura)
+_EVICT_TARGET = 0.8
+
+
+def make_thumbnail(job: Tuple[str, str, Tuple[int, int]]) -> Tuple[Optional[str], int]:
+    """
+    Genera una miniatura JPEG. Función de módulo para poder correr en el pool.
+
+    Returns:
+        (ruta de la miniatura o None si la captura no se pudo leer, bytes)
+    """
+    # Pillow se carga al generar la primera miniatura, no al importar la API
+    from PIL import Image
+
+    source, target, size = job
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source) as image:
+            image.draft('RGB', size)
+            image.thumbnail(size, reducing_gap=2.0)
+            image.convert('RGB').save(tmp, 'JPEG', quality=_JPEG_QUALITY)
+        os.replace(tmp, target)
+        return target, os.path.getsize(target)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return None, 0
+
+
+def parse_screenshot_name(filename: str) -> Dict[str, Optional[str]]:
+    """prefijo_NOMBRE_AAAAMMDD.png → {'prefix', 'name', 'date'} (None si no sigue el formato)."""
+    stem = os.path.splitext(filename)[0]
+    prefix, _, rest = stem.partition('_')
+    name, _, date_stamp = rest.rpartition('_')
+    if not rest or not (len(date_stamp) == 8 and date_stamp.isdigit()):
+        return {'prefix': None, 'name': stem, 'date': None}
+    return {'prefix': prefix, 'name': name, 'date': date_stamp}
+
+
+def list_screenshots(screenshots_dir: str, run_results: Iterable[Dict] = None,
+                     status: str = None, prefix: str = None,
+                     date_stamp: str = None) -> List[Dict]:
+    """
+    Capturas para la galería, filtradas por estado, prefijo y fecha.
+
+    Args:
+        screenshots_dir: Carpeta de capturas
+        run_results: Resultados de una ejecución (RunStore.iter_results); si
+                     se dan, solo sus capturas y en su orden, con su estado.
+                     Sin ellos, toda la carpeta de la más nueva a la más vieja
+        status: Solo resultados con este estado (requiere run_results)
+
+    Returns:
+        [{'filename', 'path', 'prefix', 'name', 'date', 'status', 'size', 'mtime'}]
+    """
+    if run_results is not None:
+        candidates, seen = [], set()
+        for result in run_results:
+            path = result.get('screenshot_path')
+            if not path or path in seen:
+                continue
+            seen.add(path)
+            if status and result.get('status') != status:
+                continue
+            candidates.append((os.path.join(screenshots_dir, os.path.basename(path)),
+                               result.get('status'), result.get('name')))
+    elif os.path.isdir(screenshots_dir):
+        candidates = [(entry.path, None, None) for entry in os.scandir(screenshots_dir)
+                      if entry.is_file() and entry.name.lower().endswith('.png')]
+    else:
+        candidates = []
+
+    items = []
+    for path, item_status, result_name in candidates:
+        filename = os.path.basename(path)
+        parsed = parse_screenshot_name(filename)
+        if prefix and parsed['prefix'] != prefix:
+            continue
+        if date_stamp and parsed['date'] != date_stamp:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        items.append({
+            'filename': filename,
+            'path': path,
+            'prefix': parsed['prefix'],
+            'name': result_name or parsed['name'],
+            'date': parsed['date'],
+            'status': item_status,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+        })
+
+    if run_results is None:
+        items.sort(key=lambda item: item['mtime'], reverse=True)
+    return items
+
+
+class ThumbnailCache:
+    """Miniaturas en disco, generadas bajo demanda y limitadas por tamaño total."""
+
+    def __init__(self, directory=None, size: Tuple[int, int] = None, max_bytes: int = None,
+                 max_workers: int = None, inline_threshold: int = 4):
+        """
+        Args:
+            directory: Carpeta de miniaturas (default: THUMBNAIL_DIR de config.py)
+            size: (ancho, alto) máximo (default: THUMBNAIL_SIZE)
+            max_bytes: Espacio máximo de la carpeta (default: THUMBNAIL_CACHE_MAX_MB)
+            max_workers: Procesos del pool (default: THUMBNAIL_WORKERS / núcleos)
+            inline_threshold: Hasta cuántas miniaturas faltantes se generan sin pool
+        """
+        from config import THUMBNAIL_DIR, THUMBNAIL_SIZE, THUMBNAIL_CACHE_MAX_MB, THUMBNAIL_WORKERS
+        self.directory = str(directory or THUMBNAIL_DIR)
+        self.size = tuple(size or THUMBNAIL_SIZE)
+        self.max_bytes = max_bytes if max_bytes is not None else THUMBNAIL_CACHE_MAX_MB * 1024 * 1024
+        self.max_workers = max_workers if max_workers is not None else THUMBNAIL_WORKERS
+        self.inline_threshold = inline_threshold
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._total_bytes: Optional[int] = None
+
+    def thumbnail_path(self, source: str) -> Optional[str]:
+        """Ruta de la miniatura de la versión actual de la captura (None si no existe)."""
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        identity = f"{os.path.realpath(source)}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}"
+        key = hashlib.sha1(identity.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def get(self, source: str) -> Optional[str]:
+        """Miniatura de una captura, generándola si hace falta."""
+        return self.get_many([source]).get(source)
+
+    def get_many(self, sources: Iterable[str]) -> Dict[str, str]:
+        """
+        Miniaturas de varias capturas: las que faltan se generan en paralelo.
+
+        Returns:
+            {captura: miniatura} para las que se pudieron obtener
+        """
+        found, pending = {}, []
+        for source in sources:
+            target = self.thumbnail_path(source)
+            if target is None:
+                continue
+            if os.path.exists(target):
+                # Marca de uso para la eviction (las menos usadas se borran primero)
+                try:
+                    os.utime(target)
+                    found[source] = target
+                    THUMBNAILS.inc(result='hit')
+                    continue
+                except OSError:
+                    pass
+            pending.append((source, target, self.size))
+
+        if pending:
+            if len(pending) <= self.inline_threshold or self.max_workers == 1:
+                outputs = map(make_thumbnail, pending)
+            else:
+                outputs = self._pool().map(make_thumbnail, pending)
+
+            created = 0
+            for (source, _, _), (target, size) in zip(pending, outputs):
+                if target is None:
+                    THUMBNAILS.inc(result='error')
+                    continue
+                found[source] = target
+                created += size
+                THUMBNAILS.inc(result='generated')
+            self._account(created)
+
+        return found
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers or os.cpu_count() or 1)
+            return self._executor
+
+    def _account(self, added: int):
+        """Suma lo generado y, si se pasa del límite, borra las menos usadas."""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.directory)
+                                        if entry.is_file())
+            else:
+                self._total_bytes += added
+            if self._total_bytes > self.max_bytes:
+                self._total_bytes = self._evict(int(self.max_bytes * _EVICT_TARGET))
+
+    def _evict(self, target_bytes: int) -> int:
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        return total
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
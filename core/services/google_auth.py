@@ -5,20 +5,30 @@ Un solo token con los scopes necesarios.
 import os
 import shutil
 import subprocess
+import threading
 import webbrowser
 from typing import Optional
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from config import CREDENTIALS_FILE, TOKEN_FILE, USER_DATA_DIR
+from .tracing import span
 
+# drive.metadata.readonly: solo para leer la fecha de modificación del
+# documento A (caché de resultados). Los tokens creados antes de agregarlo
+# no lo tienen: su refresco falla y se pide iniciar sesión una vez más.
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/drive.metadata.readonly",
 ]
 
 # Singleton: una sola instancia de credenciales compartida
 _cached_creds: Optional[Credentials] = None
 
+# Serializa la obtención de credenciales entre hilos del servidor: evita
+# dos flujos OAuth simultáneos y escrituras concurrentes de token.json.
+_creds_lock = threading.RLock()
+
 
 def _find_chrome_executable() -> Optional[str]:
     """Busca el ejecutable de Chrome en el sistema."""
@@ -74,11 +84,24 @@ def get_credentials() -> Credentials:
     Reutiliza las credenciales en memoria si ya existen y son válidas.
     Solo abre el navegador una vez por ejecución.
     """
+    with span('auth.get_credentials') as span_args:
+        creds = _cached_creds
+        if creds and creds.valid:
+            span_args['source'] = 'memory'
+            return creds
+
+        with _creds_lock:
+            if _cached_creds and _cached_creds.valid:
+                span_args['source'] = 'memory'
+                return _cached_creds
+            span_args['source'] = 'disk'
+            return _load_credentials()
+
+
+def _load_credentials() -> Credentials:
+    """Carga, refresca u obtiene credenciales nuevas. Requiere _creds_lock."""
     global _cached_creds
 
-    if _cached_creds and _cached_creds.valid:
-        return _cached_creds
-
     creds = None
     token_path = str(TOKEN_FILE)
     credentials_path = str(CREDENTIALS_FILE)
@@ -95,7 +118,8 @@ def get_credentials() -> Credentials:
     # 2. Si el token existe pero expiró, intentar refrescar
     if creds and creds.expired and creds.refresh_token:
         try:
-            creds.refresh(Request())
+            with span('auth.refresh'):
+                creds.refresh(Request())
         except Exception as e:
             print(f"No se pudo refrescar el token ({e}), solicitando nuevo...")
             clean_tokens()
@@ -116,7 +140,8 @@ def get_credentials() -> Credentials:
         original_open = webbrowser.open
         webbrowser.open = _open_auth_url_in_chrome
         try:
-            creds = flow.run_local_server(port=0)
+            with span('auth.oauth_flow'):
+                creds = flow.run_local_server(port=0)
         finally:
             webbrowser.open = original_open
 
@@ -131,14 +156,16 @@ def get_credentials() -> Credentials:
 def clean_tokens() -> None:
     """Elimina el token para forzar re-autenticación en el siguiente uso."""
     global _cached_creds
-    _cached_creds = None
-    token_path = str(TOKEN_FILE)
-    if os.path.exists(token_path):
-        os.remove(token_path)
-        print(f"Token eliminado: {token_path}")
+    with _creds_lock:
+        _cached_creds = None
+        token_path = str(TOKEN_FILE)
+        if os.path.exists(token_path):
+            os.remove(token_path)
+            print(f"Token eliminado: {token_path}")
 
 
 def invalidate_cache() -> None:
     """Invalida las credenciales en memoria sin borrar el archivo."""
     global _cached_creds
-    _cached_creds = None
+    with _creds_lock:
+        _cached_creds = None
@@ -0,0 +1,79 @@
+"""
+Servicio para consultar metadatos de archivos en Google Drive API.
+"""
+import threading
+import time
+from typing import Dict, Any
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from .google_auth import get_credentials
+from .google_sheets_service import GoogleSheetsService
+from .metrics import SHEETS_REQUEST_SECONDS
+from .tracing import span
+
+
+class GoogleDriveService:
+    """Servicio de solo lectura de metadatos de Drive (requiere drive.metadata.readonly)."""
+
+    def __init__(self, api_endpoint: str = None, credentials=None):
+        """
+        Args:
+            api_endpoint: URL base alternativa de la API (ej. un servidor local
+                          de pruebas). Por defecto la de Google
+            credentials: Credenciales a usar en lugar de get_credentials()
+        """
+        self.api_endpoint = api_endpoint
+        self.credentials = credentials
+        # Un cliente por hilo, igual que GoogleSheetsService (httplib2 no es thread-safe)
+        self._local = threading.local()
+
+    def _get_service(self):
+        """Obtiene el servicio de Drive del hilo actual, autenticando solo cuando se necesita."""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            creds = self.credentials or get_credentials()
+            client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+            service = build("drive", "v3", credentials=creds, client_options=client_options)
+            self._local.service = service
+        return service
+
+    def get_file_metadata(self, file_id: str, fields: str = "id,name,modifiedTime,version") -> Dict[str, Any]:
+        """
+        Obtiene metadatos de un archivo de Drive (Sheets, Docs, etc.).
+
+        Args:
+            file_id: ID del archivo o URL completa de Google Sheets/Drive
+            fields: Campos a pedir
+
+        Returns:
+            Diccionario con los campos pedidos
+        """
+        file_id = GoogleSheetsService.extract_spreadsheet_id(file_id)
+
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            with span('drive.metadata'):
+                result = self._get_service().files().get(
+                    fileId=file_id, fields=fields, supportsAllDrives=True).execute()
+            outcome = 'success'
+            return result
+
+        except HttpError as err:
+            print(f"Error al obtener metadatos de Drive: {err}")
+            raise
+
+        finally:
+            SHEETS_REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                           operation='drive_metadata', outcome=outcome)
+
+    def get_revision(self, file_id: str) -> str:
+        """
+        Revisión actual del archivo: su modifiedTime y, si Drive la reporta,
+        su versión (cambia con cada edición, aun dentro del mismo segundo).
+        """
+        metadata = self.get_file_metadata(file_id, fields="modifiedTime,version")
+        revision = metadata['modifiedTime']
+        if metadata.get('version'):
+            revision += f"#v{metadata['version']}"
+        return revision
@@ -2,24 +2,66 @@
 Servicio para interactuar con Google Sheets API.
 """
 import re
-from typing import List, Dict, Any
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from .google_auth import get_credentials
+from .metrics import SHEETS_REQUEST_SECONDS
+from .rate_limiter import ApiThrottle, sheets_throttle
+from .tracing import span
+
+# Rango A1: 'Hoja'!A2:C10, Hoja!A:A, A1:B5, Hoja!2:100 (columnas de hasta 3 letras)
+_A1_RANGE = re.compile(
+    r"^(?:(?P<sheet>'(?:[^']|'')+'|[^!']+)!)?"
+    r"(?P<col1>[A-Za-z]{0,3})(?P<row1>\d*)(?::(?P<col2>[A-Za-z]{0,3})(?P<row2>\d*))?$"
+)
 
 
 class GoogleSheetsService:
     """Servicio para leer y escribir en Google Sheets."""
 
-    def __init__(self):
-        self.service = None
+    def __init__(self, api_endpoint: str = None, credentials=None, throttle: ApiThrottle = None):
+        """
+        Args:
+            api_endpoint: URL base alternativa de la API (ej. un servidor local
+                          de pruebas). Por defecto la de Google
+            credentials: Credenciales a usar en lugar de get_credentials()
+            throttle: Cuota y reintentos (default: el compartido por el proceso)
+        """
+        self.api_endpoint = api_endpoint
+        self.credentials = credentials
+        self.throttle = throttle or sheets_throttle()
+        # httplib2 (transporte de googleapiclient) no es thread-safe:
+        # cada hilo del servidor construye su propio cliente de Sheets.
+        self._local = threading.local()
 
     def _get_service(self):
-        """Obtiene el servicio de Sheets, autenticando solo cuando se necesita."""
-        if self.service is None:
-            creds = get_credentials()
-            self.service = build("sheets", "v4", credentials=creds)
-        return self.service
+        """Obtiene el servicio de Sheets del hilo actual, autenticando solo cuando se necesita."""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            creds = self.credentials or get_credentials()
+            client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+            service = build("sheets", "v4", credentials=creds, client_options=client_options)
+            self._local.service = service
+        return service
+
+    def _execute(self, api_request, operation: str):
+        """
+        Ejecuta una petición del cliente de Google registrando su duración
+        (incluye la espera por cuota y los reintentos).
+        """
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            with span(f'sheets.{operation}'):
+                result = self.throttle.call(api_request.execute, operation)
+            outcome = 'success'
+            return result
+        finally:
+            SHEETS_REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                           operation=operation, outcome=outcome)
 
     @staticmethod
     def extract_spreadsheet_id(url_or_id: str) -> str:
@@ -56,10 +98,10 @@ class GoogleSheetsService:
         try:
             service = self._get_service()
             sheet = service.spreadsheets()
-            result = sheet.values().get(
+            result = self._execute(sheet.values().get(
                 spreadsheetId=spreadsheet_id,
                 range=range_name
-            ).execute()
+            ), 'read_range')
 
             values = result.get('values', [])
             return values
@@ -68,6 +110,131 @@ class GoogleSheetsService:
             print(f"Error al leer Google Sheets: {err}")
             raise
 
+    def iter_range(self, spreadsheet_id: str, range_name: str, offset: int = 0,
+                   limit: Optional[int] = None, chunk_rows: int = None) -> Iterator[List[str]]:
+        """
+        Itera las filas de un rango leyéndolo por bloques, para no tener
+        todo el rango en memoria.
+
+        Las filas vacías intermedias se entregan como [] para que cada
+        fila conserve su posición; las vacías del final se omiten, igual
+        que en read_range.
+
+        Args:
+            spreadsheet_id: ID del spreadsheet o URL completa de Google Sheets
+            range_name: Rango a leer (ej: 'Sheet1!A2:C')
+            offset: Filas del rango a saltar
+            limit: Máximo de filas a entregar (None = hasta el final)
+            chunk_rows: Filas por petición (default: SHEETS_READ_CHUNK_ROWS)
+        """
+        spreadsheet_id = self.extract_spreadsheet_id(spreadsheet_id)
+        bounds = self.range_bounds(spreadsheet_id, range_name)
+        return self._iter_bounds(spreadsheet_id, range_name, bounds, offset, limit, chunk_rows)
+
+    def read_page(self, spreadsheet_id: str, range_name: str, offset: int = 0,
+                  limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Lee una página de un rango.
+
+        Returns:
+            {'values', 'next_offset'}; next_offset es None en la última página.
+            Una página puede traer menos de limit filas si termina en filas vacías
+        """
+        spreadsheet_id = self.extract_spreadsheet_id(spreadsheet_id)
+        bounds = self.range_bounds(spreadsheet_id, range_name)
+        values = list(self._iter_bounds(spreadsheet_id, range_name, bounds, offset, limit))
+
+        next_offset = None
+        if limit is not None:
+            if bounds is not None:
+                total_rows = bounds[4] - bounds[3] + 1
+                if offset + limit < total_rows:
+                    next_offset = offset + limit
+            elif len(values) == limit:
+                next_offset = offset + limit
+        return {'values': values, 'next_offset': next_offset}
+
+    def _iter_bounds(self, spreadsheet_id: str, range_name: str, bounds, offset: int,
+                     limit: Optional[int], chunk_rows: int = None) -> Iterator[List[str]]:
+        """Cuerpo de iter_range con los límites del rango ya resueltos."""
+        if chunk_rows is None:
+            from config import SHEETS_READ_CHUNK_ROWS
+            chunk_rows = SHEETS_READ_CHUNK_ROWS
+
+        if bounds is None:
+            # Rango con nombre u otra notación: una sola lectura
+            values = self.read_range(spreadsheet_id, range_name)
+            end = None if limit is None else offset + limit
+            yield from values[offset:end]
+            return
+
+        sheet, col1, col2, first_row, last_row = bounds
+        start = first_row + offset
+        if limit is not None:
+            last_row = min(last_row, start + limit - 1)
+
+        pending_blank = 0
+        while start <= last_row:
+            end = min(start + chunk_rows - 1, last_row)
+            chunk = self.read_range(spreadsheet_id, f"{sheet}!{col1}{start}:{col2}{end}")
+            if chunk:
+                # Las vacías previas quedaron entre filas con datos: se entregan
+                for _ in range(pending_blank):
+                    yield []
+                pending_blank = 0
+                yield from chunk
+            # La API omite las filas vacías al final de cada bloque
+            pending_blank += (end - start + 1) - len(chunk)
+            start = end + 1
+
+    def range_bounds(self, spreadsheet_id: str, range_name: str):
+        """
+        Límites de un rango A1.
+
+        Returns:
+            (hoja, columna_inicio, columna_fin, fila_inicio, fila_fin), con la
+            fila final tomada de gridProperties.rowCount si el rango es abierto
+            (ej: 'Hoja!A2:A'); None si el rango no es A1 (ej. un rango con nombre)
+        """
+        match = _A1_RANGE.match(range_name.strip())
+        if not match:
+            return None
+        sheet = match.group('sheet')
+        col1, col2 = match.group('col1').upper(), (match.group('col2') or '').upper()
+        row1, row2 = match.group('row1'), match.group('row2')
+        if match.group('col2') is None and not row2:
+            # Una sola celda ('A5') o una columna sin ':' ('A')
+            col2, row2 = col1, row1
+        if not (col1 or row1):
+            return None
+
+        grid = self._sheet_grid(spreadsheet_id, sheet)
+        if grid is None:
+            return None
+        title, row_count = grid
+        first_row = int(row1) if row1 else 1
+        last_row = int(row2) if row2 else row_count
+        quoted = "'" + title.replace("'", "''") + "'"
+        return quoted, col1, col2, first_row, last_row
+
+    def _sheet_grid(self, spreadsheet_id: str, sheet: Optional[str]):
+        """(título, filas) de la hoja indicada, o de la primera si sheet es None."""
+        request_args = {'spreadsheetId': spreadsheet_id,
+                        'fields': 'sheets.properties(title,gridProperties.rowCount)'}
+        if sheet:
+            request_args['ranges'] = [sheet]
+        try:
+            result = self._execute(self._get_service().spreadsheets().get(**request_args), 'metadata')
+        except HttpError as err:
+            print(f"Error al obtener metadatos: {err}")
+            raise
+
+        sheets = result.get('sheets', [])
+        if not sheets:
+            return None
+        properties = sheets[0]['properties']
+        return properties['title'], properties.get('gridProperties', {}).get('rowCount', 0)
+
     def read_column(self, spreadsheet_id: str, sheet_name: str, column: str) -> List[str]:
         """
         Lee una columna completa de una hoja.
@@ -100,7 +267,7 @@ class GoogleSheetsService:
         try:
             service = self._get_service()
             sheet = service.spreadsheets()
-            result = sheet.get(spreadsheetId=spreadsheet_id).execute()
+            result = self._execute(sheet.get(spreadsheetId=spreadsheet_id), 'metadata')
             return result
 
         except HttpError as err:
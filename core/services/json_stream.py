@@ -0,0 +1,57 @@
+"""
+Serialización de respuestas grandes: JSON con orjson (si está instalado),
+NDJSON por lotes y compresión gzip incremental.
+"""
+import json
+import zlib
+from typing import Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: json de la biblioteca estándar como respaldo
+    orjson = None
+
+# Bytes acumulados antes de entregar un bloque al servidor: suficientes para
+# no escribir fila por fila, pocos para que el cliente reciba datos pronto
+NDJSON_BATCH_BYTES = 64 * 1024
+
+
+def dumps(obj) -> bytes:
+    """Serializa a JSON UTF-8 (orjson si está disponible)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def iter_ndjson(items: Iterable, batch_bytes: int = NDJSON_BATCH_BYTES) -> Iterator[bytes]:
+    """Un documento JSON por línea, entregados en bloques de ~batch_bytes."""
+    batch, size = [], 0
+    for item in items:
+        line = dumps(item) + b'\n'
+        batch.append(line)
+        size += len(line)
+        if size >= batch_bytes:
+            yield b''.join(batch)
+            batch, size = [], 0
+    if batch:
+        yield b''.join(batch)
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Comprime un flujo en formato gzip sin acumularlo: cada bloque se vacía
+    con Z_SYNC_FLUSH para que el cliente pueda descomprimir lo recibido.
+    """
+    # wbits=31: encabezado y CRC de gzip (16) + ventana de 32 KB (15)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush(zlib.Z_FINISH)
+
+
+def gzip_bytes(data: bytes, level: int = 6) -> bytes:
+    """Comprime un cuerpo completo en formato gzip."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
@@ -0,0 +1,431 @@
+"""
+Consulta instantánea de un nombre en el documento A (/api/lookup).
+
+El documento A se lee una vez con Sheets API y sus celdas normalizadas se
+guardan ordenadas: una consulta es una búsqueda binaria por prefijo de la
+celda completa y de cada palabra, en milisegundos y sin abrir Chrome.
+El índice se reconstruye en segundo plano cuando cambia la revisión del
+documento en Drive; mientras tanto se sigue respondiendo con el anterior.
+
+Cada índice construido se guarda en LOOKUP_INDEX_DIR y se abre con mmap:
+al reiniciar el API la primera consulta no espera a leer el documento, y
+los workers de gunicorn comparten las mismas páginas del archivo.
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .document_index import column_letter, normalize_rfc, normalize_text
+
+# Mayor que cualquier carácter de un texto normalizado ([0-9A-Z& ])
+_PREFIX_END = '~'
+
+# Filas por lectura a Sheets: el índice guarda todo el documento de todos modos
+_READ_CHUNK_ROWS = 10000
+
+# Celdas candidatas revisadas como máximo por consulta (prefijos muy comunes)
+_MAX_WORD_CANDIDATES = 20000
+
+_MATCH_SCORES = {'exact': 3, 'prefix': 2, 'word': 1}
+
+# Formato en disco: magic, offset y largo del JSON de metadatos, y secciones
+# alineadas a 8 bytes (textos UTF-8 concatenados y arrays nativos)
+_MAGIC = b'BAIDX\x00\x01\x00'
+_HEADER = len(_MAGIC) + 16
+
+
+class _Strings:
+    """Textos concatenados + offsets: strings[i] sin crear una lista de str."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+
+class _Rows:
+    """Filas como ids de textos internados (CSR: inicio de cada fila + ids)."""
+
+    def __init__(self, strings, starts, cells):
+        self._strings = strings
+        self._starts = starts
+        self._cells = cells
+
+    def __len__(self):
+        return len(self._starts) - 1
+
+    def __getitem__(self, i):
+        return [self._strings[cell] for cell in self._cells[self._starts[i]:self._starts[i + 1]]]
+
+
+def _pack_strings(values: Iterable[str]):
+    """(blob, offsets) de una lista de textos."""
+    blob, offsets = bytearray(), array('I', [0])
+    for value in values:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+class PrefixIndex:
+    """
+    Celdas normalizadas de un documento, ordenadas para buscar por prefijo.
+
+    Se construye en memoria desde las filas y se guarda con save() en un
+    archivo compacto; load() lo abre con mmap sin copiarlo: los procesos
+    que abren el mismo archivo comparten sus páginas.
+    """
+
+    def __init__(self, rows: Iterable[List[str]] = (), has_header: bool = True,
+                 revision: str = None):
+        self.revision = revision
+        self.header: List[str] = []
+        self.rows: Sequence[List[str]] = []
+        self.built_at = datetime.now().isoformat(timespec='seconds')
+        self.path: Optional[str] = None
+
+        cells = []
+        for row_number, row in enumerate(rows):
+            if has_header and row_number == 0:
+                self.header = list(row)
+                continue
+            row_index = len(self.rows)
+            self.rows.append(row)
+            for col, value in enumerate(row):
+                normalized = normalize_text(value)
+                if normalized:
+                    cells.append((normalized, row_index, col))
+        cells.sort()
+
+        self._keys: Sequence[str] = [key for key, _, _ in cells]
+        self._rows = array('I', (row for _, row, _ in cells))
+        self._cols = array('H', (col for _, _, col in cells))
+
+        # Palabras únicas ordenadas; las celdas de cada una en _word_cells[start:end]
+        postings = {}
+        for cell, key in enumerate(self._keys):
+            for word in set(key.split(' ')):
+                postings.setdefault(word, []).append(cell)
+        self._words: Sequence[str] = sorted(postings)
+        self._word_starts = array('I', [0])
+        self._word_cells = array('I')
+        for word in self._words:
+            self._word_cells.extend(postings[word])
+            self._word_starts.append(len(self._word_cells))
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    def row_number(self, row_index: int) -> int:
+        return row_index + (2 if self.header else 1)
+
+    @staticmethod
+    def _prefix_range(keys: Sequence[str], prefix: str):
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + _PREFIX_END)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Filas candidatas para la consulta, de la más a la menos parecida:
+        celda idéntica, celda que empieza con la consulta, o celda con
+        palabras que empiezan con cada palabra de la consulta. Un RFC se
+        busca sin guiones ni espacios.
+
+        Returns:
+            [{'row', 'match', 'column', 'value', 'values'}] una por fila
+        """
+        term = normalize_rfc(query) or normalize_text(query)
+        if not term:
+            return []
+
+        best = {}  # celda → tipo de coincidencia
+
+        lo, hi = self._prefix_range(self._keys, term)
+        for cell in range(lo, hi):
+            best[cell] = 'exact' if self._keys[cell] == term else 'prefix'
+
+        terms = term.split(' ')
+        anchor = max(terms, key=len)
+        lo, hi = self._prefix_range(self._words, anchor)
+        first, last = self._word_starts[lo], self._word_starts[hi]
+        for position in range(first, min(last, first + _MAX_WORD_CANDIDATES)):
+            cell = self._word_cells[position]
+            if cell in best:
+                continue
+            words = self._keys[cell].split(' ')
+            if all(any(word.startswith(t) for word in words) for t in terms):
+                best[cell] = 'word'
+
+        ranked = sorted(best.items(), key=lambda item: (-_MATCH_SCORES[item[1]],
+                                                         len(self._keys[item[0]]),
+                                                         self._rows[item[0]]))
+        results, seen_rows = [], set()
+        for cell, match in ranked:
+            row_index = self._rows[cell]
+            if row_index in seen_rows:
+                continue
+            seen_rows.add(row_index)
+            results.append(self._result(cell, match))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _result(self, cell: int, match: str) -> Dict:
+        row_index, col = self._rows[cell], self._cols[cell]
+        row = self.rows[row_index]
+        header = [self.header[i] if i < len(self.header) and self.header[i] else column_letter(i)
+                  for i in range(len(row))]
+        return {
+            'row': self.row_number(row_index),
+            'match': match,
+            'column': column_letter(col),
+            'value': row[col],
+            'values': dict(zip(header, row)),
+        }
+
+    def describe(self) -> Dict:
+        return {'revision': self.revision, 'rows': self.row_count,
+                'cells': len(self._keys), 'built_at': self.built_at,
+                'mapped': self.path is not None}
+
+    def save(self, path: str, **extra_meta):
+        """
+        Guarda el índice en un solo archivo: textos normalizados y valores
+        originales internados (cada valor distinto una vez) y arrays de ids.
+        """
+        values, value_ids = [], {}
+        row_starts, row_cells = array('I', [0]), array('I')
+        for row in self.rows:
+            for value in row:
+                value_id = value_ids.get(value)
+                if value_id is None:
+                    value_id = value_ids[value] = len(values)
+                    values.append(value)
+                row_cells.append(value_id)
+            row_starts.append(len(row_cells))
+
+        key_blob, key_offsets = _pack_strings(self._keys)
+        word_blob, word_offsets = _pack_strings(self._words)
+        value_blob, value_offsets = _pack_strings(values)
+        sections = [
+            ('key_blob', 'B', key_blob), ('key_offsets', 'I', key_offsets),
+            ('cell_rows', 'I', self._rows), ('cell_cols', 'H', self._cols),
+            ('word_blob', 'B', word_blob), ('word_offsets', 'I', word_offsets),
+            ('word_starts', 'I', self._word_starts), ('word_cells', 'I', self._word_cells),
+            ('value_blob', 'B', value_blob), ('value_offsets', 'I', value_offsets),
+            ('row_starts', 'I', row_starts), ('row_cells', 'I', row_cells),
+        ]
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        layout = {}
+        with open(tmp, 'wb') as f:
+            f.write(b'\x00' * _HEADER)
+            for name, typecode, data in sections:
+                f.write(b'\x00' * (-f.tell() % 8))
+                raw = data if isinstance(data, bytes) else data.tobytes()
+                layout[name] = [f.tell(), len(raw), typecode]
+                f.write(raw)
+            meta = json.dumps({'revision': self.revision, 'built_at': self.built_at,
+                               'header': self.header, 'sections': layout, **extra_meta},
+                              ensure_ascii=False).encode('utf-8')
+            meta_offset = f.tell()
+            f.write(meta)
+            f.seek(0)
+            f.write(_MAGIC + meta_offset.to_bytes(8, 'little') + len(meta).to_bytes(8, 'little'))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PrefixIndex":
+        """
+        Abre un índice guardado con save() con mmap (solo lectura): listo
+        en milisegundos y sin copiarlo a la memoria del proceso.
+
+        Raises:
+            ValueError: si el archivo no es un índice válido
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(_MAGIC)] != _MAGIC:
+            mapped.close()
+            raise ValueError(f"No es un índice de consulta: {path}")
+        meta_offset = int.from_bytes(mapped[len(_MAGIC):len(_MAGIC) + 8], 'little')
+        meta_len = int.from_bytes(mapped[len(_MAGIC) + 8:_HEADER], 'little')
+        meta = json.loads(mapped[meta_offset:meta_offset + meta_len].decode('utf-8'))
+
+        view = memoryview(mapped)
+        sections = {name: view[offset:offset + length].cast(typecode)
+                    for name, (offset, length, typecode) in meta['sections'].items()}
+
+        index = cls.__new__(cls)
+        index.revision = meta['revision']
+        index.built_at = meta['built_at']
+        index.header = meta['header']
+        index.path = path
+        index._mmap = mapped
+        index._keys = _Strings(sections['key_blob'], sections['key_offsets'])
+        index._rows = sections['cell_rows']
+        index._cols = sections['cell_cols']
+        index._words = _Strings(sections['word_blob'], sections['word_offsets'])
+        index._word_starts = sections['word_starts']
+        index._word_cells = sections['word_cells']
+        index.rows = _Rows(_Strings(sections['value_blob'], sections['value_offsets']),
+                           sections['row_starts'], sections['row_cells'])
+        return index
+
+
+class DocumentLookup:
+    """
+    Índice del documento A para consultas, al día con su revisión en Drive.
+
+    La primera consulta construye el índice (y espera). Después, cada
+    check_every segundos una consulta dispara en segundo plano la revisión
+    en Drive y, si cambió, la reconstrucción; las consultas no esperan.
+    """
+
+    def __init__(self, sheets_service, drive_service, document_id: str,
+                 range_name: str = None, check_every: float = None, index_dir=None):
+        """
+        Args:
+            sheets_service: GoogleSheetsService para leer el documento A
+            drive_service: GoogleDriveService para conocer su revisión
+            document_id: ID del Google Sheet del documento A
+            range_name: Rango a indexar (default: LOOKUP_RANGE de config.py)
+            check_every: Segundos entre revisiones en Drive
+                         (default: LOOKUP_REVISION_CHECK_SECONDS)
+            index_dir: Carpeta de índices guardados (default: LOOKUP_INDEX_DIR)
+        """
+        from config import LOOKUP_RANGE, LOOKUP_REVISION_CHECK_SECONDS, LOOKUP_INDEX_DIR
+        self.sheets_service = sheets_service
+        self.drive_service = drive_service
+        self.document_id = document_id
+        self.range_name = range_name or LOOKUP_RANGE
+        self.check_every = check_every if check_every is not None else LOOKUP_REVISION_CHECK_SECONDS
+
+        self.index: Optional[PrefixIndex] = None
+        self.last_error: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+
+        self.index_dir = str(index_dir or LOOKUP_INDEX_DIR)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.index = self._load_saved()
+
+    def _index_path(self, revision: Optional[str]) -> str:
+        """Un archivo por documento, rango y revisión (el de una revisión no se reescribe)."""
+        key = hashlib.sha1(f"{self.document_id}|{self.range_name}|{revision}".encode('utf-8'))
+        return os.path.join(self.index_dir, f"{self.document_id}-{key.hexdigest()[:16]}.idx")
+
+    def _saved_files(self) -> List[str]:
+        prefix = f"{self.document_id}-"
+        return [os.path.join(self.index_dir, name) for name in os.listdir(self.index_dir)
+                if name.startswith(prefix) and name.endswith('.idx')]
+
+    def _load_saved(self) -> Optional[PrefixIndex]:
+        """El índice guardado más reciente de este documento y rango (None si no hay)."""
+        for path in sorted(self._saved_files(), key=os.path.getmtime, reverse=True):
+            try:
+                index = PrefixIndex.load(path)
+            except (OSError, ValueError) as e:
+                print(f"Consulta rápida: índice guardado ilegible {path} ({e})")
+                continue
+            if path == self._index_path(index.revision):
+                print(f"Consulta rápida: índice guardado abierto ({index.row_count} filas, "
+                      f"revisión {index.revision})")
+                return index
+        return None
+
+    def _remove_old(self, keep: str):
+        """Borra los índices de revisiones anteriores (en Windows, los abiertos quedan para después)."""
+        for path in self._saved_files():
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _revision(self) -> Optional[str]:
+        try:
+            return self.drive_service.get_revision(self.document_id)
+        except Exception as e:
+            print(f"Consulta rápida: no se pudo obtener la revisión del documento A ({e})")
+            return None
+
+    def _build(self, revision: Optional[str]) -> PrefixIndex:
+        start = time.perf_counter()
+        rows = self.sheets_service.iter_range(self.document_id, self.range_name,
+                                              chunk_rows=_READ_CHUNK_ROWS)
+        built = PrefixIndex(rows, revision=revision)
+        print(f"Consulta rápida: documento A indexado ({built.row_count} filas, "
+              f"revisión {revision}) en {time.perf_counter() - start:.1f}s")
+        if revision is None:
+            # Sin revisión no se puede saber después si el archivo sigue vigente
+            return built
+
+        path = self._index_path(revision)
+        try:
+            built.save(path, document_id=self.document_id, range=self.range_name)
+            index = PrefixIndex.load(path)
+        except OSError as e:
+            print(f"Consulta rápida: no se pudo guardar el índice ({e})")
+            return built
+        self._remove_old(keep=path)
+        return index
+
+    def _refresh(self):
+        """Revisa la revisión en Drive y reconstruye si cambió (hilo en segundo plano)."""
+        try:
+            revision = self._revision()
+            if revision is not None and revision != self.index.revision:
+                with self._build_lock:
+                    self.index = self._build(revision)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Consulta rápida: no se pudo reconstruir el índice ({e})")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def current(self) -> PrefixIndex:
+        """Índice vigente; lo construye si todavía no existe."""
+        if self.index is None:
+            with self._build_lock:
+                if self.index is None:
+                    self.index = self._build(self._revision())
+                    self._checked_at = time.monotonic()
+            return self.index
+
+        with self._lock:
+            due = time.monotonic() - self._checked_at >= self.check_every
+            if due and not self._refreshing:
+                self._checked_at = time.monotonic()
+                self._refreshing = True
+                threading.Thread(target=self._refresh, name="lookup-refresh", daemon=True).start()
+        return self.index
+
+    def search(self, query: str, limit: int = 20) -> Dict:
+        """Consulta el índice; la respuesta indica la revisión usada y si se está actualizando."""
+        index = self.current()
+        start = time.perf_counter()
+        results = index.search(query, limit)
+        return {
+            'query': query,
+            'results': results,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+            'index': {**index.describe(), 'document_id': self.document_id,
+                      'refreshing': self._refreshing, 'last_error': self.last_error},
+        }
@@ -0,0 +1,295 @@
+"""
+Métricas en memoria con exposición en formato de texto de Prometheus.
+Contadores, gauges e histogramas con etiquetas, seguros entre hilos.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Buckets en segundos: desde lecturas rápidas de Sheets hasta esperas largas
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: Dict = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    escaped = (f'{k}="{_escape_label_value(v)}"' for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+class _Metric:
+    """Base: una métrica con nombre, ayuda y etiquetas."""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} requiere etiquetas {self.label_names}, recibió {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Valor que solo aumenta."""
+
+    metric_type = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}"
+                for k, v in items]
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja; opcionalmente calculado al momento de exponerse."""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Callable[[], float] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        """Calcula el valor (sin etiquetas) cada vez que se leen las métricas."""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}"
+                for k, v in items]
+
+
+class Histogram(_Metric):
+    """Distribución de duraciones en buckets acumulados."""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Mide la duración del bloque, incluso si lanza excepción."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, {'le': _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Colección de métricas que se exponen juntas en /metrics."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Tipo de contenido del formato de texto de Prometheus
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# ════════════════════════════════════════════════════════════════
+# MÉTRICAS DEL SISTEMA
+# ════════════════════════════════════════════════════════════════
+
+SHEETS_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'banco_sheets_request_seconds',
+    'Duración de las llamadas a Google Sheets/Drive API',
+    ['operation', 'outcome']))
+
+DRIVER_STARTUP_SECONDS = REGISTRY.register(Histogram(
+    'banco_driver_startup_seconds',
+    'Tiempo para resolver chromedriver y lanzar Chrome'))
+
+DRIVER_RESTARTS = REGISTRY.register(Counter(
+    'banco_driver_restarts_total',
+    'Reinicios de Chrome durante una búsqueda por resultado (restarted/failed/exhausted)',
+    ['outcome']))
+
+DRIVER_RECYCLES = REGISTRY.register(Counter(
+    'banco_driver_recycles_total',
+    'Reciclajes preventivos de Chrome por motivo (names/memory)',
+    ['reason']))
+
+TEXT_ENTRY = REGISTRY.register(Counter(
+    'banco_text_entry_total',
+    'Nombres escritos en el cuadro de búsqueda por método (cdp/send_keys/action_chains)',
+    ['method']))
+
+BROWSER_REQUESTS = REGISTRY.register(Counter(
+    'banco_browser_requests_total',
+    'Peticiones de red del Chrome automatizado: loaded o blocked (BROWSER_BLOCKED_URLS)',
+    ['outcome']))
+
+PROFILE_LEASES = REGISTRY.register(Counter(
+    'banco_profile_leases_total',
+    'Préstamos de perfiles de Chrome del pool por preparación '
+    '(ready/synced/cloned) y sesiones copiadas a la plantilla (promoted)',
+    ['setup']))
+
+PROFILE_MAINTENANCE_RUNS = REGISTRY.register(Counter(
+    'banco_profile_maintenance_runs_total',
+    'Mantenimientos de perfiles de Chrome por resultado (completed/error)',
+    ['status']))
+
+PROFILE_MAINTENANCE_FREED_BYTES = REGISTRY.register(Counter(
+    'banco_profile_maintenance_freed_bytes_total',
+    'Bytes liberados por la compactación de perfiles de Chrome'))
+
+STARTUP_STAGE_SECONDS = REGISTRY.register(Histogram(
+    'banco_startup_stage_seconds',
+    'Duración de cada etapa del arranque de una búsqueda '
+    '(list_b_read/cache_check/profile_lease/driver_resolve/chrome_launch/document_load/browser_wait/auth_wait)',
+    ['stage']))
+
+AUTH_WAIT_SECONDS = REGISTRY.register(Histogram(
+    'banco_auth_wait_seconds',
+    'Espera de autenticación restante tras cargar el documento A (la carga '
+    'se mide aparte en banco_startup_stage_seconds{stage="document_load"})'))
+
+NAME_SEARCH_SECONDS = REGISTRY.register(Histogram(
+    'banco_name_search_seconds',
+    'Duración total de la búsqueda de un nombre (incluye captura)',
+    ['status']))
+
+SCREENSHOT_SECONDS = REGISTRY.register(Histogram(
+    'banco_screenshot_seconds',
+    'Duración de cada evidencia por etapa: capture/write (Chrome) o render (Pillow)',
+    ['stage']))
+
+API_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'banco_api_request_duration_seconds',
+    'Duración de las peticiones HTTP al API',
+    ['method', 'endpoint', 'status']))
+
+NAMES_PROCESSED = REGISTRY.register(Counter(
+    'banco_names_processed_total',
+    'Nombres procesados en búsquedas',
+    ['status']))
+
+SEARCH_RUNS = REGISTRY.register(Counter(
+    'banco_search_runs_total',
+    'Búsquedas terminadas por estado final',
+    ['status']))
+
+ACTIVE_JOBS = REGISTRY.register(Gauge(
+    'banco_active_jobs',
+    'Búsquedas en ejecución'))
+
+QUEUED_JOBS = REGISTRY.register(Gauge(
+    'banco_queued_jobs',
+    'Búsquedas en espera en la cola'))
+
+THUMBNAILS = REGISTRY.register(Counter(
+    'banco_thumbnails_total',
+    'Miniaturas de la galería por resultado: hit (en caché), generated o error',
+    ['result']))
+
+API_THROTTLE_SECONDS = REGISTRY.register(Histogram(
+    'banco_api_throttle_seconds',
+    'Espera antes de enviar una petición a Google: quota (token bucket) o concurrency',
+    ['api', 'reason']))
+
+API_RETRIES = REGISTRY.register(Counter(
+    'banco_api_retries_total',
+    'Reintentos de peticiones a Google por estado HTTP o error de red',
+    ['api', 'operation', 'reason']))
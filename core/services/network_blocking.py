@@ -0,0 +1,165 @@
+"""
+Bloqueo de recursos de red en el Chrome automatizado.
+
+Google Sheets descarga en cada apertura analíticas, beacons de registro,
+avatares y scripts de complementos que la búsqueda no usa. Con
+Network.setBlockedURLs (DevTools) Chrome ni siquiera envía esas peticiones.
+
+El reporte sale del log de rendimiento de chromedriver (eventos Network.*):
+peticiones y bytes descargados, y peticiones bloqueadas por patrón. Como una
+petición bloqueada no llega a descargarse, sus bytes se estiman con el
+tamaño medio medido en modo "audit" (que no bloquea, solo mide lo que se
+bloquearía) y guardado en BROWSER_NETWORK_AUDIT_FILE.
+"""
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+from .metrics import BROWSER_REQUESTS
+
+
+def pattern_regex(pattern: str) -> re.Pattern:
+    """Patrón de setBlockedURLs ('*' como comodín, URL completa) a regex."""
+    return re.compile('.*'.join(re.escape(part) for part in pattern.split('*')))
+
+
+def enable_performance_log(options):
+    """Pide a chromedriver los eventos de red en el log 'performance'."""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+
+def apply_blocklist(driver, patterns: List[str]):
+    """Activa el bloqueo en la pestaña del driver (antes de abrir el documento)."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+class NetworkReport:
+    """Acumula el tráfico de red de una búsqueda (puede abarcar varios Chrome)."""
+
+    def __init__(self, patterns: List[str], mode: str = 'block', audit_file=None):
+        """
+        Args:
+            patterns: Lista de bloqueo (BROWSER_BLOCKED_URLS)
+            mode: "block" (se bloquean) o "audit" (solo se mide lo que se bloquearía)
+            audit_file: JSON con el tamaño medido por patrón en modo audit
+        """
+        self.patterns = list(patterns)
+        self.mode = mode
+        self.audit_file = str(audit_file) if audit_file else None
+        self._regexes = [(pattern, pattern_regex(pattern)) for pattern in self.patterns]
+        self._urls: Dict[str, str] = {}
+        self.requests = 0
+        self.bytes_loaded = 0
+        self.by_pattern = {pattern: {'requests': 0, 'bytes': 0} for pattern in self.patterns}
+
+    def _match(self, url: str) -> Optional[str]:
+        for pattern, regex in self._regexes:
+            if regex.fullmatch(url):
+                return pattern
+        return None
+
+    def collect(self, driver, closing: bool = False):
+        """
+        Procesa los eventos de red pendientes del driver (get_log los vacía).
+        Si el navegador ya se cayó no hay nada que leer.
+
+        Args:
+            closing: El driver se va a cerrar; se olvidan las peticiones en curso
+        """
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            entries = []
+
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                self._urls[params.get('requestId')] = params.get('request', {}).get('url', '')
+            elif method == 'Network.loadingFinished':
+                url = self._urls.pop(params.get('requestId'), None)
+                size = int(params.get('encodedDataLength') or 0)
+                self.requests += 1
+                self.bytes_loaded += size
+                BROWSER_REQUESTS.inc(outcome='loaded')
+                pattern = self._match(url) if url and self.mode == 'audit' else None
+                if pattern:
+                    self.by_pattern[pattern]['requests'] += 1
+                    self.by_pattern[pattern]['bytes'] += size
+            elif method == 'Network.loadingFailed':
+                url = self._urls.pop(params.get('requestId'), None)
+                if params.get('blockedReason') != 'inspector' or not url:
+                    continue
+                BROWSER_REQUESTS.inc(outcome='blocked')
+                pattern = self._match(url)
+                if pattern:
+                    self.by_pattern[pattern]['requests'] += 1
+
+        if closing:
+            self._urls.clear()
+
+    def _average_sizes(self) -> Dict[str, float]:
+        """Bytes medios por petición de cada patrón, según las auditorías guardadas."""
+        if not self.audit_file or not os.path.exists(self.audit_file):
+            return {}
+        try:
+            with open(self.audit_file, encoding='utf-8') as f:
+                audit = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {pattern: stats['bytes'] / stats['requests']
+                for pattern, stats in audit.items() if stats.get('requests')}
+
+    def save_audit(self):
+        """Suma lo medido en esta búsqueda (modo audit) al archivo de auditoría."""
+        if self.mode != 'audit' or not self.audit_file:
+            return
+        audit = {}
+        if os.path.exists(self.audit_file):
+            try:
+                with open(self.audit_file, encoding='utf-8') as f:
+                    audit = json.load(f)
+            except (OSError, ValueError):
+                audit = {}
+        for pattern, stats in self.by_pattern.items():
+            if not stats['requests']:
+                continue
+            saved = audit.setdefault(pattern, {'requests': 0, 'bytes': 0})
+            saved['requests'] += stats['requests']
+            saved['bytes'] += stats['bytes']
+        tmp = f"{self.audit_file}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(audit, f, indent=2)
+        os.replace(tmp, self.audit_file)
+
+    def as_dict(self) -> Dict:
+        """
+        Resumen para el resultado de la búsqueda. En modo audit,
+        requests_blocked/bytes_blocked son lo que se habría bloqueado;
+        en modo block, bytes_blocked es una estimación (None sin auditoría previa).
+        """
+        averages = self._average_sizes() if self.mode == 'block' else {}
+        by_pattern, bytes_blocked = {}, 0
+        for pattern, stats in self.by_pattern.items():
+            if not stats['requests']:
+                continue
+            size = stats['bytes'] if self.mode == 'audit' else averages.get(pattern)
+            if size is not None and self.mode == 'block':
+                size = int(size * stats['requests'])
+            by_pattern[pattern] = {'requests': stats['requests'], 'bytes': size}
+            if bytes_blocked is not None:
+                bytes_blocked = None if size is None else bytes_blocked + size
+        return {
+            'mode': self.mode,
+            'requests': self.requests,
+            'bytes_loaded': self.bytes_loaded,
+            'requests_blocked': sum(stats['requests'] for stats in by_pattern.values()),
+            'bytes_blocked': bytes_blocked,
+            'by_pattern': by_pattern,
+        }
@@ -0,0 +1,151 @@
+"""
+Caché persistente de resultados por (documento A + revisión, nombre normalizado).
+
+Si el documento A no cambió desde la última vez que se buscó un aliado, la
+respuesta es la misma: el resultado guardado (y su evidencia) se reutiliza
+y el nombre no se vuelve a buscar. Cada (documento, nombre) guarda solo la
+revisión más reciente contra la que se verificó.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from .document_index import normalize_text
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    document_id TEXT NOT NULL,
+    name_key    TEXT NOT NULL,
+    revision    TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    result      TEXT NOT NULL,
+    checked_at  TEXT NOT NULL,
+    PRIMARY KEY (document_id, name_key)
+)
+"""
+
+# Límite de parámetros por consulta en SQLite antiguos (SQLITE_MAX_VARIABLE_NUMBER)
+_LOOKUP_BATCH = 500
+
+# document_id de los archivos locales: "file:<sha256>" (y "#<hoja>" en XLSX).
+# invalidate(FILE_DOCUMENTS) borra los de todos los archivos
+FILE_DOCUMENTS = 'file'
+
+
+def file_document_id(revision: str, sheet_name: str = None) -> str:
+    """document_id de un archivo local: su contenido (y la hoja leída) lo identifica."""
+    document_id = f"{FILE_DOCUMENTS}:{revision}"
+    return f"{document_id}#{sheet_name}" if sheet_name else document_id
+
+
+class OutcomeCache:
+    """Resultados de búsqueda en SQLite, compartidos entre ejecuciones e hilos."""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: Archivo SQLite (default: OUTCOME_CACHE_FILE de config.py)
+        """
+        if path is None:
+            from config import OUTCOME_CACHE_FILE
+            path = OUTCOME_CACHE_FILE
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, document_id: str, revision: str, names: Iterable[str],
+                 require_evidence: bool = True) -> Dict[str, Dict]:
+        """
+        Resultados vigentes para los nombres dados.
+
+        Un resultado cuenta solo si se verificó contra la misma revisión del
+        documento y su evidencia (screenshot_path) sigue en disco.
+
+        Args:
+            require_evidence: Descartar resultados guardados sin screenshot_path
+
+        Returns:
+            {nombre: resultado} solo para los nombres con resultado vigente
+        """
+        keys = {}
+        for name in names:
+            keys.setdefault(normalize_text(name), []).append(name)
+        keys.pop('', None)
+
+        rows = []
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), _LOOKUP_BATCH):
+                batch = key_list[i:i + _LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                rows.extend(self._conn.execute(
+                    f"SELECT name_key, result, checked_at FROM outcomes "
+                    f"WHERE document_id = ? AND revision = ? AND name_key IN ({placeholders})",
+                    [document_id, revision, *batch]).fetchall())
+
+        hits = {}
+        for name_key, result_json, checked_at in rows:
+            result = json.loads(result_json)
+            evidence = result.get('screenshot_path')
+            if evidence is None and require_evidence:
+                continue
+            if evidence and not os.path.exists(evidence):
+                continue
+            for name in keys[name_key]:
+                hits[name] = {**result, 'cached': True, 'cached_at': checked_at}
+        return hits
+
+    def put(self, document_id: str, revision: str, name: str, result: Dict):
+        """Guarda (o reemplaza) el resultado de un nombre para esta revisión."""
+        self.put_many(document_id, revision, {name: result})
+
+    def put_many(self, document_id: str, revision: str, results: Dict[str, Dict]):
+        """Guarda varios resultados en una sola transacción."""
+        checked_at = datetime.now().isoformat(timespec='seconds')
+        rows = []
+        for name, result in results.items():
+            name_key = normalize_text(name)
+            if not name_key:
+                continue
+            stored = {k: v for k, v in result.items() if k not in ('cached', 'cached_at')}
+            rows.append((document_id, name_key, revision, name,
+                         json.dumps(stored, ensure_ascii=False), checked_at))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO outcomes "
+                "(document_id, name_key, revision, name, result, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def invalidate(self, document_id: Optional[str] = None) -> int:
+        """
+        Borra los resultados de un documento (o todos). Con FILE_DOCUMENTS
+        borra los de todos los archivos locales. Retorna cuántos se borraron.
+        """
+        with self._lock:
+            if document_id is None:
+                cursor = self._conn.execute("DELETE FROM outcomes")
+            elif document_id == FILE_DOCUMENTS:
+                cursor = self._conn.execute(
+                    "DELETE FROM outcomes WHERE document_id = ? OR document_id LIKE ?",
+                    (FILE_DOCUMENTS, f"{FILE_DOCUMENTS}:%"))
+            else:
+                cursor = self._conn.execute("DELETE FROM outcomes WHERE document_id = ?",
+                                            (document_id,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,173 @@
+"""
+Detección de nombres dentro de la página del documento A, sin teclado.
+
+Un script inyectado con execute_async_script toma el texto de las celdas
+una sola vez y busca un lote completo de nombres en una llamada. Responde
+por nombre cuántas celdas coinciden y dónde. En Google Sheets, que dibuja
+la cuadrícula en un canvas, el texto sale de la exportación CSV de la hoja
+abierta (con la sesión del propio navegador); en otras páginas, de los
+elementos role=gridcell.
+
+La búsqueda usa la misma semántica que DocumentIndex.find: subcadena
+dentro de una celda, ignorando mayúsculas, acentos y puntuación.
+"""
+import re
+from typing import Dict, List, Optional
+
+from .document_index import normalize_text
+
+# Argumentos: [términos normalizados, URL de exportación CSV o null, máximo
+# de coincidencias por nombre]; el último es el callback de Selenium.
+# Las celdas normalizadas quedan en window.__bancoCells para los lotes siguientes.
+DETECT_NAMES_JS = r"""
+const [terms, exportUrl, limit] = arguments;
+const done = arguments[arguments.length - 1];
+
+const normalize = s => (s || '').normalize('NFKD').replace(/[\u0300-\u036f]/g, '')
+  .toUpperCase().replace(/\./g, '').replace(/[^0-9A-Z&]+/g, ' ').trim();
+
+const columnLetter = col => {
+  let letters = '';
+  for (col += 1; col > 0; col = Math.floor((col - 1) / 26)) {
+    letters = String.fromCharCode(65 + (col - 1) % 26) + letters;
+  }
+  return letters;
+};
+
+function parseCsv(text) {
+  const rows = [];
+  let row = [], cell = '', quoted = false;
+  for (let i = 0; i < text.length; i++) {
+    const ch = text[i];
+    if (quoted) {
+      if (ch === '"' && text[i + 1] === '"') { cell += '"'; i++; }
+      else if (ch === '"') quoted = false;
+      else cell += ch;
+    } else if (ch === '"') quoted = true;
+    else if (ch === ',') { row.push(cell); cell = ''; }
+    else if (ch === '\n') { row.push(cell); rows.push(row); row = []; cell = ''; }
+    else if (ch !== '\r') cell += ch;
+  }
+  if (cell || row.length) { row.push(cell); rows.push(row); }
+  return rows;
+}
+
+function domCells() {
+  const cells = [];
+  document.querySelectorAll('[role=gridcell]').forEach(td => {
+    const text = td.textContent;
+    if (!text || td.classList.contains('row-header')) return;
+    const tr = td.closest('tr');
+    const row = Number(td.dataset.row || td.getAttribute('aria-rowindex') || (tr ? tr.rowIndex : 0));
+    const col = td.dataset.col || columnLetter(Number(td.getAttribute('aria-colindex') || td.cellIndex) - 1);
+    cells.push({row, column: col, value: text});
+  });
+  return cells;
+}
+
+async function loadCells() {
+  let cells, source;
+  if (!exportUrl) {
+    cells = domCells();
+    source = 'dom';
+  } else {
+    // Google Sheets dibuja la cuadrícula en un canvas: el texto sale de la exportación
+    const response = await fetch(exportUrl, {credentials: 'include'});
+    if (!response.ok) throw new Error('Exportación CSV: HTTP ' + response.status);
+    cells = [];
+    parseCsv(await response.text()).forEach((row, r) => row.forEach((value, c) => {
+      if (value) cells.push({row: r + 1, column: columnLetter(c), value});
+    }));
+    source = 'export';
+  }
+  const starts = [];
+  let blob = '';
+  cells.forEach(cell => { starts.push(blob.length); blob += normalize(cell.value) + '\n'; });
+  return {cells, starts, blob, source};
+}
+
+(async () => {
+  try {
+    if (!window.__bancoCells) window.__bancoCells = await loadCells();
+    const {cells, starts, blob, source} = window.__bancoCells;
+    const cellAt = position => {
+      let lo = 0, hi = starts.length - 1;
+      while (lo < hi) {
+        const mid = (lo + hi + 1) >> 1;
+        if (starts[mid] <= position) lo = mid; else hi = mid - 1;
+      }
+      return lo;
+    };
+    const results = terms.map(term => {
+      const matches = [];
+      if (!term) return {count: 0, matches};
+      const seen = new Set();
+      let count = 0;
+      for (let p = blob.indexOf(term); p !== -1; p = blob.indexOf(term, p + 1)) {
+        const index = cellAt(p);
+        if (seen.has(index)) continue;
+        seen.add(index);
+        count++;
+        if (matches.length < limit) matches.push(cells[index]);
+      }
+      return {count, matches};
+    });
+    done({source, cells: cells.length, results});
+  } catch (e) {
+    done({error: String(e && e.message || e)});
+  }
+})();
+"""
+
+_SHEETS_URL = re.compile(r'^(https://docs\.google\.com/spreadsheets/d/[a-zA-Z0-9-_]+)')
+_GID = re.compile(r'[#&?]gid=(\d+)')
+
+
+def sheets_export_url(document_url: str) -> Optional[str]:
+    """
+    URL de exportación CSV (gviz, mismo origen que la página) de la hoja
+    abierta en document_url; None si no es un Google Sheet.
+    """
+    match = _SHEETS_URL.match(document_url or '')
+    if not match:
+        return None
+    gid = _GID.search(document_url)
+    url = f"{match.group(1)}/gviz/tq?tqx=out:csv&headers=0"
+    return f"{url}&gid={gid.group(1)}" if gid else url
+
+
+class PageDetectionError(RuntimeError):
+    """El script no pudo leer las celdas del documento A."""
+
+
+def detect_names(driver, names: List[str], document_url: str, batch_size: int = 500,
+                 limit: int = 50, timeout: float = 120) -> Dict[str, Dict]:
+    """
+    Busca los nombres en la página abierta, por lotes de batch_size
+    (un execute_async_script por lote).
+
+    Returns:
+        {nombre: {'match_count', 'matches': [{row, column, value}], 'detection_source'}}
+
+    Raises:
+        PageDetectionError: si no se pudieron leer las celdas
+    """
+    export_url = sheets_export_url(document_url)
+    # La primera llamada descarga y normaliza la hoja completa
+    driver.set_script_timeout(timeout)
+    detected = {}
+    for start in range(0, len(names), batch_size):
+        batch = names[start:start + batch_size]
+        output = driver.execute_async_script(
+            DETECT_NAMES_JS, [normalize_text(name) for name in batch], export_url, limit)
+        if not output or output.get('error'):
+            raise PageDetectionError((output or {}).get('error') or 'sin respuesta del script')
+        if not output.get('cells'):
+            raise PageDetectionError('no se encontraron celdas con texto en la página')
+        for name, result in zip(batch, output['results']):
+            detected[name] = {
+                'match_count': result['count'],
+                'matches': result['matches'],
+                'detection_source': output['source'],
+            }
+    return detected
@@ -0,0 +1,363 @@
+"""
+Mantenimiento de los perfiles de Chrome.
+
+Los perfiles crecen sin límite con cachés, service workers, IndexedDB e
+historial, y Chrome tarda más en arrancar con ellos. La compactación borra
+todo eso y conserva la sesión de Google (cookies y Local State):
+
+- Plantilla (CHROME_PROFILE_TEMPLATE): se reconstruye con solo los archivos
+  de sesión y preferencias; es lo que se clona en los slots nuevos.
+- Slots del pool libres: primero suben su sesión a la plantilla si es más
+  nueva y luego se compactan en su lugar. Los slots en uso se omiten.
+- chrome-auth-profile (el Chrome de la autorización OAuth): se compacta si
+  no hay un Chrome abierto con él.
+
+El reporte (tamaños antes/después y, si se pide, el arranque en frío de
+Chrome antes/después en un slot) se guarda en PROFILE_MAINTENANCE_REPORT_FILE.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .metrics import PROFILE_MAINTENANCE_FREED_BYTES, PROFILE_MAINTENANCE_RUNS
+from .profile_pool import (CACHE_DIRS, SESSION_FILES, ProfilePool, FileLock,
+                           clean_singleton_locks)
+
+# Directorios prescindibles además de las cachés: Chrome los recrea vacíos
+PRUNE_DIRS = CACHE_DIRS | frozenset({
+    "Service Worker", "IndexedDB", "File System", "blob_storage", "Session Storage",
+    "Sessions", "GCM Store", "Feature Engagement Tracker", "Download Service",
+    "shared_proto_db", "VideoDecodeStats", "WebrtcVideoStats", "Extension State",
+    "optimization_guide_hint_cache_store", "Segmentation Platform",
+})
+
+# Archivos prescindibles dentro de un perfil (historial y predicciones)
+PRUNE_FILES = frozenset({
+    "History", "History-journal", "Visited Links", "Top Sites", "Top Sites-journal",
+    "Favicons", "Favicons-journal", "Shortcuts", "Shortcuts-journal",
+    "Network Action Predictor", "Network Action Predictor-journal",
+    "Media History", "Media History-journal", "Reporting and NEL",
+    "Reporting and NEL-journal", "heavy_ad_intervention_opt_out.db",
+    "heavy_ad_intervention_opt_out.db-journal",
+})
+
+# La plantilla mínima: sesión, preferencias y la marca de primer arranque
+TEMPLATE_FILES = SESSION_FILES + (
+    "First Run",
+    os.path.join("Default", "Preferences"),
+    os.path.join("Default", "Secure Preferences"),
+)
+
+_schedule = None
+_schedule_lock = threading.Lock()
+
+
+def directory_size(path: str) -> Dict:
+    """{'bytes', 'files'} de un directorio (0 si no existe)."""
+    size, files = 0, 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+                files += 1
+            except OSError:
+                continue
+    return {'bytes': size, 'files': files}
+
+
+def chrome_running(profile_dir: str) -> bool:
+    """
+    Si hay un Chrome abierto con el perfil. En Linux/macOS SingletonLock es un
+    enlace "host-pid"; en Windows Chrome mantiene abierto el archivo lockfile.
+    """
+    lockfile = os.path.join(profile_dir, "lockfile")
+    if os.name == 'nt' and os.path.exists(lockfile):
+        try:
+            os.remove(lockfile)
+        except PermissionError:
+            return True
+        except OSError:
+            pass
+    try:
+        target = os.readlink(os.path.join(profile_dir, "SingletonLock"))
+    except OSError:
+        return False
+    try:
+        import psutil
+        return psutil.pid_exists(int(target.rsplit('-', 1)[-1]))
+    except (ImportError, ValueError):
+        return True
+
+
+def prune_profile(profile_dir: str) -> int:
+    """Borra cachés, historial y demás (PRUNE_DIRS/PRUNE_FILES). Retorna bytes liberados."""
+    before = directory_size(profile_dir)['bytes']
+    for root, dirs, names in os.walk(profile_dir):
+        for name in [d for d in dirs if d in PRUNE_DIRS]:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        dirs[:] = [d for d in dirs if d not in PRUNE_DIRS]
+        for name in names:
+            if name in PRUNE_FILES:
+                try:
+                    os.remove(os.path.join(root, name))
+                except OSError:
+                    continue
+    clean_singleton_locks(profile_dir)
+    return before - directory_size(profile_dir)['bytes']
+
+
+def slim_template(template_dir: str) -> Dict:
+    """
+    Reemplaza la plantilla por una copia con solo TEMPLATE_FILES. Si no se
+    puede reemplazar (archivos abiertos en Windows) se compacta en su lugar.
+
+    Returns:
+        {'method': 'rebuilt' o 'pruned'}
+    """
+    slim = f"{template_dir}.slim"
+    old = f"{template_dir}.old"
+    if not os.path.isdir(template_dir) and os.path.isdir(old):
+        # Un reemplazo anterior se interrumpió: .old es la única copia de la sesión
+        os.replace(old, template_dir)
+    shutil.rmtree(slim, ignore_errors=True)
+    shutil.rmtree(old, ignore_errors=True)
+    for name in TEMPLATE_FILES:
+        source = os.path.join(template_dir, name)
+        if os.path.isfile(source):
+            target = os.path.join(slim, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
+    os.makedirs(slim, exist_ok=True)
+    try:
+        os.replace(template_dir, old)
+    except OSError:
+        shutil.rmtree(slim, ignore_errors=True)
+        prune_profile(template_dir)
+        return {'method': 'pruned'}
+    try:
+        os.replace(slim, template_dir)
+    except OSError:
+        os.replace(old, template_dir)
+        shutil.rmtree(slim, ignore_errors=True)
+        prune_profile(template_dir)
+        return {'method': 'pruned'}
+    shutil.rmtree(old, ignore_errors=True)
+    return {'method': 'rebuilt'}
+
+
+def measure_cold_start(profile_dir: str) -> Optional[float]:
+    """
+    Segundos para lanzar Chrome headless con el perfil y cargar about:blank.
+    None si Chrome no se pudo lanzar.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from config import CHROMEDRIVER_CACHE_FILE
+    from .chromedriver_cache import resolve_chromedriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument("--profile-directory=Default")
+    options.add_argument("--no-first-run")
+    options.add_argument("--no-default-browser-check")
+    options.add_argument("--headless=new")
+    try:
+        service = Service(resolve_chromedriver(CHROMEDRIVER_CACHE_FILE)[0])
+        started = time.perf_counter()
+        driver = webdriver.Chrome(service=service, options=options)
+    except Exception as e:
+        print(f"⚠️ No se pudo medir el arranque de Chrome: {e}")
+        return None
+    try:
+        driver.get("about:blank")
+        return round(time.perf_counter() - started, 3)
+    finally:
+        driver.quit()
+
+
+def _profile_entry(name: str, path: str) -> Dict:
+    size = directory_size(path)
+    return {'name': name, 'path': path, 'status': 'compacted',
+            'bytes_before': size['bytes'], 'files_before': size['files']}
+
+
+def _finish_entry(entry: Dict):
+    size = directory_size(entry['path'])
+    entry.update(bytes_after=size['bytes'], files_after=size['files'],
+                 bytes_freed=max(0, entry['bytes_before'] - size['bytes']))
+
+
+def _skip(name: str, path: str, reason: str) -> Dict:
+    return {'name': name, 'path': path, 'status': 'skipped', 'reason': reason}
+
+
+def run_maintenance(measure_startup: bool = False, pool: ProfilePool = None) -> Dict:
+    """
+    Compacta la plantilla, los slots libres y chrome-auth-profile.
+
+    Args:
+        measure_startup: Medir el arranque en frío de Chrome antes y después
+                         en el primer slot libre (abre Chrome headless dos veces)
+        pool: Pool de perfiles. Por defecto el de config.py
+
+    Returns:
+        Reporte {status, started_at, seconds, bytes_freed, profiles, startup};
+        status "busy" si otro mantenimiento está en curso
+    """
+    from config import (CHROME_PROFILE_TEMPLATE, CHROME_PROFILE_POOL_DIR, CHROME_PROFILE_POOL_SIZE,
+                        CHROME_PROFILE_LEASE_TIMEOUT, USER_DATA_DIR)
+    pool = pool or ProfilePool(CHROME_PROFILE_TEMPLATE, CHROME_PROFILE_POOL_DIR,
+                               CHROME_PROFILE_POOL_SIZE, CHROME_PROFILE_LEASE_TIMEOUT)
+    os.makedirs(pool.pool_dir, exist_ok=True)
+    guard = FileLock(pool.lock_path("maintenance"))
+    if not guard.acquire():
+        return {'status': 'busy', 'message': 'Ya hay un mantenimiento de perfiles en curso'}
+
+    started = time.perf_counter()
+    report = {'status': 'completed', 'started_at': datetime.now().isoformat(timespec='seconds'),
+              'profiles': [], 'startup': None}
+    try:
+        profiles: List[Dict] = report['profiles']
+
+        # Slots libres: su sesión sube a la plantilla antes de compactarla
+        for slot in range(pool.size):
+            path = pool.slot_path(slot)
+            if not os.path.isdir(path):
+                continue
+            lock = FileLock(pool.lock_path(f"slot-{slot}"))
+            if not lock.acquire():
+                profiles.append(_skip(f"slot-{slot}", path, 'en uso por una búsqueda'))
+                continue
+            try:
+                if chrome_running(path):
+                    profiles.append(_skip(f"slot-{slot}", path, 'Chrome abierto con este perfil'))
+                    continue
+                pool.promote_session(slot)
+                entry = _profile_entry(f"slot-{slot}", path)
+                measure = measure_startup and report['startup'] is None
+                before = measure_cold_start(path) if measure else None
+                prune_profile(path)
+                if measure:
+                    after = measure_cold_start(path)
+                    # Lo que Chrome creó durante la medición
+                    prune_profile(path)
+                    report['startup'] = {'profile': f"slot-{slot}", 'before_s': before, 'after_s': after}
+                _finish_entry(entry)
+                profiles.append(entry)
+            finally:
+                lock.release()
+
+        template = pool.template_dir
+        if os.path.isdir(template):
+            if chrome_running(template):
+                profiles.append(_skip('template', template, 'Chrome abierto con este perfil'))
+            else:
+                entry = _profile_entry('template', template)
+                with pool.template_guard():
+                    entry.update(slim_template(template))
+                _finish_entry(entry)
+                profiles.append(entry)
+
+        auth_dir = str(USER_DATA_DIR / "chrome-auth-profile")
+        if os.path.isdir(auth_dir):
+            if chrome_running(auth_dir):
+                profiles.append(_skip('auth', auth_dir, 'Chrome abierto con este perfil'))
+            else:
+                entry = _profile_entry('auth', auth_dir)
+                prune_profile(auth_dir)
+                _finish_entry(entry)
+                profiles.append(entry)
+
+        report['bytes_freed'] = sum(p.get('bytes_freed', 0) for p in profiles)
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        PROFILE_MAINTENANCE_RUNS.inc(status='completed')
+        PROFILE_MAINTENANCE_FREED_BYTES.inc(report['bytes_freed'])
+        _save_report(report)
+        return report
+    except Exception:
+        PROFILE_MAINTENANCE_RUNS.inc(status='error')
+        raise
+    finally:
+        guard.release()
+
+
+def _save_report(report: Dict):
+    from config import PROFILE_MAINTENANCE_REPORT_FILE
+    path = str(PROFILE_MAINTENANCE_REPORT_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def last_report() -> Optional[Dict]:
+    """Reporte del último mantenimiento terminado, o None."""
+    from config import PROFILE_MAINTENANCE_REPORT_FILE
+    try:
+        with open(PROFILE_MAINTENANCE_REPORT_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def print_report(report: Dict):
+    """Resumen legible del reporte (CLI y logs del servidor)."""
+    if report.get('status') != 'completed':
+        print(report.get('message', report.get('status')))
+        return
+    mb = 1024 * 1024
+    for profile in report['profiles']:
+        if profile['status'] == 'skipped':
+            print(f"  {profile['name']:<10} omitido: {profile['reason']}")
+        else:
+            print(f"  {profile['name']:<10} {profile['bytes_before'] / mb:8.1f} MB → "
+                  f"{profile['bytes_after'] / mb:8.1f} MB ({profile['files_before']} → "
+                  f"{profile['files_after']} archivos)")
+    print(f"  Liberado: {report['bytes_freed'] / mb:.1f} MB en {report['seconds']:.1f}s")
+    startup = report.get('startup')
+    if startup:
+        print(f"  Arranque de Chrome ({startup['profile']}): "
+              f"{startup.get('before_s')}s → {startup.get('after_s')}s")
+
+
+def start_schedule(interval_hours: float = None, check_seconds: float = 600):
+    """
+    Hilo que corre el mantenimiento cada interval_hours (por defecto
+    PROFILE_MAINTENANCE_INTERVAL_HOURS; None lo desactiva). El último reporte
+    guardado marca cuándo corrió, así varios procesos no lo repiten.
+    """
+    global _schedule
+    from config import PROFILE_MAINTENANCE_INTERVAL_HOURS, PROFILE_MAINTENANCE_MEASURE_STARTUP
+    interval_hours = interval_hours or PROFILE_MAINTENANCE_INTERVAL_HOURS
+    if not interval_hours:
+        return None
+
+    def due() -> bool:
+        report = last_report()
+        if not report or 'started_at' not in report:
+            return True
+        last = datetime.fromisoformat(report['started_at'])
+        return (datetime.now() - last).total_seconds() >= interval_hours * 3600
+
+    def loop():
+        while not stop.wait(check_seconds):
+            if not due():
+                continue
+            try:
+                print("Mantenimiento programado de perfiles de Chrome...")
+                report = run_maintenance(PROFILE_MAINTENANCE_MEASURE_STARTUP)
+                print_report(report)
+            except Exception as e:
+                print(f"⚠️ Falló el mantenimiento de perfiles: {e}")
+
+    with _schedule_lock:
+        if _schedule is None:
+            stop = threading.Event()
+            thread = threading.Thread(target=loop, name="profile-maintenance", daemon=True)
+            thread.start()
+            _schedule = (thread, stop)
+        return _schedule[0]
@@ -0,0 +1,349 @@
+"""
+Pool de perfiles de Chrome para búsquedas simultáneas.
+
+El perfil plantilla (CHROME_PROFILE_TEMPLATE, el chrome-profile de siempre)
+guarda la sesión de Google. Cada búsqueda toma en préstamo un slot
+(CHROME_PROFILE_POOL_DIR/slot-N) con un candado exclusivo entre hilos y
+procesos, así dos Chrome nunca abren el mismo directorio.
+
+- Slot nuevo: se clona la plantilla sin sus cachés. En Linux cada archivo
+  se clona con reflink (FICLONE, copy-on-write en btrfs/xfs); si el sistema
+  de archivos no lo soporta, se copia. No se usan hardlinks: Chrome reescribe
+  en su lugar sus bases SQLite/LevelDB y un hardlink escribiría en la plantilla.
+- Slot existente: si la sesión de la plantilla es más nueva, se copian solo
+  los archivos de sesión (cookies y la clave que las cifra).
+- Al devolver el slot, si su sesión quedó más nueva (el usuario inició sesión
+  durante la espera de autenticación), se copia a la plantilla para que los
+  demás slots la reciban.
+"""
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from .metrics import PROFILE_LEASES
+
+# Directorios que Chrome regenera solo; no se copian a los slots
+CACHE_DIRS = frozenset({
+    "Cache", "Code Cache", "GPUCache", "DawnCache", "DawnGraphiteCache",
+    "DawnWebGPUCache", "GrShaderCache", "GraphiteDawnCache", "ShaderCache",
+    "CacheStorage", "ScriptCache", "Crashpad", "BrowserMetrics",
+    "component_crx_cache", "optimization_guide_model_store", "Safe Browsing",
+})
+
+# Archivos de bloqueo de una instancia de Chrome (no se copian)
+SINGLETON_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+# La sesión de Google: cookies (en Network/ desde Chrome 96) y Local State,
+# que guarda la clave con la que están cifradas
+SESSION_FILES = (
+    "Local State",
+    os.path.join("Default", "Network", "Cookies"),
+    os.path.join("Default", "Network", "Cookies-journal"),
+    os.path.join("Default", "Cookies"),
+    os.path.join("Default", "Cookies-journal"),
+)
+
+# En el slot: marca de la sesión de plantilla que tiene
+_STAMP_FILE = ".banco-session"
+_FICLONE = 0x40049409
+
+
+class ProfilePoolExhausted(RuntimeError):
+    """Todos los slots siguen prestados tras el tiempo de espera."""
+
+
+def clean_singleton_locks(profile_dir: str):
+    """
+    Elimina los archivos de bloqueo de un Chrome que no se cerró bien; con
+    ellos Chrome cae a un perfil temporal vacío. Solo debe llamarse con el
+    slot en préstamo (ningún otro Chrome nuestro lo usa).
+    """
+    for name in SINGLETON_FILES:
+        try:
+            os.remove(os.path.join(profile_dir, name))
+        except OSError:
+            pass
+
+
+def _clone_file(source: str, target: str) -> str:
+    """Copia un archivo con reflink si se puede. Retorna 'reflink' o 'copy'."""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        try:
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copystat(source, target)
+            return 'reflink'
+        except OSError:
+            pass
+    shutil.copy2(source, target)
+    return 'copy'
+
+
+def clone_profile(source: str, target: str, skip_dirs=CACHE_DIRS) -> Dict:
+    """
+    Copia el perfil source en target (que no debe existir) sin cachés ni
+    archivos de bloqueo.
+
+    Returns:
+        {'files', 'bytes', 'method'} ('reflink' si todos los archivos se clonaron)
+    """
+    files, size, methods = 0, 0, set()
+    for root, dirs, names in os.walk(source):
+        dirs[:] = [d for d in dirs if d not in skip_dirs]
+        destination = os.path.join(target, os.path.relpath(root, source))
+        os.makedirs(destination, exist_ok=True)
+        for name in names:
+            if name in SINGLETON_FILES:
+                continue
+            path = os.path.join(root, name)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            try:
+                methods.add(_clone_file(path, os.path.join(destination, name)))
+                size += os.path.getsize(path)
+                files += 1
+            except OSError:
+                # Archivo que Chrome borró o tiene abierto en exclusiva: se regenera
+                continue
+    method = 'reflink' if methods == {'reflink'} else 'copy'
+    return {'files': files, 'bytes': size, 'method': method}
+
+
+def session_stamp(profile_dir: str) -> int:
+    """Fecha (ns) del archivo de sesión más reciente; 0 si no hay sesión."""
+    stamp = 0
+    for name in SESSION_FILES:
+        try:
+            stamp = max(stamp, os.stat(os.path.join(profile_dir, name)).st_mtime_ns)
+        except OSError:
+            continue
+    return stamp
+
+
+def copy_session(source: str, target: str) -> int:
+    """Copia los archivos de sesión de un perfil a otro. Retorna cuántos copió."""
+    copied = 0
+    for name in SESSION_FILES:
+        path = os.path.join(source, name)
+        if not os.path.isfile(path):
+            continue
+        destination = os.path.join(target, name)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        tmp = f"{destination}.banco-tmp"
+        shutil.copy2(path, tmp)
+        os.replace(tmp, destination)
+        copied += 1
+    return copied
+
+
+class FileLock:
+    """Candado exclusivo no bloqueante sobre un archivo (entre procesos)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        handle = open(self.path, 'a+b')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+
+    def wait(self, timeout: float, interval: float = 0.1) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.acquire():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+
+class ProfileLease:
+    """Un slot del pool en préstamo. Devolverlo con release() tras cerrar Chrome."""
+
+    def __init__(self, pool: 'ProfilePool', slot: int, lock: FileLock, setup: Dict):
+        self.pool = pool
+        self.slot = slot
+        self.path = pool.slot_path(slot)
+        self.setup = setup
+        self._lock = lock
+
+    def release(self):
+        """Sube la sesión del slot a la plantilla si es más nueva y libera el candado."""
+        if self._lock is None:
+            return
+        try:
+            self.pool.promote_session(self.slot)
+        finally:
+            self._lock.release()
+            self._lock = None
+
+    def as_dict(self) -> Dict:
+        return {'slot': self.slot, 'path': self.path, **self.setup}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ProfilePool:
+    """Slots slot-0 … slot-(size-1) clonados del perfil plantilla."""
+
+    def __init__(self, template_dir, pool_dir, size: int = 2, lease_timeout: float = 600):
+        """
+        Args:
+            template_dir: Perfil con la sesión de Google (CHROME_PROFILE_TEMPLATE)
+            pool_dir: Directorio de los slots (CHROME_PROFILE_POOL_DIR)
+            size: Cantidad de slots (máximo de Chrome simultáneos)
+            lease_timeout: Segundos de espera por un slot libre
+        """
+        self.template_dir = str(template_dir)
+        self.pool_dir = str(pool_dir)
+        self.size = max(1, int(size))
+        self.lease_timeout = lease_timeout
+        # Serializa las copias hacia la plantilla dentro del proceso
+        self._template_lock = threading.Lock()
+
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.pool_dir, f"slot-{slot}")
+
+    def lock_path(self, name: str) -> str:
+        return os.path.join(self.pool_dir, f"{name}.lock")
+
+    def lease(self) -> ProfileLease:
+        """
+        Toma el primer slot libre (espera hasta lease_timeout si no hay).
+
+        Raises:
+            ProfilePoolExhausted: si ningún slot se liberó a tiempo
+        """
+        os.makedirs(self.pool_dir, exist_ok=True)
+        os.makedirs(self.template_dir, exist_ok=True)
+        deadline = time.monotonic() + self.lease_timeout
+        while True:
+            for slot in range(self.size):
+                lock = FileLock(self.lock_path(f"slot-{slot}"))
+                if lock.acquire():
+                    try:
+                        setup = self._prepare(slot)
+                    except BaseException:
+                        lock.release()
+                        raise
+                    PROFILE_LEASES.inc(setup=setup['setup'])
+                    return ProfileLease(self, slot, lock, setup)
+            if time.monotonic() >= deadline:
+                raise ProfilePoolExhausted(
+                    f"Los {self.size} perfiles de Chrome siguen en uso tras {self.lease_timeout}s")
+            time.sleep(0.5)
+
+    def _prepare(self, slot: int) -> Dict:
+        """Deja el slot listo: clonado, con la sesión al día y sin bloqueos viejos."""
+        started = time.perf_counter()
+        path = self.slot_path(slot)
+        template_stamp = session_stamp(self.template_dir)
+        setup = {'setup': 'ready'}
+
+        if not os.path.isfile(os.path.join(path, _STAMP_FILE)):
+            # Slot nuevo o clonado a medias: se clona desde cero
+            shutil.rmtree(path, ignore_errors=True)
+            with self.template_guard():
+                stats = clone_profile(self.template_dir, path)
+            setup = {'setup': 'cloned', 'method': stats['method'],
+                     'files': stats['files'], 'bytes': stats['bytes']}
+            self._write_stamp(path, template_stamp)
+        elif template_stamp > self._read_stamp(path):
+            with self.template_guard():
+                copy_session(self.template_dir, path)
+            setup = {'setup': 'synced'}
+            self._write_stamp(path, template_stamp)
+
+        clean_singleton_locks(path)
+        setup['seconds'] = round(time.perf_counter() - started, 3)
+        return setup
+
+    def promote_session(self, slot: int):
+        """
+        Copia la sesión del slot a la plantilla si es más nueva que la de esta.
+        Llamar con el slot en préstamo y su Chrome cerrado.
+        """
+        path = self.slot_path(slot)
+        slot_stamp = session_stamp(path)
+        if slot_stamp <= max(self._read_stamp(path), session_stamp(self.template_dir)):
+            return
+        try:
+            with self.template_guard():
+                copy_session(path, self.template_dir)
+            self._write_stamp(path, session_stamp(self.template_dir))
+            PROFILE_LEASES.inc(setup='promoted')
+        except (OSError, ProfilePoolExhausted) as e:
+            print(f"⚠️ No se pudo copiar la sesión del perfil {slot} a la plantilla: {e}")
+
+    @contextmanager
+    def template_guard(self):
+        """Candado de la plantilla: uno para este proceso y otro entre procesos."""
+        with self._template_lock:
+            lock = FileLock(self.lock_path("template"))
+            if not lock.wait(self.lease_timeout):
+                raise ProfilePoolExhausted("La plantilla de perfil sigue bloqueada")
+            try:
+                yield
+            finally:
+                lock.release()
+
+    @staticmethod
+    def _read_stamp(path: str) -> int:
+        try:
+            with open(os.path.join(path, _STAMP_FILE), encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def _write_stamp(path: str, stamp: int):
+        with open(os.path.join(path, _STAMP_FILE), 'w', encoding='utf-8') as f:
+            f.write(str(stamp))
+
+    def describe(self) -> List[Dict]:
+        """Estado de cada slot: si existe y si está en uso (por cualquier proceso)."""
+        slots = []
+        for slot in range(self.size):
+            lock = FileLock(self.lock_path(f"slot-{slot}"))
+            in_use = not lock.acquire() if os.path.isdir(self.pool_dir) else False
+            lock.release()
+            slots.append({'slot': slot, 'path': self.slot_path(slot),
+                          'exists': os.path.isdir(self.slot_path(slot)),
+                          'in_use': in_use})
+        return slots
@@ -0,0 +1,160 @@
+"""
+Límite de peticiones y reintentos para las APIs de Google.
+
+Sheets API limita las lecturas por minuto (por usuario y por proyecto) y
+responde 429 al pasarse; también devuelve 500/502/503/504 transitorios.
+ApiThrottle hace que todas las llamadas del proceso (hilos del servidor,
+trabajos en paralelo) compartan:
+
+- un token bucket con la cuota por minuto,
+- un tope de peticiones simultáneas,
+- reintentos con backoff exponencial y jitter para los errores transitorios.
+"""
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from googleapiclient.errors import HttpError
+
+from .metrics import API_RETRIES, API_THROTTLE_SECONDS
+
+# Estados que vale la pena reintentar (cuota, errores transitorios del servidor)
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe.
+
+    Con capacidad B y reposición R por minuto, en cualquier ventana de 60 s
+    pasan como máximo B + R peticiones: R se calcula como cuota - B para
+    no pasar la cuota ni con la ráfaga inicial.
+    """
+
+    def __init__(self, per_minute: float, burst: int):
+        self.capacity = max(1, burst)
+        self.rate = max(per_minute - self.capacity, 1) / 60.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Toma un token, esperando si no hay. Retorna los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self):
+        """Vacía el bucket (tras un 429: la cuota real ya se agotó)."""
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+
+class ApiThrottle:
+    """Cuota, concurrencia y reintentos compartidos para una API."""
+
+    def __init__(self, api: str, per_minute: float, burst: int = 10, max_in_flight: int = 4,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 32.0):
+        """
+        Args:
+            api: Nombre de la API para las métricas ('sheets')
+            per_minute: Peticiones por minuto permitidas (la cuota más estricta)
+            burst: Peticiones que pueden salir de golpe
+            max_in_flight: Peticiones simultáneas como máximo
+            max_retries: Reintentos por petición antes de rendirse
+            backoff_base: Espera base del primer reintento (segundos)
+            backoff_max: Espera máxima entre reintentos (segundos)
+        """
+        self.api = api
+        self.bucket = TokenBucket(per_minute, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+
+    def call(self, func: Callable, operation: str):
+        """
+        Ejecuta func() respetando la cuota, reintentando errores transitorios.
+
+        Args:
+            func: Llamada sin argumentos (ej. api_request.execute)
+            operation: Nombre de la operación para las métricas
+
+        Returns:
+            Lo que retorne func()
+        """
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            with self._slots:
+                waited = self.bucket.acquire()
+                API_THROTTLE_SECONDS.observe(time.perf_counter() - start - waited, api=self.api,
+                                             reason='concurrency')
+                if waited:
+                    API_THROTTLE_SECONDS.observe(waited, api=self.api, reason='quota')
+                try:
+                    return func()
+                except HttpError as err:
+                    status = err.resp.status
+                    if status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                        raise
+                    if status == 429:
+                        self.bucket.drain()
+                    delay = self._backoff(attempt, self._retry_after(err))
+                    reason = str(status)
+                except (TimeoutError, ConnectionError) as err:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    reason = type(err).__name__
+
+            # La espera se hace sin ocupar un lugar de concurrencia
+            attempt += 1
+            API_RETRIES.inc(api=self.api, operation=operation, reason=reason)
+            print(f"⏳ {self.api}.{operation}: {reason}, reintento {attempt}/{self.max_retries} "
+                  f"en {delay:.1f}s")
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full jitter: aleatorio entre 0 y base·2^intento (tope backoff_max)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    @staticmethod
+    def _retry_after(err: HttpError) -> Optional[float]:
+        value = err.resp.get('retry-after') if hasattr(err.resp, 'get') else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def sheets_throttle() -> ApiThrottle:
+    """Límite compartido por todas las instancias de GoogleSheetsService del proceso."""
+    with _throttles_lock:
+        throttle = _throttles.get('sheets')
+        if throttle is None:
+            from config import (SHEETS_REQUESTS_PER_MINUTE, SHEETS_BURST, SHEETS_MAX_IN_FLIGHT,
+                                SHEETS_MAX_RETRIES, SHEETS_BACKOFF_MAX)
+            throttle = ApiThrottle('sheets', SHEETS_REQUESTS_PER_MINUTE, burst=SHEETS_BURST,
+                                   max_in_flight=SHEETS_MAX_IN_FLIGHT,
+                                   max_retries=SHEETS_MAX_RETRIES, backoff_max=SHEETS_BACKOFF_MAX)
+            _throttles['sheets'] = throttle
+        return throttle
@@ -0,0 +1,141 @@
+"""
+Exportación de resultados de una ejecución en formato de columnas:
+una fila por nombre con columnas fijas (CSV, XLSX, Parquet o Arrow).
+
+Todas las funciones consumen un iterable de resultados (RunStore.iter_results)
+y escriben por lotes, sin armar la tabla completa en memoria.
+"""
+import csv
+import io
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# (columna, tipo) en el orden de exportación
+EXPORT_COLUMNS: List[Tuple[str, str]] = [
+    ('name', 'string'),
+    ('status', 'string'),
+    ('screenshot_path', 'string'),
+    ('timestamp', 'string'),
+    ('match_count', 'int'),
+    ('match_row', 'int'),
+    ('match_column', 'string'),
+    ('match_value', 'string'),
+    ('cached', 'bool'),
+    ('error', 'string'),
+    ('browser_rss_mb', 'float'),
+    ('rfc', 'string'),
+    ('matched_by', 'string'),
+]
+
+# formato → (content type, extensión)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+_BATCH_ROWS = 5000
+
+
+def flatten_result(result: Dict) -> tuple:
+    """Un resultado anidado → tupla en el orden de EXPORT_COLUMNS (primera coincidencia)."""
+    matches = result.get('matches') or []
+    first = matches[0] if matches else {}
+    match_count = result.get('match_count')
+    if match_count is None and 'matches' in result:
+        match_count = len(matches)
+    return (
+        result.get('name'),
+        result.get('status'),
+        result.get('screenshot_path'),
+        result.get('timestamp'),
+        match_count,
+        first.get('row'),
+        first.get('column'),
+        first.get('value'),
+        bool(result.get('cached', False)),
+        result.get('error'),
+        result.get('browser_rss_mb'),
+        result.get('rfc'),
+        result.get('matched_by'),
+    )
+
+
+def _batches(results: Iterable[Dict], size: int = _BATCH_ROWS) -> Iterator[List[tuple]]:
+    batch = []
+    for result in results:
+        batch.append(flatten_result(result))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(results: Iterable[Dict]) -> Iterator[bytes]:
+    """CSV UTF-8 con BOM (Excel lo abre con acentos correctos), por lotes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column for column, _ in EXPORT_COLUMNS])
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+
+    for batch in _batches(results):
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(results: Iterable[Dict], fileobj):
+    """XLSX en modo write_only: openpyxl escribe las filas sin conservarlas."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("resultados")
+    sheet.append([column for column, _ in EXPORT_COLUMNS])
+    for batch in _batches(results):
+        for row in batch:
+            sheet.append(row)
+    workbook.save(fileobj)
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    types = {'string': pa.string(), 'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_()}
+    return pa.schema([(column, types[kind]) for column, kind in EXPORT_COLUMNS])
+
+
+def _record_batch(schema, rows: List[tuple]):
+    import pyarrow as pa
+
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema)
+
+
+def write_parquet(results: Iterable[Dict], fileobj):
+    """Parquet (pyarrow), un row group por lote."""
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema()
+    with pq.ParquetWriter(fileobj, schema, compression='zstd') as writer:
+        for batch in _batches(results):
+            writer.write_batch(_record_batch(schema, batch))
+
+
+def iter_arrow(results: Iterable[Dict]) -> Iterator[bytes]:
+    """Arrow IPC en formato stream: se puede enviar conforme se genera."""
+    import pyarrow as pa
+
+    schema = _arrow_schema()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in _batches(results):
+            writer.write_batch(_record_batch(schema, batch))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate(0)
+    yield sink.getvalue()
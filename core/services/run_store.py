@@ -0,0 +1,94 @@
+"""
+Resultados guardados por ejecución en USER_DATA_DIR/runs:
+
+    <run_id>.json    resumen (estado, totales, modo, documento...)
+    <run_id>.ndjson  un resultado por línea: {"name": ..., "status": ..., ...}
+
+Las exportaciones (CSV/XLSX/Parquet) leen el NDJSON línea por línea, sin
+volver a cargar ni serializar el diccionario completo de resultados.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+def runs_dir() -> Path:
+    from config import USER_DATA_DIR
+    return USER_DATA_DIR / "runs"
+
+
+class RunStore:
+    """Guarda y lee resultados de ejecuciones."""
+
+    def __init__(self, directory: Path = None):
+        """
+        Args:
+            directory: Carpeta de las ejecuciones (default: USER_DATA_DIR/runs)
+        """
+        self.directory = Path(directory) if directory else runs_dir()
+
+    def summary_path(self, run_id: str) -> Path:
+        return self.directory / f"{run_id}.json"
+
+    def results_path(self, run_id: str) -> Path:
+        return self.directory / f"{run_id}.ndjson"
+
+    def exists(self, run_id: str) -> bool:
+        """Si ya hay una ejecución guardada con ese run_id."""
+        return self.summary_path(run_id).is_file() or self.results_path(run_id).is_file()
+
+    def save(self, run_id: str, result: Dict) -> Path:
+        """
+        Guarda una ejecución: el resumen sin 'results' y cada resultado en su línea.
+        Se escribe a archivos temporales y se reemplaza al final, así una
+        exportación en curso nunca ve un archivo a medias.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        results = result.get('results') or {}
+
+        results_path = self.results_path(run_id)
+        tmp_results = results_path.with_suffix('.ndjson.tmp')
+        with open(tmp_results, 'w', encoding='utf-8') as f:
+            for name, data in results.items():
+                f.write(json.dumps({'name': name, **data}, ensure_ascii=False))
+                f.write('\n')
+
+        summary = {k: v for k, v in result.items() if k != 'results'}
+        summary.update(run_id=run_id, result_count=len(results),
+                       saved_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        summary_path = self.summary_path(run_id)
+        tmp_summary = summary_path.with_suffix('.json.tmp')
+        tmp_summary.write_text(json.dumps(summary, ensure_ascii=False), encoding='utf-8')
+
+        os.replace(tmp_results, results_path)
+        os.replace(tmp_summary, summary_path)
+        return results_path
+
+    def get_summary(self, run_id: str) -> Optional[Dict]:
+        """Resumen de una ejecución, o None si no existe."""
+        path = self.summary_path(run_id)
+        if not path.is_file():
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    def iter_results(self, run_id: str) -> Iterator[Dict]:
+        """Resultados de una ejecución, uno por uno, en el orden de la lista B."""
+        with open(self.results_path(run_id), encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def list_runs(self, limit: int = 100) -> List[Dict]:
+        """Resúmenes guardados, del más reciente al más antiguo."""
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        runs = []
+        for path in files[:limit]:
+            try:
+                runs.append(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                continue
+        return runs
@@ -0,0 +1,212 @@
+"""
+Planificador de búsquedas concurrentes.
+Cada búsqueda es un trabajo con su propio token de cancelación; los trabajos
+en espera se atienden por prioridad y, a igual prioridad, en orden de llegada.
+"""
+import heapq
+import itertools
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+_JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+FINISHED_STATUSES = ('completed', 'cancelled', 'error')
+
+
+class SearchJob:
+    """Una búsqueda encolada o en ejecución."""
+
+    def __init__(self, job_id: str, params: Dict, priority: int = 0):
+        self.job_id = job_id
+        self.params = params
+        self.priority = priority
+        self.status = 'queued'
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self, include_result: bool = False) -> Dict:
+        """Representación JSON del trabajo."""
+        data = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'priority': self.priority,
+            'cancel_requested': self.cancel_event.is_set(),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.error:
+            data['error'] = self.error
+        if include_result and self.result is not None:
+            data['result'] = self.result
+        return data
+
+
+class SearchScheduler:
+    """Ejecuta hasta max_concurrent búsquedas a la vez y encola el resto."""
+
+    def __init__(self, runner: Callable[[SearchJob], Dict],
+                 max_concurrent: int = 1, history_size: int = 100):
+        """
+        Args:
+            runner: Función que ejecuta un trabajo y retorna su resultado.
+                    Debe respetar job.cancel_event.
+            max_concurrent: Búsquedas simultáneas como máximo
+            history_size: Trabajos terminados que se conservan para consulta
+        """
+        self.runner = runner
+        self.max_concurrent = max(1, max_concurrent)
+        self.history_size = history_size
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._jobs: "OrderedDict[str, SearchJob]" = OrderedDict()
+        self._running = 0
+        self._workers: List[threading.Thread] = []
+
+    @staticmethod
+    def is_valid_job_id(job_id: str) -> bool:
+        """Los IDs se usan en nombres de archivo: solo letras, números, '-' y '_'."""
+        return bool(job_id) and bool(_JOB_ID_PATTERN.match(job_id))
+
+    def _ensure_workers(self):
+        """Arranca los hilos worker la primera vez que se encola algo."""
+        while len(self._workers) < self.max_concurrent:
+            worker = threading.Thread(target=self._worker_loop,
+                                      name=f"search-worker-{len(self._workers) + 1}",
+                                      daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def submit(self, params: Dict, priority: int = 0, job_id: str = None) -> SearchJob:
+        """
+        Encola una búsqueda.
+
+        Args:
+            params: Parámetros para el runner
+            priority: Mayor prioridad se atiende antes
+            job_id: ID propuesto por el cliente (opcional)
+
+        Returns:
+            El trabajo creado
+        """
+        job_id = job_id or uuid.uuid4().hex
+        if not self.is_valid_job_id(job_id):
+            raise ValueError(f"job_id inválido: {job_id}")
+
+        with self._condition:
+            if job_id in self._jobs:
+                raise ValueError(f"Ya existe un trabajo con job_id {job_id}")
+
+            job = SearchJob(job_id, params, priority)
+            self._jobs[job_id] = job
+            heapq.heappush(self._queue, (-priority, next(self._sequence), job))
+            self._ensure_workers()
+            self._condition.notify()
+            return job
+
+    def get(self, job_id: str) -> Optional[SearchJob]:
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[SearchJob]:
+        with self._condition:
+            return list(self._jobs.values())
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Posición (1 = siguiente) de un trabajo en espera, o None."""
+        with self._condition:
+            waiting = sorted(entry for entry in self._queue if entry[2].status == 'queued')
+            for position, (_, _, job) in enumerate(waiting, 1):
+                if job.job_id == job_id:
+                    return position
+        return None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancela un trabajo. Si está en espera no llega a ejecutarse; si está
+        corriendo, el runner lo detiene en el siguiente punto de control.
+
+        Returns:
+            False si el trabajo no existe o ya había terminado
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                return False
+
+            job.cancel_event.set()
+            if job.status == 'queued':
+                self._finish(job, 'cancelled', {'status': 'cancelled',
+                                                'message': 'Cancelado antes de iniciar',
+                                                'results': {}})
+            return True
+
+    def cancel_all(self) -> int:
+        """Cancela todos los trabajos activos o en espera. Retorna cuántos."""
+        with self._condition:
+            job_ids = [job.job_id for job in self._jobs.values()
+                       if job.status not in FINISHED_STATUSES]
+        return sum(1 for job_id in job_ids if self.cancel(job_id))
+
+    @property
+    def running_count(self) -> int:
+        with self._condition:
+            return self._running
+
+    @property
+    def queued_count(self) -> int:
+        with self._condition:
+            return sum(1 for job in self._jobs.values() if job.status == 'queued')
+
+    def _finish(self, job: SearchJob, status: str, result: Dict = None, error: str = None):
+        """Marca un trabajo como terminado. Requiere self._condition."""
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now().isoformat()
+        job.done_event.set()
+        self._trim_history()
+
+    def _trim_history(self):
+        """Descarta los trabajos terminados más antiguos. Requiere self._condition."""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while True:
+                    while not self._queue:
+                        self._condition.wait()
+                    _, _, job = heapq.heappop(self._queue)
+                    # Los cancelados en espera ya están terminados: se descartan
+                    if job.status == 'queued':
+                        break
+                job.status = 'running'
+                job.started_at = datetime.now().isoformat()
+                self._running += 1
+
+            try:
+                result = self.runner(job)
+                status = 'cancelled' if result.get('status') == 'cancelled' else 'completed'
+                error = None
+            except Exception as e:
+                print(f"Error en trabajo {job.job_id}: {e}")
+                result, status, error = None, 'error', str(e)
+
+            with self._condition:
+                self._running -= 1
+                self._finish(job, status, result, error)
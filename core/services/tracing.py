@@ -0,0 +1,134 @@
+"""
+Trazas por ejecución en formato Chrome trace-event.
+Cada búsqueda registra spans anidados (run → name → pasos) que se guardan como
+JSON en USER_DATA_DIR/traces y se abren en chrome://tracing o ui.perfetto.dev.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Traza activa del contexto (hilo) actual; None fuera de una ejecución
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('banco_trace', default=None)
+
+
+class RunTrace:
+    """Eventos de una ejecución. Seguro entre hilos."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._events: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _timestamp_us(self, perf_counter_value: float) -> float:
+        return round((perf_counter_value - self._origin) * 1_000_000, 1)
+
+    def add_span(self, name: str, start: float, end: float, args: Dict = None):
+        """Registra un evento completo ("ph": "X") con tiempos de perf_counter()."""
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': self._timestamp_us(start),
+            'dur': round((end - start) * 1_000_000, 1),
+            'pid': self.pid,
+            'tid': threading.get_native_id(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+
+    def to_chrome_trace(self) -> Dict:
+        with self._lock:
+            events = sorted(self._events, key=lambda e: e['ts'])
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'run_id': self.run_id, 'started_at': self.started_at},
+        }
+
+    def save(self, directory: Path = None) -> Path:
+        """Guarda la traza como <run_id>.json y retorna la ruta."""
+        directory = Path(directory) if directory else traces_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.run_id}.json"
+        tmp_path = path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(self.to_chrome_trace(), ensure_ascii=False))
+        os.replace(tmp_path, path)
+        return path
+
+
+def traces_dir() -> Path:
+    from config import USER_DATA_DIR
+    return USER_DATA_DIR / "traces"
+
+
+def current_trace() -> Optional[RunTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(run_id: str):
+    """Activa una traza nueva para el contexto actual mientras dure el bloque."""
+    trace = RunTrace(run_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def use_trace(trace: Optional[RunTrace]):
+    """Propaga una traza existente a otro hilo (p. ej. tareas en un executor)."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, /, **args):
+    """
+    Mide el bloque como un span de la traza activa. Sin traza activa no hace nada.
+    Produce el dict de args para que el bloque agregue datos (p. ej. el estado).
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield args
+        return
+
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args.setdefault('error', f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        trace.add_span(name, start, time.perf_counter(), args)
+
+
+def trace_path(run_id: str) -> Optional[Path]:
+    """Ruta de la traza guardada de una ejecución, si existe."""
+    path = traces_dir() / f"{run_id}.json"
+    return path if path.is_file() else None
+
+
+def list_traces(limit: int = 100) -> List[Dict]:
+    """Trazas guardadas, de la más reciente a la más antigua."""
+    directory = traces_dir()
+    if not directory.exists():
+        return []
+    files = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [{'run_id': p.stem,
+             'size_bytes': p.stat().st_size,
+             'modified_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(p.stat().st_mtime))}
+            for p in files[:limit]]
@@ -0,0 +1,27 @@
+"""
+Configuración de gunicorn para Linux/macOS (en Windows usar waitress).
+
+Uso:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+from config import API_HOST, API_PORT, API_THREADS, API_WORKERS
+
+bind = f"{API_HOST}:{API_PORT}"
+
+# Workers con hilos: cada proceso atiende API_THREADS peticiones a la vez.
+# Los servicios (Sheets, comparación, búsqueda en curso) son por proceso.
+worker_class = "gthread"
+workers = API_WORKERS
+threads = API_THREADS
+
+# Una búsqueda puede durar una hora; con gthread el timeout solo vigila
+# que el proceso siga vivo, no la duración de cada petición.
+timeout = 120
+graceful_timeout = 30
+
+
+def post_worker_init(worker):
+    # Mantenimiento programado de perfiles de Chrome: cada worker lo vigila,
+    # pero un candado y el último reporte hacen que corra uno solo
+    from core.services.profile_maintenance import start_schedule
+    start_schedule()
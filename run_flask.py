@@ -1,3 +1,5 @@
+import argparse
+import multiprocessing
 import sys
 import os
 
@@ -10,15 +12,29 @@ else:
 sys.path.insert(0, base_path)
 
 try:
-    from app import app
+    from app import serve
 except Exception as e:
     raise SystemExit(f"Error importing Flask app: {e}")
 
 if __name__ == '__main__':
-    from config import API_HOST, API_PORT
+    # Necesario en el .exe: las evidencias se dibujan en un pool de procesos
+    multiprocessing.freeze_support()
 
-    # Desactivar debug en modo compilado: el reloader de Flask intenta
-    # relanzar el proceso y falla dentro de un .exe empaquetado.
-    use_debug = False if getattr(sys, 'frozen', False) else True
+    parser = argparse.ArgumentParser(description="Banco de Alimentos API")
+    parser.add_argument("--server", choices=["waitress", "dev"],
+                        help="Servidor a usar (default: API_SERVER de config.py)")
+    parser.add_argument("--threads", type=int,
+                        help="Hilos de waitress (default: API_THREADS de config.py)")
+    parser.add_argument("--maintain-profiles", action="store_true",
+                        help="Compactar los perfiles de Chrome y salir")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Con --maintain-profiles: medir el arranque de Chrome antes y después")
+    args = parser.parse_args()
 
-    app.run(host=API_HOST, port=API_PORT, debug=use_debug)
+    if args.maintain_profiles:
+        from core.services.profile_maintenance import run_maintenance, print_report
+        report = run_maintenance(measure_startup=args.measure_startup)
+        print_report(report)
+        sys.exit(0 if report['status'] == 'completed' else 1)
+
+    serve(server=args.server, threads=args.threads)
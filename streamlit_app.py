@@ -10,6 +10,7 @@ from datetime import datetime
 import os
 import time
 import threading
+import uuid
 from pathlib import Path
 
 # Configuración de la página
@@ -45,7 +46,10 @@ def _write_persistent_state(state: dict):
 
 
 def _mark_search_running():
-    _write_persistent_state({"running": True, "started_at": datetime.now().isoformat()})
+    # job_id propio: permite detener solo esta búsqueda aunque el API
+    # atienda a varios operadores a la vez
+    _write_persistent_state({"running": True, "started_at": datetime.now().isoformat(),
+                             "job_id": uuid.uuid4().hex})
 
 
 def _mark_search_stopped():
@@ -68,6 +72,15 @@ if 'list_b_range' not in st.session_state:
 if 'document_a_url' not in st.session_state:
     st.session_state.document_a_url = ""
 
+if 'document_a_source' not in st.session_state:
+    st.session_state.document_a_source = "url"
+
+if 'use_cache' not in st.session_state:
+    st.session_state.use_cache = True
+
+if 'rfc_column' not in st.session_state:
+    st.session_state.rfc_column = ""
+
 if 'searching' not in st.session_state:
     # Restaurar estado desde disco (por si se recargó la página)
     st.session_state.searching = _is_search_running()
@@ -159,11 +172,17 @@ with st.sidebar:
         st.warning("⏳ Búsqueda en progreso...")
         if st.button("🔴 Detener Búsqueda Actual", use_container_width=True):
             try:
-                response = requests.post(f"{API_URL_LOCAL}/api/stop-search", timeout=5)
-                if response.status_code == 200:
-                    st.success("✅ Señal de detención enviada")
+                job_id = _read_persistent_state().get("job_id")
+                if not job_id:
+                    # Sin job_id no se sabe cuál es: no se detienen las de otros
+                    st.error("❌ No se conoce el trabajo de esta búsqueda; no se puede detener")
                 else:
-                    st.error(f"❌ Error: {response.status_code}")
+                    response = requests.post(f"{API_URL_LOCAL}/api/stop-search",
+                                             json={"job_id": job_id}, timeout=5)
+                    if response.status_code == 200:
+                        st.success("✅ Señal de detención enviada")
+                    else:
+                        st.error(f"❌ Error: {response.status_code}")
             except Exception as e:
                 st.error(f"❌ No se pudo detener: {str(e)}")
 
@@ -185,8 +204,9 @@ def get_screenshots_files():
 
 
 # Pestañas principales
-tab1, tab2, tab3 = st.tabs([
+tab1, tab_gallery, tab2, tab3 = st.tabs([
     "🔍 Buscar Aliados",
+    "🖼️ Galería",
     "⚙️ Configuración",
     "❓ Ayuda"
 ])
@@ -195,6 +215,42 @@ tab1, tab2, tab3 = st.tabs([
 with tab1:
     st.header("Buscar Aliados en Documento")
 
+    # Consulta de un solo nombre sin abrir Chrome (índice del documento A en el API)
+    with st.expander("⚡ Consulta rápida de un nombre"):
+        lookup_query = st.text_input(
+            "Nombre o RFC",
+            placeholder="Ejemplo: agricola santa veneranda",
+            help="Busca en el documento A (la URL del Listado A, o el de config.py) sin abrir Chrome. "
+                 "La primera consulta tarda unos segundos mientras se lee el documento.",
+            key="input_lookup_query"
+        )
+        if lookup_query.strip():
+            params = {"q": lookup_query.strip()}
+            if st.session_state.document_a_url.strip():
+                params["document"] = st.session_state.document_a_url.strip()
+            try:
+                with st.spinner("Consultando..."):
+                    response = requests.get(f"{API_URL_LOCAL}/api/lookup", params=params, timeout=120)
+                lookup = response.json()
+                if response.status_code != 200:
+                    st.error(f"❌ {lookup.get('message', 'Error en la consulta')}")
+                elif lookup['results']:
+                    match_labels = {'exact': 'Exacta', 'prefix': 'Empieza igual', 'word': 'Palabras'}
+                    st.dataframe([
+                        {"Fila": r['row'], "Coincidencia": match_labels.get(r['match'], r['match']),
+                         "Columna": r['column'], "Valor": r['value']}
+                        for r in lookup['results']
+                    ], use_container_width=True, hide_index=True)
+                else:
+                    st.info("Sin coincidencias en el documento A")
+                if response.status_code == 200:
+                    index = lookup['index']
+                    st.caption(f"{lookup['elapsed_ms']} ms · {index['rows']} filas · revisión "
+                               f"{index['revision'] or 'desconocida'}"
+                               + (" · actualizando índice..." if index['refreshing'] else ""))
+            except requests.exceptions.RequestException:
+                st.error("❌ No se pudo conectar con el API")
+
     col1, col2 = st.columns([2, 1])
 
     # Columna izquierda - Formulario
@@ -236,17 +292,53 @@ with tab1:
         st.divider()
 
         st.subheader("📄 Listado A - Documento donde buscar")
-        st.caption("La URL del documento donde se buscara cada nombre del Listado B (ej. listado de contribuyentes del SAT, OSAC, etc).")
-
-        document_a_url = st.text_area(
-            "URL del documento",
-            value=st.session_state.document_a_url,
-            placeholder="https://docs.google.com/spreadsheets/d/...",
-            help="URL completa del documento. Se abrira en Chrome y se usara Ctrl+F para buscar cada nombre.",
-            height=80,
-            key="input_document_a_url"
+        st.caption("El documento donde se buscara cada nombre del Listado B (ej. listado de contribuyentes del SAT, OSAC, etc).")
+
+        source_options = {
+            "url": "🌐 URL (Chrome + Ctrl+F)",
+            "file": "📁 Archivo CSV/XLSX (sin navegador)",
+        }
+        document_a_source = st.radio(
+            "Origen del documento",
+            options=list(source_options.keys()),
+            format_func=lambda x: source_options[x],
+            index=list(source_options.keys()).index(st.session_state.document_a_source),
+            horizontal=True,
+            help="Si el listado se puede descargar (ej. la lista 69-B del SAT en CSV), "
+                 "el modo archivo lo busca en segundos y no requiere iniciar sesion.",
+            key="input_document_a_source"
         )
-        st.session_state.document_a_url = document_a_url
+        st.session_state.document_a_source = document_a_source
+
+        document_a_url = ""
+        document_a_file = None
+        if document_a_source == "url":
+            document_a_url = st.text_area(
+                "URL del documento",
+                value=st.session_state.document_a_url,
+                placeholder="https://docs.google.com/spreadsheets/d/...",
+                help="URL completa del documento. Se abrira en Chrome y se usara Ctrl+F para buscar cada nombre.",
+                height=80,
+                key="input_document_a_url"
+            )
+            st.session_state.document_a_url = document_a_url
+        else:
+            document_a_file = st.file_uploader(
+                "Archivo del documento",
+                type=["csv", "txt", "xlsx", "xlsm"],
+                help="CSV (coma, punto y coma o tabulador) o Excel. Se busca cada nombre en todas las celdas, "
+                     "sin distinguir mayusculas, acentos ni puntuacion.",
+                key="input_document_a_file"
+            )
+            rfc_column = st.text_input(
+                "Columna del RFC en el Listado B (opcional)",
+                value=st.session_state.rfc_column,
+                placeholder="Ejemplo: C",
+                help="Si el rango del Listado B incluye el RFC, los aliados con RFC se buscan por RFC exacto "
+                     "y los que no lo tienen se buscan por nombre (primera columna del rango).",
+                key="input_rfc_column"
+            )
+            st.session_state.rfc_column = rfc_column
 
         st.divider()
 
@@ -283,6 +375,24 @@ with tab1:
             )
             st.session_state.auth_wait_seconds = auth_wait_seconds
 
+        use_cache = st.checkbox(
+            "Reutilizar resultados anteriores",
+            value=st.session_state.use_cache,
+            help="Omite los aliados ya buscados en la misma versión del documento A "
+                 "(si su captura sigue en la carpeta). Desactívalo para buscar todo de nuevo.",
+            key="input_use_cache"
+        )
+        st.session_state.use_cache = use_cache
+
+        fast_detection = st.checkbox(
+            "Detección rápida (captura solo de los encontrados)",
+            value=False,
+            help="Revisa todos los nombres de una vez dentro del documento abierto y solo hace "
+                 "Ctrl+F + captura para los que aparecen. Solo aplica al buscar por URL.",
+            key="input_fast_detection",
+            disabled=st.session_state.document_a_source == "file"
+        )
+
         # Botón limpiar campos
         st.divider()
         if st.button("🗑️ Limpiar Campos", use_container_width=True):
@@ -311,8 +421,10 @@ with tab1:
                 st.error("❌ Ingresa el ID del Google Sheet (Listado B)")
             elif not list_b_range.strip():
                 st.error("❌ Ingresa el rango de celdas (Listado B)")
-            elif not document_a_url.strip():
+            elif document_a_source == "url" and not document_a_url.strip():
                 st.error("❌ Ingresa la URL del documento donde buscar (Listado A)")
+            elif document_a_source == "file" and document_a_file is None:
+                st.error("❌ Sube el archivo del documento donde buscar (Listado A)")
             else:
                 # Marcar que está buscando (persistente)
                 st.session_state.searching = True
@@ -324,22 +436,43 @@ with tab1:
         # ════════════════════════════════════════════════════════════════
         if st.session_state.searching and _is_search_running():
             # Solo ejecutar si tenemos datos válidos
-            if list_b_id.strip() and list_b_range.strip() and document_a_url.strip():
-                with st.spinner(f"⏳ Ejecutando búsqueda... Chrome se abrira, tienes {auth_wait_seconds}s para autenticarte."):
+            file_mode = document_a_source == "file"
+            document_ready = document_a_file is not None if file_mode else document_a_url.strip()
+            if list_b_id.strip() and list_b_range.strip() and document_ready:
+                spinner_text = ("⏳ Buscando en el archivo..." if file_mode else
+                                f"⏳ Ejecutando búsqueda... Chrome se abrira, tienes {auth_wait_seconds}s para autenticarte.")
+                with st.spinner(spinner_text):
                     try:
-                        payload = {
-                            "list_b_id": list_b_id.strip(),
-                            "list_b_range": list_b_range.strip(),
-                            "document_a_url": document_a_url.strip(),
-                            "auth_wait_seconds": auth_wait_seconds,
-                            "filename_prefix": filename_prefix
-                        }
-
-                        response = requests.post(
-                            f"{API_URL_LOCAL}/api/search-in-document",
-                            json=payload,
-                            timeout=3600  # 1 hora max
-                        )
+                        if file_mode:
+                            response = requests.post(
+                                f"{API_URL_LOCAL}/api/search-in-file",
+                                data={
+                                    "list_b_id": list_b_id.strip(),
+                                    "list_b_range": list_b_range.strip(),
+                                    "filename_prefix": filename_prefix,
+                                    "use_cache": str(use_cache).lower(),
+                                    "rfc_column": st.session_state.rfc_column.strip(),
+                                },
+                                files={"document_a_file": (document_a_file.name, document_a_file.getvalue())},
+                                timeout=3600
+                            )
+                        else:
+                            payload = {
+                                "list_b_id": list_b_id.strip(),
+                                "list_b_range": list_b_range.strip(),
+                                "document_a_url": document_a_url.strip(),
+                                "auth_wait_seconds": auth_wait_seconds,
+                                "filename_prefix": filename_prefix,
+                                "use_cache": use_cache,
+                                "detection": "script" if fast_detection else "keystroke",
+                                "job_id": _read_persistent_state().get("job_id"),
+                            }
+
+                            response = requests.post(
+                                f"{API_URL_LOCAL}/api/search-in-document",
+                                json=payload,
+                                timeout=3600  # 1 hora max
+                            )
 
                         if response.status_code == 200:
                             result = response.json()
@@ -349,25 +482,49 @@ with tab1:
                             mc1, mc2, mc3, mc4 = st.columns(4)
                             with mc1:
                                 st.metric("Total", result.get('total_names', 0))
-                            with mc2:
-                                st.metric("Exitosos", result.get('successful', 0))
-                            with mc3:
-                                st.metric("Fallidos", result.get('failed', 0))
+                            if result.get('mode') == 'file' or result.get('detection') == 'script':
+                                with mc2:
+                                    st.metric("Encontrados", result.get('found', 0))
+                                with mc3:
+                                    st.metric("No encontrados", result.get('not_found', 0))
+                            else:
+                                with mc2:
+                                    st.metric("Exitosos", result.get('successful', 0))
+                                with mc3:
+                                    st.metric("Fallidos", result.get('failed', 0))
                             with mc4:
                                 status = "Cancelado" if result.get('status') == 'cancelled' else "Completado"
                                 st.metric("Estado", status)
 
+                            if result.get('driver_restarts'):
+                                st.caption(f"🔁 Chrome se reinició {result['driver_restarts']} vez/veces "
+                                           "durante la búsqueda y se continuó desde el nombre pendiente")
+
+                            if result.get('cache_hits'):
+                                st.caption(f"♻️ {result['cache_hits']} aliados tomados de búsquedas anteriores "
+                                           "(mismo documento A, sin cambios)")
+
                             st.divider()
 
                             if result.get('results'):
                                 st.subheader("📸 Resultados de Búsqueda")
                                 results_list = []
                                 for name, data in result['results'].items():
-                                    results_list.append({
-                                        "Nombre": name,
-                                        "Estado": data.get('status', 'unknown'),
-                                        "Screenshot": data.get('screenshot_path', 'N/A'),
-                                    })
+                                    if result.get('mode') == 'file' or result.get('detection') == 'script':
+                                        matches = data.get('matches', [])
+                                        results_list.append({
+                                            "Nombre": name,
+                                            "Estado": data.get('status', 'unknown'),
+                                            "Coincidencias": data.get('match_count', 0),
+                                            "Fila": ", ".join(str(m['row']) for m in matches[:5]) or "-",
+                                            "Screenshot": data.get('screenshot_path', 'N/A'),
+                                        })
+                                    else:
+                                        results_list.append({
+                                            "Nombre": name,
+                                            "Estado": data.get('status', 'unknown'),
+                                            "Screenshot": data.get('screenshot_path', 'N/A'),
+                                        })
                                 st.dataframe(results_list, use_container_width=True)
 
                                 st.session_state.last_result = result
@@ -437,6 +594,15 @@ with tab1:
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
 
+            # El navegador descarga el ZIP directo del API (se genera al vuelo)
+            today = datetime.now().strftime("%Y%m%d")
+            st.link_button(
+                f"📦 Capturas de hoy ({st.session_state.filename_prefix}) en ZIP",
+                f"{API_URL_LOCAL}/api/screenshots/archive"
+                f"?prefix={st.session_state.filename_prefix}&date={today}",
+                use_container_width=True
+            )
+
             st.divider()
 
             # Lista de screenshots actuales
@@ -472,11 +638,131 @@ with tab1:
             else:
                 st.metric("Cantidad", 0)
 
+        # Exportar resultados de ejecuciones anteriores
+        with st.expander("📊 Exportar resultados"):
+            try:
+                runs = requests.get(f"{API_URL_LOCAL}/api/runs", params={"limit": 20},
+                                    timeout=5).json().get('runs', [])
+            except Exception:
+                runs = []
+
+            if runs:
+                run_labels = {
+                    run['run_id']: f"{run.get('saved_at', '')[:16]} · {run.get('result_count', 0)} aliados"
+                    for run in runs
+                }
+                export_run_id = st.selectbox("Ejecución", list(run_labels),
+                                             format_func=run_labels.get, key="export_run_id")
+                export_format = st.selectbox("Formato", ["csv", "xlsx", "parquet", "arrow"],
+                                             key="export_format")
+
+                if st.button("Preparar archivo", use_container_width=True):
+                    try:
+                        response = requests.get(
+                            f"{API_URL_LOCAL}/api/runs/{export_run_id}/export",
+                            params={"format": export_format}, timeout=120)
+                        if response.status_code == 200:
+                            st.session_state.export_file = {
+                                "data": response.content,
+                                "name": f"resultados_{export_run_id}.{export_format}",
+                                "mime": response.headers.get('Content-Type', 'application/octet-stream'),
+                            }
+                        else:
+                            st.error(f"❌ {response.json().get('message', response.status_code)}")
+                    except Exception as e:
+                        st.error(f"❌ Error: {str(e)}")
+
+                st.link_button("📦 Evidencias de la ejecución (ZIP)",
+                               f"{API_URL_LOCAL}/api/runs/{export_run_id}/evidence.zip",
+                               use_container_width=True)
+
+                export_file = st.session_state.get('export_file')
+                if export_file:
+                    st.download_button(
+                        label=f"📥 {export_file['name']}",
+                        data=export_file['data'],
+                        file_name=export_file['name'],
+                        mime=export_file['mime'],
+                        use_container_width=True
+                    )
+            else:
+                st.info("📭 No hay ejecuciones guardadas")
+
         # Auto-refresh cada 3 segundos cuando hay búsqueda activa
         if _is_search_running():
             time.sleep(3)
             st.rerun()
 
+# Tab Galería: miniaturas paginadas de las capturas
+with tab_gallery:
+    st.header("🖼️ Galería de Capturas")
+
+    try:
+        gallery_runs = requests.get(f"{API_URL_LOCAL}/api/runs", params={"limit": 20},
+                                    timeout=5).json().get('runs', [])
+    except Exception:
+        gallery_runs = []
+
+    gc1, gc2, gc3, gc4 = st.columns(4)
+    with gc1:
+        run_options = {"": "Toda la carpeta"}
+        run_options.update({
+            run['run_id']: f"{run.get('saved_at', '')[:16]} · {run.get('result_count', 0)} aliados"
+            for run in gallery_runs
+        })
+        gallery_run_id = st.selectbox("Ejecución", list(run_options),
+                                      format_func=run_options.get, key="gallery_run_id")
+    with gc2:
+        gallery_status = st.selectbox(
+            "Estado", ["", "found", "not_found", "success", "failed"],
+            format_func=lambda s: s or "Todos", key="gallery_status",
+            disabled=not gallery_run_id,
+            help="Solo disponible al elegir una ejecución")
+    with gc3:
+        gallery_prefix = st.text_input("Prefijo", value="", placeholder="sat", key="gallery_prefix")
+    with gc4:
+        gallery_date = st.text_input("Fecha (AAAAMMDD)", value="", key="gallery_date")
+
+    gp1, gp2 = st.columns(2)
+    with gp1:
+        page_size = st.selectbox("Por página", [24, 48, 96], index=1, key="gallery_page_size")
+    with gp2:
+        page_number = st.number_input("Página", min_value=1, value=1, step=1, key="gallery_page")
+
+    params = {"offset": (page_number - 1) * page_size, "limit": page_size}
+    if gallery_run_id:
+        params["run_id"] = gallery_run_id
+        if gallery_status:
+            params["status"] = gallery_status
+    if gallery_prefix.strip():
+        params["prefix"] = gallery_prefix.strip()
+    if gallery_date.strip():
+        params["date"] = gallery_date.strip()
+
+    try:
+        response = requests.get(f"{API_URL_LOCAL}/api/screenshots", params=params, timeout=60)
+        page = response.json()
+    except Exception as e:
+        page = {"status": "error", "message": str(e)}
+
+    if page.get("status") != "success":
+        st.error(f"❌ {page.get('message', 'No se pudo cargar la galería')}")
+    elif not page.get("items"):
+        st.info("📭 No hay capturas con esos filtros")
+    else:
+        total = page.get("total", 0)
+        pages = max(1, -(-total // page_size))
+        st.caption(f"{total} captura(s) · página {page_number} de {pages}")
+
+        # El navegador pide cada miniatura directo al API (se cargan por separado)
+        grid = st.columns(4)
+        for i, item in enumerate(page["items"]):
+            with grid[i % 4]:
+                if item.get("thumbnail_url"):
+                    st.image(f"{API_URL_LOCAL}{item['thumbnail_url']}", use_container_width=True)
+                status_label = f" · {item['status']}" if item.get("status") else ""
+                st.caption(f"[{item['name']}]({API_URL_LOCAL}{item['image_url']}){status_label}")
+
 # Tab 2: Configuración
 with tab2:
     st.header("⚙️ Configuración")